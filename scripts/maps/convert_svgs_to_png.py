@@ -1,16 +1,20 @@
 #!/usr/bin/env python3
 """
-Convert all SVG files in output_test to PNG - optimized with browser reuse
+Convert all SVG files in output_test to PNG - native rasterizer (cairosvg/resvg)
+in a process pool when installed, otherwise the shared Playwright render pool.
+Only SVGs whose content changed since their PNG was rasterized are converted
+(tracked by content hash in the directory's manifest.json).
+Afterwards every PNG gets a multi-resolution tile set (see tile_pyramid.py).
 """
 
 import os
-import re
-import tempfile
-from pathlib import Path
-from floor_generator import OUTPUT_WIDTH
+from floor_generator import (
+    OUTPUT_WIDTH, NATIVE_RASTERIZER, content_sha256, load_manifest, save_manifest, rasterize_svg_files
+)
+from tile_pyramid import build_directory_tiles
 
-def convert_all_svgs_fast(directory=None):
-    """Convert all SVG files using a single browser instance for speed"""
+def convert_all_svgs_fast(directory=None, max_workers=None, build_tiles=True):
+    """Convert all SVG files - native rasterizer in a process pool, else the shared browser render pool"""
     script_dir = os.path.dirname(os.path.abspath(__file__))
     if directory:
         output_test_dir = directory
@@ -29,90 +33,76 @@ def convert_all_svgs_fast(directory=None):
     
     print(f"Found {len(svg_files)} SVG files to convert...")
     
-    try:
-        from playwright.sync_api import sync_playwright
-        
-        with sync_playwright() as p:
-            # Launch browser ONCE and reuse for all conversions
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                viewport={'width': OUTPUT_WIDTH, 'height': 2000},
-                device_scale_factor=1
-            )
-            
-            for svg_file in svg_files:
-                svg_path = os.path.join(output_test_dir, svg_file)
-                png_file = svg_file.replace('.svg', '.png')
-                png_path = os.path.join(output_test_dir, png_file)
-                
-                # Skip if PNG already exists
-                if os.path.exists(png_path):
-                    print(f"  Skipping {svg_file} (PNG already exists)")
-                    continue
-                
-                print(f"  Converting {svg_file} to {png_file}...")
-                
-                # Read SVG content
+    # PNG is stale unless it was rasterized from an SVG with the same content hash
+    manifest = load_manifest(output_test_dir)
+    
+    def read_if_stale(svg_file):
+        """Return (svg_content, svg_sha256), or None when the existing PNG is up to date."""
+        with open(os.path.join(output_test_dir, svg_file), 'r', encoding='utf-8') as f:
+            svg_content = f.read()
+        svg_sha256 = content_sha256(svg_content)
+        png_path = os.path.join(output_test_dir, svg_file.replace('.svg', '.png'))
+        entry = manifest['diagrams'].get(svg_file, {})
+        if os.path.exists(png_path) and entry.get('png_svg_sha256') == svg_sha256:
+            return None
+        return svg_content, svg_sha256
+    
+    def mark_converted(svg_file, svg_sha256):
+        entry = manifest['diagrams'].setdefault(svg_file, {})
+        entry['svg_sha256'] = svg_sha256
+        entry['png_svg_sha256'] = svg_sha256
+    
+    stale_files = []
+    for svg_file in svg_files:
+        stale = read_if_stale(svg_file)
+        if stale is None:
+            print(f"  Skipping {svg_file} (PNG up to date)")
+        else:
+            stale_files.append((svg_file, stale[1]))
+    jobs = [
+        (os.path.join(output_test_dir, svg_file), os.path.join(output_test_dir, svg_file.replace('.svg', '.png')))
+        for svg_file, _ in stale_files
+    ]
+    
+    if not jobs:
+        save_manifest(output_test_dir, manifest)
+        if build_tiles:
+            build_directory_tiles(output_test_dir, max_workers=max_workers)
+        return
+    
+    if NATIVE_RASTERIZER:
+        # Native rasterizer: no browser at all, files rendered in a process pool
+        print(f"  Rasterizing {len(jobs)} SVG files with {NATIVE_RASTERIZER}...")
+        results = rasterize_svg_files(jobs, OUTPUT_WIDTH, max_workers=max_workers)
+    else:
+        try:
+            # Browser pool: one Chromium, pages rendering in parallel from in-memory SVG
+            from render_pool import get_render_pool
+            pool = get_render_pool(num_pages=max_workers)
+            print(f"  Rendering {len(jobs)} SVG files on {pool.num_pages} browser pages...")
+            results = pool.render_files(jobs, OUTPUT_WIDTH)
+        except Exception as e:
+            # Playwright not installed or Chromium failed to launch
+            print(f"Browser render pool unavailable ({e}). Falling back to individual conversions...")
+            from floor_generator import svg_to_png
+            results = []
+            for svg_path, png_path in jobs:
                 with open(svg_path, 'r', encoding='utf-8') as f:
                     svg_content = f.read()
-                
-                # Extract dimensions
-                viewbox_match = re.search(r'viewBox="0 0 (\d+) (\d+)"', svg_content)
-                if viewbox_match:
-                    svg_width = int(viewbox_match.group(1))
-                    svg_height = int(viewbox_match.group(2))
-                    exact_height = int(OUTPUT_WIDTH * (svg_height / svg_width))
-                else:
-                    exact_height = int(OUTPUT_WIDTH * 0.583)
-                
-                # Create temp file
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.svg', delete=False, encoding='utf-8') as tmp:
-                    tmp.write(svg_content)
-                    tmp_path = tmp.name
-                
-                try:
-                    page = context.new_page()
-                    abs_path = os.path.abspath(tmp_path)
-                    file_url = f'file:///{abs_path.replace(chr(92), "/")}'
-                    
-                    page.goto(file_url, wait_until='load', timeout=5000)
-                    page.wait_for_timeout(50)  # Minimal wait
-                    
-                    svg_element = page.query_selector('svg')
-                    if svg_element:
-                        svg_element.screenshot(path=png_path)
-                    else:
-                        page.screenshot(path=png_path, full_page=True)
-                    
-                    page.close()
-                    
-                    if os.path.exists(png_path) and os.path.getsize(png_path) > 100:
-                        print(f"    ✓ Successfully created {png_file}")
-                    else:
-                        print(f"    ✗ Failed: PNG file not created or too small")
-                except Exception as e:
-                    print(f"    ✗ Failed: {e}")
-                finally:
-                    try:
-                        if os.path.exists(tmp_path):
-                            os.unlink(tmp_path)
-                    except:
-                        pass
-            
-            browser.close()
-            
-    except ImportError:
-        print("Playwright not installed. Falling back to individual conversions...")
-        from floor_generator import svg_to_png
-        for svg_file in svg_files:
-            svg_path = os.path.join(output_test_dir, svg_file)
-            png_file = svg_file.replace('.svg', '.png')
-            png_path = os.path.join(output_test_dir, png_file)
-            if os.path.exists(png_path):
-                continue
-            with open(svg_path, 'r', encoding='utf-8') as f:
-                svg_content = f.read()
-            svg_to_png(svg_content, png_path, OUTPUT_WIDTH, timeout=5)
+                results.append(svg_to_png(svg_content, png_path, OUTPUT_WIDTH, timeout=5))
+    
+    for (svg_file, svg_sha256), (_, png_path), result in zip(stale_files, jobs, results):
+        if result is True and os.path.exists(png_path) and os.path.getsize(png_path) > 100:
+            mark_converted(svg_file, svg_sha256)
+            print(f"    ✓ Successfully created {os.path.basename(png_path)}")
+        else:
+            print(f"    ✗ Failed {svg_file}: {result}")
+    
+    save_manifest(output_test_dir, manifest)
+    
+    # Zoom-level tiles + descriptor per PNG (unchanged PNGs are skipped by content hash)
+    if build_tiles:
+        build_directory_tiles(output_test_dir, max_workers=max_workers)
 
 def convert_all_svgs():
     """Wrapper for backward compatibility"""
@@ -4,8 +4,14 @@ Floor Plan Generator Module
 Generates SVG and PNG floor diagrams from JSON templates
 """
 
+import gzip
+import hashlib
 import json
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
 from xml.sax.saxutils import escape
 from pathlib import Path
 
@@ -35,6 +41,10 @@ ROOM_TYPE_NAMES = {
     'lounge': 'Lounge'
 }
 
+# Room types that may host a printer: generate.py's allows_printer, procedural
+# layouts (layout_generator.py) and the placement optimizer (printer_placement.py)
+PRINTER_ROOM_TYPES = frozenset({'lab', 'classroom', 'library'})
+
 BUILDING_NAMES = {
     'MAINACADE': 'Main Academic Building',
     'SCIENCE': 'Science & Technology Building',
@@ -43,16 +53,225 @@ BUILDING_NAMES = {
 
 OUTPUT_WIDTH = 2400
 
+# Bump whenever generate_floor_svg output changes, so cached diagrams are re-rendered
+RENDERER_VERSION = 3
+
+FONT_FAMILY = "Roboto,Segoe UI,Arial,sans-serif"
+WRITE_SVGZ = False  # Also write gzip-compressed <name>.svgz next to each SVG
+
+# Stacking order of floor layers (see generate_floor_layers)
+LAYER_NAMES = ('base', 'labels', 'printers')
+LAYERS_DIRNAME = "layers"
+
+# Printer icon (50x50, centred on the origin) - defined once in <defs>, placed with <use>
+PRINTER_ICON = (
+    '<g id="printer">'
+    '<rect x="-25" y="-25" width="50" height="50" fill="#2C3E50" stroke="#FFF" stroke-width="3" rx="5"/>'
+    '<rect x="-20" y="-30" width="40" height="8" fill="#7F8C8D" rx="2"/>'
+    '<rect x="-15" y="-10" width="30" height="18" fill="white" rx="2"/>'
+    '<path d="M-10-5h20M-10 2h20" stroke="#2C3E50" stroke-width="2"/>'
+    '</g>'
+)
+MANIFEST_FILENAME = "manifest.json"
+
+# Generic sans-serif family for the resvg backend, used only when none of the SVG's
+# fonts (Roboto, Segoe UI, Arial) are installed - e.g. minimal Linux images
+NATIVE_SANS_SERIF_FAMILY = "DejaVu Sans"
+
+
+# ============================================================================
+# TEMPLATE CACHE
+# ============================================================================
+
+def _freeze(value):
+    """Recursively convert parsed JSON into read-only mappings and tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def thaw_template(value):
+    """Return a mutable (dict/list) deep copy of a cached template."""
+    if isinstance(value, MappingProxyType):
+        return {key: thaw_template(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw_template(item) for item in value]
+    return value
+
+
+@lru_cache(maxsize=None)
+def _load_template_cached(template_path, mtime_ns, size):
+    with open(template_path, 'r', encoding='utf-8') as f:
+        return _freeze(json.load(f))
+
+
+def load_template(template_path):
+    """
+    Load a floor template JSON, parsed once per process and cached.
+    The returned template is immutable; use thaw_template() for a mutable copy.
+    The cache is keyed on the file's mtime/size, so rewritten templates are re-read.
+    """
+    template_path = os.path.abspath(template_path)
+    stat = os.stat(template_path)
+    return _load_template_cached(template_path, stat.st_mtime_ns, stat.st_size)
+
+
+# ============================================================================
+# OUTPUT MANIFEST (content-hash staleness tracking)
+# ============================================================================
+
+def content_sha256(content):
+    """SHA-256 hex digest of a string or bytes."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def diagram_hash(template, room_mapping, building_code, floor_number, include_printers, outputs=()):
+    """
+    Hash of everything a floor diagram is rendered from (template, labels, renderer version),
+    plus the names of any extra outputs the task writes (see diagram_outputs).
+    """
+    payload = json.dumps({
+        'outputs': sorted(outputs),
+        'renderer_version': RENDERER_VERSION,
+        'output_width': OUTPUT_WIDTH,
+        'template': thaw_template(template),
+        'room_mapping': room_mapping or {},
+        'building_code': building_code,
+        'floor_number': floor_number,
+        'include_printers': bool(include_printers),
+    }, sort_keys=True, ensure_ascii=False)
+    return content_sha256(payload)
+
+
+def load_manifest(output_dir):
+    """
+    Load the diagram manifest of an output directory.
+    Maps SVG filename -> {"hash": input hash, "svg_sha256": ..., "png_svg_sha256": ...},
+    where png_svg_sha256 is the hash of the SVG the current PNG was rasterized from.
+    """
+    manifest_path = os.path.join(output_dir, MANIFEST_FILENAME)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    manifest.setdefault('diagrams', {})
+    return manifest
+
+
+def save_manifest(output_dir, manifest):
+    """Atomically write the diagram manifest of an output directory."""
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILENAME)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def base_layer_filename(template_path):
+    """Filename of a template's base layer, shared by every floor built from it."""
+    template_name = os.path.splitext(os.path.basename(template_path))[0]
+    return f"{template_name}.base.svg"
+
+
+def layer_filenames(template_path, building_code, floor_number):
+    """
+    Return {layer name: filename} for a floor's layers. The base layer is named after
+    the template, so every floor built from the same template shares one file.
+    """
+    filename_base = f"{building_code}_F{floor_number}"
+    return {
+        'base': base_layer_filename(template_path),
+        'labels': f"{filename_base}.labels.svg",
+        'printers': f"{filename_base}.printers.svg",
+    }
+
+
+def write_layer_index(layers_dir, entries):
+    """
+    Merge {diagram name: {layer name: filename}} into the layers directory index,
+    which tells clients which files to stack (in LAYER_NAMES order) for each floor.
+    """
+    index_path = os.path.join(layers_dir, MANIFEST_FILENAME)
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    index.setdefault('order', list(LAYER_NAMES))
+    index.setdefault('floors', {}).update(entries)
+    save_manifest(layers_dir, index)
+
+
+def _num(value):
+    """Format a coordinate with at most one decimal place ("120.0" -> "120")."""
+    return ('%.1f' % value).rstrip('0').rstrip('.')
+
+
+def write_svg(svg_path, svg_content, svgz=WRITE_SVGZ, if_changed=False):
+    """
+    Atomically write an SVG file, plus a gzip-compressed .svgz copy when svgz is True.
+    With if_changed, an existing file with identical content is left untouched.
+    """
+    if if_changed and os.path.exists(svg_path):
+        with open(svg_path, 'r', encoding='utf-8') as f:
+            if f.read() == svg_content:
+                return
+    # Write to a temp file and rename, so readers never see a partly written file
+    tmp_path = svg_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(svg_content)
+    os.replace(tmp_path, svg_path)
+    if svgz:
+        svgz_path = os.path.splitext(svg_path)[0] + '.svgz'
+        tmp_path = svgz_path + ".tmp"
+        with gzip.open(tmp_path, 'wb', compresslevel=9) as f:
+            f.write(svg_content.encode('utf-8'))
+        os.replace(tmp_path, svgz_path)
+
 
 def generate_floor_svg(spec, output_width=OUTPUT_WIDTH, include_printers=False, building_name=None, floor_number=None):
     """Generate SVG from grid-based floor plan specification
     
+    Output is compact: shared styles live in one <style> block (one class per
+    room type), the printer icon is defined once in <defs> and placed with <use>,
+    and coordinates are rounded to one decimal.
+    
+    Args:
+        spec: Floor specification dictionary
+        output_width: Output width in pixels
+        include_printers: If True, include printer icons. Default: False
+        building_name: Name of the building for title
+        floor_number: Floor number for title
+    """
+    layers = generate_floor_layers(spec, output_width, include_printers=include_printers,
+                                   building_name=building_name, floor_number=floor_number)
+    return compose_floor_layers(layers)
+
+
+def generate_floor_layers(spec, output_width=OUTPUT_WIDTH, include_printers=False, building_name=None, floor_number=None,
+                          names=LAYER_NAMES):
+    """Generate the floor plan as separate, stackable SVG layers
+    
+    Returns dict of standalone SVG documents sharing one viewBox:
+        'base':     background, room geometry, outline and legend (depends on the template only)
+        'labels':   room labels and title (depends on room names and building/floor)
+        'printers': printer markers (only when include_printers)
+    Overlays are transparent, so clients can stack them or compose_floor_layers() can merge them.
+    
     Args:
         spec: Floor specification dictionary
         output_width: Output width in pixels
         include_printers: If True, include printer icons. Default: False
         building_name: Name of the building for title
         floor_number: Floor number for title
+        names: Layers to build; the others are skipped (e.g. only the overlays of a floor
+            whose template base layer is already rendered)
     """
     
     # Grid configuration
@@ -76,7 +295,9 @@ def generate_floor_svg(spec, output_width=OUTPUT_WIDTH, include_printers=False,
     
     rooms = spec.get('rooms', [])
     doors = spec.get('doors', [])
-    printers = spec.get('printers', []) if include_printers else []
+    printers = spec.get('printers', []) if include_printers and 'printers' in names else []
+    want_base = 'base' in names
+    want_labels = 'labels' in names
     
     # Convert grid coordinates to pixel coordinates
     room_by_id = {}
@@ -92,13 +313,17 @@ def generate_floor_svg(spec, output_width=OUTPUT_WIDTH, include_printers=False,
         }
         room_by_id[r['id']] = room_data
     
-    def get_room_color(room_type):
-        return ROOM_COLORS.get(room_type, '#FFFFFF')
+    def get_room_class(room_type):
+        return f"r-{room_type}" if room_type in ROOM_COLORS else "r-other"
     
-    def get_text_color(room_type):
-        """Get text color based on room type - dark for light backgrounds"""
+    def get_text_class(room_type):
+        """Get text class based on room type - dark for light backgrounds"""
         light_bg_types = {'corridor', 'lounge'}
-        return '#1a1a1a' if room_type in light_bg_types else 'white'
+        return 'tl dk' if room_type in light_bg_types else 'tl lt'
+    
+    def room_rect(r):
+        return (f'<rect class="{get_room_class(r["type"])}" x="{_num(r["x"])}" y="{_num(r["y"])}" '
+                f'width="{_num(r["w"])}" height="{_num(r["h"])}"/>')
     
     def should_rotate_text(label, w, h):
         """Only rotate if individual words don't fit horizontally"""
@@ -123,31 +348,21 @@ def generate_floor_svg(spec, output_width=OUTPUT_WIDTH, include_printers=False,
         
         return {'x': x, 'y': y}
     
-    # ROOMS - Draw all rooms perfectly aligned to grid
+    # ROOMS - Draw all rooms perfectly aligned to grid (geometry and labels go to separate layers)
     room_elems = []
+    label_elems = []
     for room_id, r in room_by_id.items():
-        # Draw corridors even without labels (they're passageways, not rooms)
-        if not r['label'] and r['type'] != 'corridor':
-            color = get_room_color(r['type'])
-            room_elems.append(f'''<rect x="{r['x']}" y="{r['y']}" width="{r['w']}" height="{r['h']}" 
-                  fill="{color}" stroke="none"/>''')
-            continue
+        # Room rectangle - every room is drawn, corridors included (they're passageways)
+        if want_base:
+            room_elems.append(room_rect(r))
         
-        # Corridors without labels should still be drawn (they're passageways)
-        if not r['label'] and r['type'] == 'corridor':
-            color = get_room_color(r['type'])
-            room_elems.append(f'''<rect x="{r['x']}" y="{r['y']}" width="{r['w']}" height="{r['h']}" 
-                  fill="{color}" stroke="none"/>''')
+        # Unlabelled rooms only have geometry
+        if not r['label'] or not want_labels:
             continue
         
-        color = get_room_color(r['type'])
-        text_color = get_text_color(r['type'])
+        text_class = get_text_class(r['type'])
         rotate = should_rotate_text(r['label'], r['w'], r['h'])
         
-        # Room rectangle
-        room_elems.append(f'''<rect x="{r['x']}" y="{r['y']}" width="{r['w']}" height="{r['h']}" 
-              fill="{color}" stroke="none"/>''')
-        
         # Text label
         cx = r['x'] + r['w']/2
         cy = r['y'] + r['h']/2
@@ -165,13 +380,8 @@ def generate_floor_svg(spec, output_width=OUTPUT_WIDTH, include_printers=False,
         
         if rotate:
             # Vertical text (rare case)
-            label = f'''<text x="{cx}" y="{cy}" 
-                  font-family="Roboto,Segoe UI,Arial,sans-serif" 
-                  font-size="{font_size}" font-weight="600"
-                  fill="{text_color}" text-anchor="middle" dominant-baseline="middle"
-                  transform="rotate(-90 {cx} {cy})">
-              {escape(r['label'])}
-            </text>'''
+            label = (f'<text class="{text_class}" x="{_num(cx)}" y="{_num(cy)}" font-size="{font_size}" '
+                     f'transform="rotate(-90 {_num(cx)} {_num(cy)})">{escape(r["label"])}</text>')
         elif estimated_width > available_width and len(words) > 1:
             # Text is too wide - split into multiple lines
             line_height = 45
@@ -243,19 +453,14 @@ def generate_floor_svg(spec, output_width=OUTPUT_WIDTH, include_printers=False,
             if total_height < available_height:
                 start_y = r['y'] + text_top_margin + (available_height - total_height) / 2 + (font_size / 2)
             
-            label = '<g>'
+            label = f'<g class="{text_class}" font-size="{font_size}">'
             for i, line_words in enumerate(lines):
                 line_text = ' '.join(line_words)
                 y_pos = start_y + i * line_height
                 # Ensure text doesn't go below room boundary
                 if y_pos + font_size/2 > r['y'] + r['h'] - text_bottom_margin:
                     break  # Skip lines that would overflow
-                label += f'''<text x="{cx}" y="{y_pos}" 
-                      font-family="Roboto,Segoe UI,Arial,sans-serif" 
-                      font-size="{font_size}" font-weight="600"
-                      fill="{text_color}" text-anchor="middle" dominant-baseline="middle">
-                  {escape(line_text)}
-                </text>'''
+                label += f'<text x="{_num(cx)}" y="{_num(y_pos)}">{escape(line_text)}</text>'
             label += '</g>'
         else:
             # Single line horizontal text - ensure proper centering and it fits
@@ -287,14 +492,10 @@ def generate_floor_svg(spec, output_width=OUTPUT_WIDTH, include_printers=False,
             if text_y + adjusted_font_size/2 > r['y'] + r['h'] - text_margin:
                 text_y = r['y'] + r['h'] - text_margin - adjusted_font_size/2
             
-            label = f'''<text x="{cx}" y="{text_y}" 
-                  font-family="Roboto,Segoe UI,Arial,sans-serif" 
-                  font-size="{adjusted_font_size}" font-weight="600"
-                  fill="{text_color}" text-anchor="middle" dominant-baseline="middle">
-              {escape(r['label'])}
-            </text>'''
+            label = (f'<text class="{text_class}" x="{_num(cx)}" y="{_num(text_y)}" '
+                     f'font-size="{adjusted_font_size}">{escape(r["label"])}</text>')
         
-        room_elems.append(label)
+        label_elems.append(label)
     
     # DOORS - Removed per user request (no doors in diagrams)
     
@@ -304,31 +505,18 @@ def generate_floor_svg(spec, output_width=OUTPUT_WIDTH, include_printers=False,
         pos = printer_pos(p)
         label = p.get('label', p['id'])
         
-        # Printer icon - 50x50px
-        printer_elems.append(f'''
-    <!-- Printer {escape(p['id'])} -->
-    <rect x="{pos['x']-25}" y="{pos['y']-25}" width="50" height="50" 
-          fill="#2C3E50" stroke="#FFF" stroke-width="3" rx="5"/>
-    <rect x="{pos['x']-20}" y="{pos['y']-30}" width="40" height="8" 
-          fill="#7F8C8D" rx="2"/>
-    <rect x="{pos['x']-15}" y="{pos['y']-10}" width="30" height="18" 
-          fill="white" rx="2"/>
-    <line x1="{pos['x']-10}" y1="{pos['y']-5}" x2="{pos['x']+10}" y2="{pos['y']-5}" 
-          stroke="#2C3E50" stroke-width="2"/>
-    <line x1="{pos['x']-10}" y1="{pos['y']+2}" x2="{pos['x']+10}" y2="{pos['y']+2}" 
-          stroke="#2C3E50" stroke-width="2"/>
-    <text x="{pos['x']}" y="{pos['y']+45}" 
-          font-family="Roboto,Segoe UI,Arial,sans-serif" 
-          font-size="24" font-weight="700"
-          fill="#1a1a1a" text-anchor="middle">
-      {escape(label)}
-    </text>''')
+        # Printer icon - 50x50px, shared definition placed at the printer position
+        printer_elems.append(
+            f'<use xlink:href="#printer" x="{_num(pos["x"])}" y="{_num(pos["y"])}"/>'
+            f'<text class="pl" x="{_num(pos["x"])}" y="{_num(pos["y"] + 45)}">{escape(label)}</text>'
+        )
     
     # Building outline
-    border = f'<rect x="0" y="0" width="{W}" height="{H}" fill="none" stroke="#222" stroke-width="8"/>'
+    border = f'<rect width="{W}" height="{H}" fill="none" stroke="#222" stroke-width="8"/>'
     
     # Generate title and legend
-    title_legend_elems = []
+    title_elems = []
+    legend_elems = []
     
     # Title
     if building_name and floor_number:
@@ -342,12 +530,9 @@ def generate_floor_svg(spec, output_width=OUTPUT_WIDTH, include_printers=False,
         
         title_text = f"{building_name} - {get_ordinal(floor_number)} Floor"
         title_y = H + 50
-        title_legend_elems.append(f'''<text x="{W/2}" y="{title_y}" 
-              font-family="Roboto,Segoe UI,Arial,sans-serif" 
-              font-size="48" font-weight="700"
-              fill="#1a1a1a" text-anchor="middle" dominant-baseline="middle">
-          {escape(title_text)}
-        </text>''')
+        title_elems.append(
+            f'<text class="tt" x="{_num(W/2)}" y="{_num(title_y)}">{escape(title_text)}</text>'
+        )
     
     # Legend - collect unique room types from the floor
     unique_room_types = set()
@@ -374,7 +559,7 @@ def generate_floor_svg(spec, output_width=OUTPUT_WIDTH, include_printers=False,
     legend_text_size = 40  # Reasonable text size
     legend_text_margin = 20  # Space between square and text
     
-    for i, room_type in enumerate(sorted_types):
+    for i, room_type in enumerate(sorted_types if want_base else []):
         row = i // LEGEND_COLS
         col = i % LEGEND_COLS
         
@@ -388,21 +573,18 @@ def generate_floor_svg(spec, output_width=OUTPUT_WIDTH, include_printers=False,
         
         y_pos = legend_start_y + row * LEGEND_ITEM_HEIGHT
         
-        color = ROOM_COLORS.get(room_type, '#FFFFFF')
         room_name = ROOM_TYPE_NAMES.get(room_type, room_type.title())
         
         # Colored square (on the left)
-        title_legend_elems.append(f'''<rect x="{square_x}" y="{y_pos - legend_square_size/2}" 
-              width="{legend_square_size}" height="{legend_square_size}" 
-              fill="{color}" stroke="#333" stroke-width="3"/>''')
+        legend_elems.append(
+            f'<rect class="{get_room_class(room_type)} ls" x="{_num(square_x)}" y="{_num(y_pos - legend_square_size/2)}" '
+            f'width="{legend_square_size}" height="{legend_square_size}"/>'
+        )
         
         # Room name to the right of square (MUCH bigger text)
-        title_legend_elems.append(f'''<text x="{text_x}" y="{y_pos}" 
-              font-family="Roboto,Segoe UI,Arial,sans-serif" 
-              font-size="{legend_text_size}" font-weight="700"
-              fill="#1a1a1a" text-anchor="start" dominant-baseline="middle">
-          {escape(room_name)}
-        </text>''')
+        legend_elems.append(
+            f'<text class="lg" x="{_num(text_x)}" y="{_num(y_pos)}" font-size="{legend_text_size}">{escape(room_name)}</text>'
+        )
     
     # Update viewBox to include title and legend area
     total_height = H + EXTRA_HEIGHT
@@ -410,45 +592,179 @@ def generate_floor_svg(spec, output_width=OUTPUT_WIDTH, include_printers=False,
     # Recalculate output height with actual EXTRA_HEIGHT
     out_h = diagram_height + int(output_width * (EXTRA_HEIGHT / W))
     
-    svg = f'''<?xml version="1.0" encoding="utf-8"?>
-<svg xmlns="http://www.w3.org/2000/svg" 
-     viewBox="0 0 {W} {total_height}" 
-     width="{output_width}" 
-     height="{out_h}"
-     style="display:block; max-width:100%; height:auto;">
-  <defs>
-    <style>
-      text {{ 
-        -webkit-font-smoothing: antialiased;
-        -moz-osx-font-smoothing: grayscale;
-      }}
-    </style>
-  </defs>
-  
-  <!-- Background -->
-  <rect x="0" y="0" width="{W}" height="{total_height}" fill="#f5f5f5"/>
-  
-  <!-- Rooms -->
-  {chr(10).join(room_elems)}
-  
-  <!-- Printers -->
-  {chr(10).join(printer_elems)}
-  
-  <!-- Building outline -->
-  {border}
-  
-  <!-- Title and Legend -->
-  {chr(10).join(title_legend_elems)}
-</svg>'''
-    
-    return svg
+    # Shared styles: one class per room type present, plus text classes
+    used_types = sorted({r['type'] for r in room_by_id.values()} | set(sorted_types))
+    text_style = f'text{{font-family:{FONT_FAMILY};-webkit-font-smoothing:antialiased;-moz-osx-font-smoothing:grayscale}}'
+    base_style = (
+        text_style
+        + ''.join(f'.{get_room_class(t)}{{fill:{ROOM_COLORS.get(t, "#FFFFFF")}}}' for t in used_types)
+        + '.lg{font-weight:700;fill:#1a1a1a;dominant-baseline:middle}'
+        '.ls{stroke:#333;stroke-width:3}'
+    )
+    labels_style = (
+        text_style
+        + '.tl{font-weight:600;text-anchor:middle;dominant-baseline:middle}'
+        '.dk{fill:#1a1a1a}.lt{fill:white}'
+        '.tt{font-size:48px;font-weight:700;fill:#1a1a1a;text-anchor:middle;dominant-baseline:middle}'
+    )
+    printers_style = text_style + '.pl{font-size:24px;font-weight:700;fill:#1a1a1a;text-anchor:middle}'
+    
+    def layer(style, elems, extra_defs=''):
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+            f'viewBox="0 0 {W} {total_height}" width="{output_width}" height="{out_h}" '
+            f'style="display:block;max-width:100%;height:auto">\n'
+            f'<defs><style>{style}</style>{extra_defs}</defs>\n'
+            + '\n'.join(elems)
+            + '\n</svg>'
+        )
+    
+    layers = {}
+    if want_base:
+        layers['base'] = layer(base_style, [f'<rect width="{W}" height="{total_height}" fill="#f5f5f5"/>']
+                               + room_elems + [border] + legend_elems)
+    if want_labels:
+        layers['labels'] = layer(labels_style, label_elems + title_elems)
+    if printer_elems:
+        layers['printers'] = layer(printers_style, printer_elems, PRINTER_ICON)
+    
+    return layers
+
+
+_LAYER_PATTERN = re.compile(r'^(.*?<svg [^>]*>)\n<defs><style>(.*?)</style>(.*?)</defs>\n(.*)\n</svg>$', re.DOTALL)
+
+
+def compose_floor_layers(layers, names=LAYER_NAMES):
+    """
+    Merge floor layers (as returned by generate_floor_layers) into one SVG document.
+    Pure string work - no layout or rendering. Layers missing from `layers` are skipped.
+    """
+    header = None
+    style_rules = []
+    extra_defs = []
+    bodies = []
+    for name in names:
+        if name not in layers:
+            continue
+        match = _LAYER_PATTERN.match(layers[name])
+        if not match:
+            raise ValueError(f"Not a floor layer document: {name}")
+        layer_header, style, defs, body = match.groups()
+        header = header or layer_header
+        for rule in style.split('}'):
+            if rule and rule + '}' not in style_rules:
+                style_rules.append(rule + '}')
+        if defs:
+            extra_defs.append(defs)
+        bodies.append(body)
+    
+    return (
+        f'{header}\n<defs><style>{"".join(style_rules)}</style>{"".join(extra_defs)}</defs>\n'
+        + '\n'.join(bodies)
+        + '\n</svg>'
+    )
+
+
+# ============================================================================
+# NATIVE RASTERIZER (browser-free)
+# ============================================================================
+
+def _load_native_rasterizer():
+    """
+    Return (backend_name, render_fn) for the first available pure-library SVG renderer,
+    or (None, None). render_fn(svg_content, width) returns PNG bytes.
+    """
+    try:
+        import cairosvg
+        
+        def render_cairosvg(svg_content, width):
+            return cairosvg.svg2png(bytestring=svg_content.encode('utf-8'), output_width=width)
+        return ('cairosvg', render_cairosvg)
+    except (ImportError, OSError):
+        pass  # cairosvg not installed, or the cairo library is missing
+    
+    try:
+        import resvg_py
+        
+        def render_resvg(svg_content, width):
+            return bytes(resvg_py.svg_to_bytes(
+                svg_string=svg_content, width=width, sans_serif_family=NATIVE_SANS_SERIF_FAMILY
+            ))
+        return ('resvg', render_resvg)
+    except ImportError:
+        pass
+    
+    return (None, None)
+
+
+NATIVE_RASTERIZER, _native_render = _load_native_rasterizer()
+
+
+def svg_to_png_bytes(svg_content, width=OUTPUT_WIDTH):
+    """Rasterize SVG markup to PNG bytes with the native backend (cairosvg or resvg)."""
+    if _native_render is None:
+        raise RuntimeError("No native SVG rasterizer installed (pip install cairosvg or resvg-py)")
+    return _native_render(svg_content, width)
+
+
+def _rasterize_svg_file_task(job):
+    """Process pool entry point: (svg_path, png_path, width) -> True, or the exception raised."""
+    svg_path, png_path, width = job
+    try:
+        with open(svg_path, 'r', encoding='utf-8') as f:
+            png_bytes = svg_to_png_bytes(f.read(), width)
+        with open(png_path, 'wb') as f:
+            f.write(png_bytes)
+        return True
+    except Exception as e:
+        return e
+
+
+def rasterize_svg_files(jobs, width=OUTPUT_WIDTH, max_workers=None):
+    """
+    Rasterize many SVG files to PNG with the native backend in a process pool.
+    Returns a list aligned with jobs: True, or the exception raised for that file.
+    
+    Args:
+        jobs: List of (svg_path, png_path) tuples
+        width: Output PNG width in pixels
+        max_workers: Pool size (None = CPU count, 1 = rasterize serially in this process)
+    """
+    jobs = [(svg_path, png_path, width) for svg_path, png_path in jobs]
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(jobs))
+    
+    if max_workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                return list(pool.map(_rasterize_svg_file_task, jobs))
+        except (OSError, RuntimeError) as e:
+            print(f"    Warning: Process pool unavailable ({e}), rasterizing serially")
+    
+    return [_rasterize_svg_file_task(job) for job in jobs]
 
 
 def svg_to_png(svg_content, output_path, width=OUTPUT_WIDTH, timeout=5):
-    """Convert SVG to PNG using Playwright. Returns True if successful, False otherwise."""
+    """
+    Convert SVG to PNG. Uses the native rasterizer when installed, otherwise
+    Playwright, then Selenium. Returns True if successful, False otherwise.
+    """
     import re
     import tempfile
     
+    # Method 0: Native rasterizer (no browser, no temp file)
+    if _native_render is not None:
+        try:
+            png_bytes = svg_to_png_bytes(svg_content, width)
+            with open(output_path, 'wb') as f:
+                f.write(png_bytes)
+            if os.path.getsize(output_path) > 100:
+                return True
+        except Exception as e:
+            print(f"      {NATIVE_RASTERIZER} failed: {e}")
+    
     # Extract dimensions from SVG viewBox
     viewbox_match = re.search(r'viewBox="0 0 (\d+) (\d+)"', svg_content)
     if viewbox_match:
@@ -467,61 +783,17 @@ def svg_to_png(svg_content, output_path, width=OUTPUT_WIDTH, timeout=5):
         else:
             exact_height = int(width * 0.583)
     
-    # Method 1: Use Playwright (fast and accurate, no cropping)
+    # Method 1: Shared Playwright render pool (browser launched once per process, no temp files)
     try:
-        from playwright.sync_api import sync_playwright
+        from render_pool import get_render_pool
         
-        # Create temporary SVG file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.svg', delete=False, encoding='utf-8') as tmp:
-            tmp.write(svg_content)
-            tmp_path = tmp.name
-        
-        try:
-            with sync_playwright() as p:
-                # Launch with minimal overhead
-                browser = p.chromium.launch(headless=True, args=['--disable-gpu', '--no-sandbox'])
-                # Use viewport that matches desired output size
-                context = browser.new_context(
-                    viewport={'width': width, 'height': exact_height},
-                    device_scale_factor=1,
-                    ignore_https_errors=True
-                )
-                page = context.new_page()
-                
-                # Convert Windows path to file:// URL
-                abs_path = os.path.abspath(tmp_path)
-                file_url = f'file:///{abs_path.replace(chr(92), "/")}'
-                
-                # Load the SVG - use domcontentloaded for faster loading
-                page.goto(file_url, wait_until='domcontentloaded', timeout=5000)
-                
-                # Minimal wait - SVG renders instantly
-                page.wait_for_timeout(50)
-                
-                # Get the SVG element and screenshot it directly - much faster than full page
-                svg_element = page.query_selector('svg')
-                if svg_element:
-                    # Screenshot the SVG element directly - fastest method
-                    svg_element.screenshot(path=output_path, timeout=5000)
-                else:
-                    # Fallback: screenshot the entire page
-                    page.screenshot(path=output_path, full_page=True, timeout=5000)
-                
-                browser.close()
-                
-                if os.path.exists(output_path) and os.path.getsize(output_path) > 100:
-                    return True
-        finally:
-            try:
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
-            except:
-                pass
+        get_render_pool().render(svg_content, output_path, width, timeout=max(timeout, 30))
+        if os.path.exists(output_path) and os.path.getsize(output_path) > 100:
+            return True
     except ImportError:
         pass  # Playwright not installed
     except Exception as e:
         print(f"      Playwright failed: {e}")
-        pass
     
     # Method 3: Try Selenium (last resort)
     try:
@@ -578,49 +850,16 @@ def svg_to_png(svg_content, output_path, width=OUTPUT_WIDTH, timeout=5):
     return False
 
 
-def generate_floor_diagram(template_path, output_dir, building_code, floor_number, room_mapping, generate_png=True, include_printers=False):
+def prepare_floor_spec(template_path, room_mapping=None):
     """
-    Generate floor diagram from template and save to output directory.
-    Returns tuple: (diagram_filename, grid_to_pixel_scale)
-    
-    Args:
-        template_path: Path to JSON template file
-        output_dir: Directory to save diagrams
-        building_code: Code of the building
-        floor_number: Floor number
-        room_mapping: Dict mapping room template IDs to database room_codes
-        generate_png: If True, also generate PNG. Default: True
-        include_printers: If True, include printer icons. Default: False
+    Load a floor template as a mutable spec: duplicate restrooms removed (only one men's and
+    one women's per floor) and, when room_mapping is given, room labels replaced by database
+    room names. The room set depends on the template only, so every floor built from one
+    template shares the same geometry (base layer).
     """
-    # Create output directory if it doesn't exist
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Generate deterministic filename (no hash)
-    filename_base = f"{building_code}_F{floor_number}"
-    svg_filename = f"{filename_base}.svg"
-    png_filename = f"{filename_base}.png"
-    svg_path = os.path.join(output_dir, svg_filename)
+    # Cached template is shared, so work on a mutable copy (rooms are filtered/relabelled below)
+    spec = thaw_template(load_template(template_path))
     
-    # Load template (needed for scale calculation even if file exists)
-    with open(template_path, 'r', encoding='utf-8') as f:
-        spec = json.load(f)
-    
-    # Calculate grid to pixel scale (needed regardless)
-    # Grid coordinates are in grid units (e.g., 5.9 means 5.9 grid cells from origin)
-    # Pixel coordinates should be actual pixel positions on the OUTPUT_WIDTH image
-    GRID_SIZE = spec.get('grid_size', 100)
-    GRID_COLS = spec.get('grid_cols', 24)
-    svg_width = GRID_COLS * GRID_SIZE
-    # Scale: pixels per grid unit (e.g., if 24 grid cols = 2400px, then 1 grid unit = 100px)
-    grid_to_pixel_scale = OUTPUT_WIDTH / GRID_COLS
-    
-    # Get building name from building code
-    building_name = BUILDING_NAMES.get(building_code, building_code)
-    
-    # Always regenerate SVG to include title and legend (even if files exist)
-    svg_content = None
-    
-    # Update room labels to match database room names
     # FIRST: Remove duplicate restrooms - ensure only one men's and one women's per floor
     rooms = spec.get('rooms', [])
     seen_restrooms = {'m': False, 'w': False}  # Track to prevent duplicates
@@ -652,10 +891,9 @@ def generate_floor_diagram(template_path, output_dir, building_code, floor_numbe
     
     # Update the spec with filtered rooms
     spec['rooms'] = filtered_rooms
-    rooms = filtered_rooms
     
     # NOW update room labels
-    for room in rooms:
+    for room in filtered_rooms if room_mapping else []:
         room_id = room.get('id', '')
         current_label = room.get('label', '')
         
@@ -669,17 +907,82 @@ def generate_floor_diagram(template_path, output_dir, building_code, floor_numbe
         # Strategy 3: If no match found, keep original label if it exists
         # (This ensures rooms still show something even if not in mapping)
     
+    return spec
+
+
+def render_base_layer(template_path, layers_dir=None):
+    """
+    Lay out a template's base layer (geometry, outline, legend) and return its SVG.
+    With layers_dir, also write it there as <template>.base.svg (atomically, and only when
+    the content changed). Called once per template by generate_floor_diagrams.
+    """
+    spec = prepare_floor_spec(template_path)
+    base_layer = generate_floor_layers(spec, OUTPUT_WIDTH, names=('base',))['base']
+    if layers_dir:
+        os.makedirs(layers_dir, exist_ok=True)
+        write_svg(os.path.join(layers_dir, base_layer_filename(template_path)), base_layer, if_changed=True)
+    return base_layer
+
+
+def generate_floor_diagram(template_path, output_dir, building_code, floor_number, room_mapping, generate_png=True, include_printers=False, svgz=WRITE_SVGZ,
+                           layers_dir=None, base_layer=None):
+    """
+    Generate floor diagram from template and save to output directory.
+    Returns tuple: (diagram_filename, grid_to_pixel_scale)
+    
+    Only the floor's overlays (labels, printers) are laid out here; the geometry comes
+    from the template's base layer, rendered once per template (see render_base_layer),
+    and the diagram is a cheap merge of the layers.
+    
+    Args:
+        template_path: Path to JSON template file
+        output_dir: Directory to save diagrams
+        building_code: Code of the building
+        floor_number: Floor number
+        room_mapping: Dict mapping room template IDs to database room_codes
+        generate_png: If True, also generate PNG. Default: True
+        include_printers: If True, include printer icons. Default: False
+        svgz: If True, also write a gzip-compressed .svgz copy. Default: WRITE_SVGZ
+        layers_dir: If set, also write the floor's overlay files here (see layer_filenames);
+            the shared base layer file is written by render_base_layer
+        base_layer: SVG of the template's base layer (rendered here when not given)
+    """
+    # Create output directory if it doesn't exist
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # Generate deterministic filename (no hash)
+    svg_filename, png_filename = diagram_filenames(building_code, floor_number)
+    svg_path = os.path.join(output_dir, svg_filename)
+    
+    # Restrooms deduplicated, labels mapped to database room names
+    spec = prepare_floor_spec(template_path, room_mapping)
+    
+    # Calculate grid to pixel scale (needed regardless)
+    grid_to_pixel_scale = get_grid_to_pixel_scale(spec)
+    
     # Get building name from building code
     building_name = BUILDING_NAMES.get(building_code, building_code)
     
-    # Generate SVG if we don't already have it
-    if svg_content is None:
-        svg_content = generate_floor_svg(spec, OUTPUT_WIDTH, include_printers=include_printers, 
-                                         building_name=building_name, floor_number=floor_number)
+    if base_layer is None:
+        base_layer = render_base_layer(template_path, layers_dir)
     
-    # Save SVG (fast)
-    with open(svg_path, 'w', encoding='utf-8') as f:
-        f.write(svg_content)
+    # Lay out the floor's overlays only; printers are only placed if some output needs them
+    layers = generate_floor_layers(spec, OUTPUT_WIDTH,
+                                   include_printers=bool(include_printers or layers_dir),
+                                   building_name=building_name, floor_number=floor_number,
+                                   names=('labels', 'printers'))
+    layers['base'] = base_layer
+    
+    # Save SVG (fast), plus .svgz when requested
+    svg_layers = LAYER_NAMES if include_printers else ('base', 'labels')
+    svg_content = compose_floor_layers(layers, svg_layers)
+    write_svg(svg_path, svg_content, svgz)
+    
+    if layers_dir:
+        os.makedirs(layers_dir, exist_ok=True)
+        for name, filename in layer_filenames(template_path, building_code, floor_number).items():
+            if name != 'base' and name in layers:
+                write_svg(os.path.join(layers_dir, filename), layers[name])
     
     # Generate PNG (if requested)
     png_path = os.path.join(output_dir, png_filename)
@@ -692,8 +995,8 @@ def generate_floor_diagram(template_path, output_dir, building_code, floor_numbe
         # PNG generation failed - print helpful message and raise error
         error_msg = (
             f"PNG generation failed for {building_code} F{floor_number}\n"
-            f"  Install Playwright for PNG conversion: pip install playwright\n"
-            f"  Then run: playwright install chromium"
+            f"  Install a native rasterizer for PNG conversion: pip install resvg-py (or cairosvg)\n"
+            f"  Or install Playwright: pip install playwright && playwright install chromium"
         )
         print(f"    ERROR: {error_msg}")
         raise RuntimeError(error_msg)
@@ -703,6 +1006,178 @@ def generate_floor_diagram(template_path, output_dir, building_code, floor_numbe
     return (png_filename, grid_to_pixel_scale)
 
 
+def diagram_filenames(building_code, floor_number):
+    """Return (svg_filename, png_filename) for a floor diagram."""
+    filename_base = f"{building_code}_F{floor_number}"
+    return (f"{filename_base}.svg", f"{filename_base}.png")
+
+
+def get_grid_to_pixel_scale(spec):
+    """
+    Pixels per grid unit on the OUTPUT_WIDTH image
+    (e.g., if 24 grid cols = 2400px, then 1 grid unit = 100px).
+    """
+    return OUTPUT_WIDTH / spec.get('grid_cols', 24)
+
+
+def diagram_outputs(task):
+    """
+    Extra files a generate_floor_diagram task needs besides its SVG/PNG in output_dir:
+    {output name: path}, covering the layer files (including the shared base layer).
+    """
+    outputs = {}
+    if task.get('layers_dir'):
+        for name, filename in layer_filenames(task['template_path'], task['building_code'], task['floor_number']).items():
+            outputs[f'layer_{name}'] = os.path.join(task['layers_dir'], filename)
+    return outputs
+
+
+def _generate_floor_diagram_task(task):
+    """Process pool entry point: render one diagram, returning the exception instead of raising."""
+    try:
+        return generate_floor_diagram(**task)
+    except Exception as e:
+        return e
+
+
+def generate_floor_diagrams(tasks, max_workers=None):
+    """
+    Render many floor diagrams as independent tasks in a process pool.
+    Returns a list aligned with tasks: (diagram_filename, grid_to_pixel_scale) tuples,
+    or the exception raised by a task that failed.
+    
+    Each output directory keeps a manifest of input hashes (template + room_mapping +
+    renderer version); diagrams whose hash is unchanged and whose files still exist are
+    not re-rendered, so reruns only touch what changed.
+    
+    Base layers are laid out once per template here in the parent process (and written
+    before any task starts), so workers only lay out each floor's overlays.
+    
+    Args:
+        tasks: List of dicts of generate_floor_diagram keyword arguments
+        max_workers: Pool size (None = CPU count, 1 = render serially in this process)
+    """
+    tasks = list(tasks)
+    results = [None] * len(tasks)
+    manifests = {}
+    pending = []  # (task index, input hash)
+    
+    for index, task in enumerate(tasks):
+        output_dir = task['output_dir']
+        if output_dir not in manifests:
+            manifests[output_dir] = load_manifest(output_dir)
+        template = load_template(task['template_path'])
+        outputs = diagram_outputs(task)
+        digest = diagram_hash(template, task.get('room_mapping'), task['building_code'],
+                              task['floor_number'], task.get('include_printers', False), outputs)
+        
+        svg_filename, png_filename = diagram_filenames(task['building_code'], task['floor_number'])
+        entry = manifests[output_dir]['diagrams'].get(svg_filename, {})
+        up_to_date = entry.get('hash') == digest and os.path.exists(os.path.join(output_dir, svg_filename))
+        if up_to_date:
+            up_to_date = all(os.path.exists(path) for path in outputs.values())
+        if up_to_date and task.get('svgz', WRITE_SVGZ):
+            up_to_date = os.path.exists(os.path.join(output_dir, os.path.splitext(svg_filename)[0] + '.svgz'))
+        if up_to_date and task.get('generate_png', True):
+            up_to_date = (entry.get('png_svg_sha256') == entry.get('svg_sha256')
+                          and os.path.exists(os.path.join(output_dir, png_filename)))
+        
+        if up_to_date:
+            results[index] = (png_filename, get_grid_to_pixel_scale(template))
+        else:
+            pending.append((index, digest))
+    
+    print(f"    {len(tasks) - len(pending)} diagrams up to date, {len(pending)} to render")
+    if not pending:
+        return results
+    
+    # One base layer per template, shared by all of its floors
+    base_layers = {}
+    written_bases = set()
+    pending_tasks = []
+    for index, _ in pending:
+        task = tasks[index]
+        template_path = task['template_path']
+        layers_dir = task.get('layers_dir')
+        if template_path not in base_layers:
+            base_layers[template_path] = render_base_layer(template_path)
+        if layers_dir and (layers_dir, template_path) not in written_bases:
+            os.makedirs(layers_dir, exist_ok=True)
+            write_svg(os.path.join(layers_dir, base_layer_filename(template_path)), base_layers[template_path],
+                      if_changed=True)
+            written_bases.add((layers_dir, template_path))
+        pending_tasks.append(dict(task, base_layer=base_layers[template_path]))
+    
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(pending_tasks))
+    
+    rendered = None
+    if max_workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                rendered = list(pool.map(_generate_floor_diagram_task, pending_tasks))
+        except (OSError, RuntimeError) as e:
+            # Process pools are unavailable in some sandboxes; fall back to serial rendering
+            print(f"    Warning: Process pool unavailable ({e}), rendering diagrams serially")
+    if rendered is None:
+        rendered = [_generate_floor_diagram_task(task) for task in pending_tasks]
+    
+    # Record fresh hashes for everything that rendered successfully
+    layer_entries = {}
+    for (index, digest), result in zip(pending, rendered):
+        results[index] = result
+        if isinstance(result, Exception):
+            continue
+        task = tasks[index]
+        svg_filename, _ = diagram_filenames(task['building_code'], task['floor_number'])
+        with open(os.path.join(task['output_dir'], svg_filename), 'r', encoding='utf-8') as f:
+            svg_sha256 = content_sha256(f.read())
+        entry = {'hash': digest, 'svg_sha256': svg_sha256}
+        if task.get('generate_png', True):
+            entry['png_svg_sha256'] = svg_sha256
+        manifests[task['output_dir']]['diagrams'][svg_filename] = entry
+        
+        if task.get('layers_dir'):
+            layers = layer_filenames(task['template_path'], task['building_code'], task['floor_number'])
+            layer_entries.setdefault(task['layers_dir'], {})[os.path.splitext(svg_filename)[0]] = {
+                name: filename for name, filename in layers.items()
+                if os.path.exists(os.path.join(task['layers_dir'], filename))
+            }
+    
+    for output_dir, manifest in manifests.items():
+        save_manifest(output_dir, manifest)
+    for layers_dir, entries in layer_entries.items():
+        write_layer_index(layers_dir, entries)
+    
+    return results
+
+
+def compose_layer_files(layers_dir, output_dir, names=LAYER_NAMES, svgz=WRITE_SVGZ):
+    """
+    Write one composed SVG per floor listed in the layers index (e.g. the with-printers
+    diagrams) by merging the layer files - no layout or rendering. Unchanged files are
+    left untouched, so their PNGs stay up to date. Returns the number of floors.
+    """
+    index_path = os.path.join(layers_dir, MANIFEST_FILENAME)
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            floors = json.load(f).get('floors', {})
+    except (OSError, ValueError):
+        return 0
+    
+    os.makedirs(output_dir, exist_ok=True)
+    for diagram_name, layer_files in sorted(floors.items()):
+        layers = {}
+        for name in names:
+            if name in layer_files:
+                with open(os.path.join(layers_dir, layer_files[name]), 'r', encoding='utf-8') as f:
+                    layers[name] = f.read()
+        write_svg(os.path.join(output_dir, f"{diagram_name}.svg"), compose_floor_layers(layers, names),
+                  svgz, if_changed=True)
+    return len(floors)
+
+
 def get_room_grid_coordinate(room_spec, grid_rx=0.5, grid_ry=0.5):
     """
     Calculate grid coordinate for a position within a room.
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Floor Hit-Maps
+Maps a tap on a floor image to the room or printer under it. Each floor's room
+rectangles and printer points are exported in image pixel space together with
+a grid-bucket spatial index (one bucket per template grid cell), so a lookup
+only tests the few shapes in one bucket instead of every room on the floor.
+
+Output per floor (see FloorHitMap.save):
+    <name>.hitmap.json   readable form: shapes + bucket index
+    <name>.hitmap.bin    compact little-endian binary form (layout below)
+
+Binary layout:
+    header   '<4sHHfddHHIII'  magic b'HMAP', version, reserved, bucket_size, width, height,
+                              bucket_cols, bucket_rows, n_rooms, n_printers, strings_len
+    rooms    n_rooms    x '<ffffI'  x, y, w, h, id string index
+    printers n_printers x '<fffI'   x, y, radius, id string index
+    offsets  (bucket_cols * bucket_rows + 1) x '<I'  start of each bucket in entries
+    entries  '<I' each - room index, or n_rooms + printer index
+    strings  ids, utf-8, NUL-separated (rooms first, then printers)
+
+Usage:
+    hitmap = FloorHitMap.from_template(template, room_keys, printer_keys)
+    hitmap.hit(1250, 430)   # -> ('printer', id), ('room', id) or None
+"""
+
+import json
+import os
+import struct
+
+from floor_generator import OUTPUT_WIDTH, get_grid_to_pixel_scale, get_room_grid_coordinate
+
+HITMAP_MAGIC = b'HMAP'
+HITMAP_VERSION = 2  # 2: floor width/height in the binary header
+PRINTER_HIT_RADIUS = 0.3  # Grid units around a printer that select it (icon is ~0.5 wide)
+
+_HEADER = struct.Struct('<4sHHfddHHIII')
+_ROOM = struct.Struct('<ffffI')
+_PRINTER = struct.Struct('<fffI')
+
+
+class FloorHitMap:
+    """
+    Room rectangles and printer points of one floor in pixel space, indexed by grid buckets.
+
+    rooms:    list of {'id', 'x', 'y', 'w', 'h', 'type', 'label'} in drawing order
+    printers: list of {'id', 'x', 'y', 'r'}
+    Printers take precedence over the room they sit in; among overlapping
+    rooms the one drawn last wins, as on the image.
+    """
+
+    def __init__(self, width, height, bucket_size, rooms, printers):
+        self.width = width
+        self.height = height
+        self.bucket_size = bucket_size
+        self.rooms = rooms
+        self.printers = printers
+        self.bucket_cols = max(1, -(-int(width) // int(bucket_size)))
+        self.bucket_rows = max(1, -(-int(height) // int(bucket_size)))
+        self.buckets = self._build_buckets()
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_template(cls, template, room_keys=None, printer_keys=None, scale=None):
+        """
+        Build a hit-map from a floor template.
+
+        Args:
+            template: Floor template dict
+            room_keys: Dict template room id -> exported id (rooms without a key are left out);
+                       None exports template ids
+            printer_keys: Dict template printer id -> exported id, same rules as room_keys
+            scale: Pixels per grid unit (default: get_grid_to_pixel_scale(template))
+        """
+        scale = scale or get_grid_to_pixel_scale(template)
+        rooms_by_id = {room['id']: room for room in template.get('rooms', [])}
+
+        rooms = []
+        for room in template.get('rooms', []):
+            key = room['id'] if room_keys is None else room_keys.get(room['id'])
+            if key is None:
+                continue
+            rooms.append({
+                'id': key,
+                'x': room['grid_x'] * scale,
+                'y': room['grid_y'] * scale,
+                'w': room['grid_w'] * scale,
+                'h': room['grid_h'] * scale,
+                'type': room.get('type'),
+                'label': room.get('label'),
+            })
+
+        printers = []
+        for printer in template.get('printers', []):
+            key = printer['id'] if printer_keys is None else printer_keys.get(printer['id'])
+            room = rooms_by_id.get(printer.get('room'))
+            if key is None or room is None:
+                continue
+            grid_x, grid_y = get_room_grid_coordinate(room, printer.get('grid_rx', 0.5), printer.get('grid_ry', 0.5))
+            printers.append({'id': key, 'x': grid_x * scale, 'y': grid_y * scale, 'r': PRINTER_HIT_RADIUS * scale})
+
+        width = template.get('grid_cols', 24) * scale
+        height = template.get('grid_rows', 16) * scale
+        return cls(width, height, scale, rooms, printers)
+
+    def _bucket_range(self, x0, y0, x1, y1):
+        """Bucket (col, row) pairs overlapped by a pixel box, clipped to the map."""
+        size = self.bucket_size
+        c0 = max(0, int(x0 // size))
+        r0 = max(0, int(y0 // size))
+        c1 = min(self.bucket_cols - 1, int(x1 // size))
+        r1 = min(self.bucket_rows - 1, int(y1 // size))
+        return [(c, r) for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)]
+
+    def _build_buckets(self):
+        """List per bucket of entries: ('p', index) printers first, then ('r', index) rooms top-most first."""
+        buckets = [[] for _ in range(self.bucket_cols * self.bucket_rows)]
+        for index, printer in enumerate(self.printers):
+            x, y, r = printer['x'], printer['y'], printer['r']
+            for col, row in self._bucket_range(x - r, y - r, x + r, y + r):
+                buckets[row * self.bucket_cols + col].append(('p', index))
+        for index in range(len(self.rooms) - 1, -1, -1):
+            room = self.rooms[index]
+            # Exclusive right/bottom edge: a room ending on a bucket boundary doesn't enter the next bucket
+            for col, row in self._bucket_range(room['x'], room['y'],
+                                               room['x'] + room['w'] - 1e-6, room['y'] + room['h'] - 1e-6):
+                buckets[row * self.bucket_cols + col].append(('r', index))
+        return buckets
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def hit(self, x, y):
+        """Return ('printer', id), ('room', id) or None for a pixel position."""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        bucket = self.buckets[int(y // self.bucket_size) * self.bucket_cols + int(x // self.bucket_size)]
+        for kind, index in bucket:
+            if kind == 'p':
+                printer = self.printers[index]
+                if (x - printer['x']) ** 2 + (y - printer['y']) ** 2 <= printer['r'] ** 2:
+                    return ('printer', printer['id'])
+            else:
+                room = self.rooms[index]
+                if room['x'] <= x < room['x'] + room['w'] and room['y'] <= y < room['y'] + room['h']:
+                    return ('room', room['id'])
+        return None
+
+    def room_at(self, x, y):
+        """Id of the room under a pixel position (ignoring printers), or None."""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        bucket = self.buckets[int(y // self.bucket_size) * self.bucket_cols + int(x // self.bucket_size)]
+        for kind, index in bucket:
+            room = self.rooms[index] if kind == 'r' else None
+            if room and room['x'] <= x < room['x'] + room['w'] and room['y'] <= y < room['y'] + room['h']:
+                return room['id']
+        return None
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+
+    def _flat_buckets(self):
+        """Bucket entries as integers: room index, or n_rooms + printer index."""
+        n_rooms = len(self.rooms)
+        return [[index if kind == 'r' else n_rooms + index for kind, index in bucket] for bucket in self.buckets]
+
+    def to_dict(self):
+        return {
+            'version': HITMAP_VERSION,
+            'width': self.width,
+            'height': self.height,
+            'bucket_size': self.bucket_size,
+            'bucket_cols': self.bucket_cols,
+            'bucket_rows': self.bucket_rows,
+            'rooms': self.rooms,
+            'printers': self.printers,
+            'buckets': self._flat_buckets(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['width'], data['height'], data['bucket_size'], data['rooms'], data['printers'])
+
+    def to_bytes(self):
+        ids = [str(room['id']) for room in self.rooms] + [str(printer['id']) for printer in self.printers]
+        strings = '\0'.join(ids).encode('utf-8')
+        buckets = self._flat_buckets()
+
+        parts = [_HEADER.pack(HITMAP_MAGIC, HITMAP_VERSION, 0, self.bucket_size, self.width, self.height,
+                              self.bucket_cols, self.bucket_rows, len(self.rooms), len(self.printers), len(strings))]
+        for index, room in enumerate(self.rooms):
+            parts.append(_ROOM.pack(room['x'], room['y'], room['w'], room['h'], index))
+        for index, printer in enumerate(self.printers):
+            parts.append(_PRINTER.pack(printer['x'], printer['y'], printer['r'], len(self.rooms) + index))
+        offsets = [0]
+        for bucket in buckets:
+            offsets.append(offsets[-1] + len(bucket))
+        parts.append(struct.pack(f'<{len(offsets)}I', *offsets))
+        entries = [entry for bucket in buckets for entry in bucket]
+        parts.append(struct.pack(f'<{len(entries)}I', *entries))
+        parts.append(strings)
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Parse to_bytes() output (room types/labels are not part of the binary form)."""
+        (magic, version, _, bucket_size, width, height, bucket_cols, bucket_rows,
+         n_rooms, n_printers, strings_len) = _HEADER.unpack_from(data, 0)
+        if magic != HITMAP_MAGIC or version != HITMAP_VERSION:
+            raise ValueError(f"Unsupported hit-map format: {magic!r} v{version}")
+        offset = _HEADER.size
+        raw_rooms = [_ROOM.unpack_from(data, offset + i * _ROOM.size) for i in range(n_rooms)]
+        offset += n_rooms * _ROOM.size
+        raw_printers = [_PRINTER.unpack_from(data, offset + i * _PRINTER.size) for i in range(n_printers)]
+        ids = data[len(data) - strings_len:].decode('utf-8').split('\0') if strings_len else []
+
+        rooms = [{'id': ids[s], 'x': x, 'y': y, 'w': w, 'h': h} for x, y, w, h, s in raw_rooms]
+        printers = [{'id': ids[s], 'x': x, 'y': y, 'r': r} for x, y, r, s in raw_printers]
+        return cls(width, height, bucket_size, rooms, printers)
+
+    def save(self, path_base):
+        """Write <path_base>.hitmap.json and <path_base>.hitmap.bin."""
+        os.makedirs(os.path.dirname(os.path.abspath(path_base)), exist_ok=True)
+        with open(path_base + '.hitmap.json', 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'), ensure_ascii=False)
+        with open(path_base + '.hitmap.bin', 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        """Load a .hitmap.json or .hitmap.bin file."""
+        if path.endswith('.bin'):
+            with open(path, 'rb') as f:
+                return cls.from_bytes(f.read())
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+if __name__ == "__main__":
+    import sys
+    from floor_generator import load_template, thaw_template
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(script_dir, "floors_diagrams", "hitmaps")
+    specs_dir = os.path.join(script_dir, "specs")
+    for filename in sorted(os.listdir(specs_dir)):
+        if filename.endswith('.json'):
+            hitmap = FloorHitMap.from_template(thaw_template(load_template(os.path.join(specs_dir, filename))))
+            hitmap.save(os.path.join(output_dir, os.path.splitext(filename)[0]))
+            print(f"  {filename}: {len(hitmap.rooms)} rooms, {len(hitmap.printers)} printers")
+    print(f"Hit-maps written to {output_dir} (width {OUTPUT_WIDTH}px)")
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Procedural Floor Layouts
+Generates floor templates in the same JSON format as specs/floor_template_*.json,
+so campuses of any size can be laid out without hand-written templates.
+
+Layout (strip partitioning on the grid):
+- an entrance hall column on the left and a service core column on the right
+  (stairs and lift beside an access corridor, above a hallway - at the same
+  position on every floor so the shafts line up between floors)
+- the middle is cut into horizontal room bands separated by 2-row corridors
+- each band is split into rooms by recursive binary partition (BSP) within
+  MIN_ROOM_WIDTH..MAX_ROOM_WIDTH
+- the top band ends with a men's/women's restroom pair
+- every room gets a door onto the corridor (or hall) next to it, and printers
+  are placed in printer-capable rooms
+
+Usage:
+    from layout_generator import generate_floor_template
+    template = generate_floor_template(random.Random(42), floor_number=1, num_printers=3)
+"""
+
+import json
+import os
+import random
+
+from floor_generator import PRINTER_ROOM_TYPES
+
+GRID_SIZE = 100
+DEFAULT_GRID_COLS = 24
+DEFAULT_GRID_ROWS = 16
+HALL_WIDTH = 3
+CORE_WIDTH = 3
+CORRIDOR_HEIGHT = 2
+MIN_BAND_HEIGHT = 3
+MIN_ROOM_WIDTH = 3
+MAX_ROOM_WIDTH = 7
+RESTROOM_WIDTH = 2
+
+# Room types drawn for regular rooms, with relative frequency
+ROOM_TYPE_WEIGHTS = {
+    'lab': 3,
+    'classroom': 4,
+    'library': 2,
+    'office': 2,
+    'lounge': 1,
+    'storage': 1,
+}
+
+ROOM_TYPE_LABELS = {
+    'lab': 'Computer Lab',
+    'classroom': 'Lecture Hall',
+    'library': 'Library Section',
+    'office': 'Office',
+    'lounge': 'Student Lounge',
+    'storage': 'Storage',
+}
+
+
+def _split_band(rng, width):
+    """Split a band of `width` cells into room widths by recursive binary partition."""
+    if width <= MAX_ROOM_WIDTH:
+        return [width]
+    # Both halves must stay at least MIN_ROOM_WIDTH wide
+    cut = rng.randint(MIN_ROOM_WIDTH, width - MIN_ROOM_WIDTH)
+    return _split_band(rng, cut) + _split_band(rng, width - cut)
+
+
+def _band_heights(rng, rows):
+    """Heights of the room bands (corridors of CORRIDOR_HEIGHT go between them)."""
+    num_bands = max(2, (rows + CORRIDOR_HEIGHT) // (MIN_BAND_HEIGHT + 2 + CORRIDOR_HEIGHT))
+    while num_bands > 1 and num_bands * MIN_BAND_HEIGHT + (num_bands - 1) * CORRIDOR_HEIGHT > rows:
+        num_bands -= 1
+    spare = rows - num_bands * MIN_BAND_HEIGHT - (num_bands - 1) * CORRIDOR_HEIGHT
+    heights = [MIN_BAND_HEIGHT] * num_bands
+    for _ in range(spare):
+        heights[rng.randrange(num_bands)] += 1
+    return heights
+
+
+def generate_floor_template(rng, floor_number=1, num_printers=3, grid_cols=DEFAULT_GRID_COLS, grid_rows=DEFAULT_GRID_ROWS):
+    """
+    Generate one floor template dict.
+
+    Args:
+        rng: random.Random instance (the layout is fully determined by its state)
+        floor_number: Used for room ids/labels (R<floor><nn>)
+        num_printers: Printer slots to place in printer-capable rooms
+        grid_cols, grid_rows: Grid size (at least 16 x 8)
+    """
+    if grid_cols < HALL_WIDTH + CORE_WIDTH + 2 * MIN_ROOM_WIDTH + RESTROOM_WIDTH * 2 or grid_rows < 8:
+        raise ValueError(f"Grid {grid_cols}x{grid_rows} is too small for a floor layout")
+
+    rooms = []
+    doors = []
+    middle_x = HALL_WIDTH
+    middle_w = grid_cols - HALL_WIDTH - CORE_WIDTH
+    core_x = grid_cols - CORE_WIDTH
+
+    rooms.append({'id': 'entrance-hall', 'grid_x': 0, 'grid_y': 0, 'grid_w': HALL_WIDTH, 'grid_h': grid_rows,
+                  'label': 'Entrance Hall', 'type': 'corridor'})
+
+    # Service core: same place on every floor so stairs/lift line up vertically
+    # (a 1-column access corridor runs beside the stairs and lift down to the hallway)
+    rooms.append({'id': 'corridor-core-access', 'grid_x': core_x, 'grid_y': 0, 'grid_w': 1, 'grid_h': 6,
+                  'label': '', 'type': 'corridor'})
+    rooms.append({'id': 'stairs-1', 'grid_x': core_x + 1, 'grid_y': 0, 'grid_w': CORE_WIDTH - 1, 'grid_h': 3,
+                  'label': 'Stairs', 'type': 'stairs'})
+    rooms.append({'id': 'lift-1', 'grid_x': core_x + 1, 'grid_y': 3, 'grid_w': CORE_WIDTH - 1, 'grid_h': 3,
+                  'label': 'LIFT', 'type': 'elevator'})
+    rooms.append({'id': 'corridor-right-1', 'grid_x': core_x, 'grid_y': 6, 'grid_w': CORE_WIDTH,
+                  'grid_h': grid_rows - 6, 'label': 'Hallway', 'type': 'corridor'})
+
+    types = list(ROOM_TYPE_WEIGHTS)
+    type_weights = [ROOM_TYPE_WEIGHTS[t] for t in types]
+    room_number = 0
+    y = 0
+    heights = _band_heights(rng, grid_rows)
+    for band_index, band_height in enumerate(heights):
+        band_y = y
+        band_w = middle_w
+        is_top = band_index == 0
+        is_bottom = band_index == len(heights) - 1
+
+        # Restroom pair at the right end of the top band, next to the service core
+        if is_top:
+            band_w -= 2 * RESTROOM_WIDTH
+            for offset, (suffix, label) in enumerate((('m', "Men's"), ('w', "Women's"))):
+                restroom_x = middle_x + band_w + offset * RESTROOM_WIDTH
+                rooms.append({'id': f'restroom-{suffix}', 'grid_x': restroom_x, 'grid_y': band_y,
+                              'grid_w': RESTROOM_WIDTH, 'grid_h': band_height, 'label': label, 'type': 'restroom'})
+                doors.append({'grid_x': restroom_x, 'grid_y': band_y + band_height, 'orientation': 'horizontal'})
+
+        x = middle_x
+        for width in _split_band(rng, band_w):
+            room_number += 1
+            room_type = rng.choices(types, weights=type_weights)[0]
+            room_id = f"R{floor_number}{room_number:02d}"
+            rooms.append({
+                'id': room_id, 'grid_x': x, 'grid_y': band_y, 'grid_w': width, 'grid_h': band_height,
+                'label': f"{ROOM_TYPE_LABELS[room_type]} {floor_number}{room_number:02d}", 'type': room_type,
+            })
+            # Door onto the corridor below (top/middle bands) or above (bottom band)
+            door_x = x + rng.randrange(width)
+            door_y = band_y if is_bottom and not is_top else band_y + band_height
+            doors.append({'grid_x': door_x, 'grid_y': door_y, 'orientation': 'horizontal'})
+            x += width
+
+        y += band_height
+        if not is_bottom:
+            corridor_index = band_index + 1
+            rooms.append({
+                'id': 'corridor-main' if corridor_index == 1 else f'corridor-{corridor_index}',
+                'grid_x': middle_x, 'grid_y': y, 'grid_w': middle_w, 'grid_h': CORRIDOR_HEIGHT,
+                'label': 'Main Corridor' if corridor_index == 1 else 'Corridor', 'type': 'corridor',
+            })
+            y += CORRIDOR_HEIGHT
+
+    # Printer slots: spread over distinct printer-capable rooms first, then reuse rooms
+    printer_rooms = [room for room in rooms if room['type'] in PRINTER_ROOM_TYPES]
+    if num_printers and not printer_rooms:
+        # Small floors can draw no printer-capable room; turn the largest regular room into a classroom
+        regular_rooms = [room for room in rooms if room['id'].startswith('R')]
+        largest = max(regular_rooms, key=lambda room: room['grid_w'] * room['grid_h'])
+        largest['type'] = 'classroom'
+        largest['label'] = f"{ROOM_TYPE_LABELS['classroom']} {largest['id'][1:]}"
+        printer_rooms = [largest]
+    rng.shuffle(printer_rooms)
+    printers = []
+    for index in range(num_printers if printer_rooms else 0):
+        room = printer_rooms[index % len(printer_rooms)]
+        printers.append({
+            'id': f'printer-{index + 1}',
+            'room': room['id'],
+            'grid_rx': round(rng.uniform(0.15, 0.85), 2),
+            # Upper or lower part of the room, clear of the centred room label
+            'grid_ry': round(rng.uniform(0.2, 0.3) if rng.random() < 0.5 else rng.uniform(0.7, 0.8), 2),
+            'label': f'P{index + 1}',
+        })
+
+    return {
+        'grid_size': GRID_SIZE,
+        'grid_cols': grid_cols,
+        'grid_rows': grid_rows,
+        'rooms': rooms,
+        'doors': doors,
+        'printers': printers,
+    }
+
+
+def save_template(template, path):
+    """Write a template as JSON, leaving the file untouched when the content is unchanged."""
+    content = json.dumps(template, indent=2)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return path
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return path
+
+
+def split_printers(total, num_floors, rng):
+    """Distribute a building's printers over its floors (as evenly as possible, random remainder)."""
+    counts = [total // num_floors] * num_floors
+    for floor_index in rng.sample(range(num_floors), total % num_floors):
+        counts[floor_index] += 1
+    return counts
+
+
+if __name__ == "__main__":
+    import sys
+
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    print(json.dumps(generate_floor_template(random.Random(seed)), indent=2))
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Printer Placement Optimizer
+Chooses printer positions on a floor template so demand-weighted walking
+distance is minimal (k-median over the walkable floor graph of
+printer_routing.py), then writes updated template `printers` entries and a
+report of expected walk distance and queue load per printer.
+
+- Demand: weight per room, by default from its room type (DEFAULT_DEMAND_BY_TYPE),
+  measured from the room's centre cell
+- Candidate sites: every grid cell of a room that may host a printer
+  (floor_generator.PRINTER_ROOM_TYPES, shared with generate.py's allows_printer)
+- Solver: greedy construction, then first-improvement swaps (Teitz-Bart)
+  until no swap lowers the total cost
+- Existing printers can be kept fixed while new ones are added (--add), or all
+  printers can be relocated (--k)
+
+Placement is per floor: students are assumed to print on their own floor.
+
+Usage:
+    python printer_placement.py specs/floor_template_1.json --k 6 --out placed.json --report report.json
+    python printer_placement.py specs/floor_template_1.json --add 2 --demand weights.json
+"""
+
+import argparse
+import json
+
+from floor_generator import load_template, thaw_template, PRINTER_ROOM_TYPES
+from printer_routing import floor_graph, centre_cell, room_cells, dijkstra
+
+# Default relative print demand per room type
+DEFAULT_DEMAND_BY_TYPE = {
+    'lab': 3.0,
+    'library': 3.0,
+    'classroom': 2.0,
+    'office': 1.0,
+    'lounge': 1.0,
+}
+
+MAX_SWAP_PASSES = 50
+UNREACHED_DISTANCE = 1e6  # Solver cost of a demand room no chosen printer can reach (grid units)
+
+
+def room_demand(template, demand=None):
+    """Demand weight per template room id: explicit weights override the per-type defaults."""
+    weights = {}
+    for room in template.get('rooms', []):
+        weight = (demand or {}).get(room['id'], DEFAULT_DEMAND_BY_TYPE.get(room.get('type'), 0.0))
+        if weight > 0:
+            weights[room['id']] = float(weight)
+    return weights
+
+
+def _site_for_printer(printer, rooms):
+    """Grid cell of an existing template printer entry."""
+    room = rooms[printer['room']]
+    x = room['grid_x'] + room['grid_w'] * printer.get('grid_rx', 0.5)
+    y = room['grid_y'] + room['grid_h'] * printer.get('grid_ry', 0.5)
+    return (min(int(x), room['grid_x'] + room['grid_w'] - 1), min(int(y), room['grid_y'] + room['grid_h'] - 1))
+
+
+class PlacementProblem:
+    """Demand rooms x candidate cells walking-distance matrix for one floor template."""
+
+    def __init__(self, template, demand=None):
+        self.template = template
+        adjacency, self.rooms = floor_graph(template)
+        self.weights = room_demand(template, demand)
+        self.demand_rooms = list(self.weights)
+
+        # Cell -> hosting room id, for candidate sites (later rooms win, as in floor_graph)
+        self.site_rooms = {}
+        for room_id, room in self.rooms.items():
+            for cell in room_cells(room):
+                if cell in adjacency:
+                    self.site_rooms[cell] = room_id if room.get('type') in PRINTER_ROOM_TYPES else None
+        self.sites = sorted(cell for cell, room_id in self.site_rooms.items() if room_id)
+
+        # Walking distances from each demand room to every cell (graph is undirected)
+        self.distances = {}
+        for room_id in self.demand_rooms:
+            self.distances[room_id] = dijkstra(adjacency, centre_cell(self.rooms[room_id]))
+
+        # Rooms no candidate site can be reached from (e.g. walled off) cannot be served
+        # by any placement; they are left out of the optimization and reported separately
+        self.unreachable_rooms = [room_id for room_id in self.demand_rooms
+                                  if not any(site in self.distances[room_id] for site in self.sites)]
+        self.demand_rooms = [room_id for room_id in self.demand_rooms if room_id not in self.unreachable_rooms]
+
+    def distance(self, room_id, site):
+        return self.distances[room_id].get(site, float('inf'))
+
+    def assignment(self, sites):
+        """
+        Nearest printers per demand room, by index into `sites`: {room_id: (indices, distance)}.
+        Printers tied at the nearest distance (e.g. sharing a cell) share the room; a room
+        none of the sites can be reached from gets ([], inf).
+        """
+        result = {}
+        for room_id in self.demand_rooms:
+            distances = [self.distance(room_id, site) for site in sites]
+            best = min(distances, default=float('inf'))
+            if best == float('inf'):
+                result[room_id] = ([], best)
+            else:
+                result[room_id] = ([index for index, distance in enumerate(distances) if distance <= best + 1e-9], best)
+        return result
+
+    def cost(self, sites):
+        """Total demand-weighted walking distance to the nearest of `sites` (reachable rooms only)."""
+        return sum(self.weights[room_id] * distance
+                   for room_id, (indices, distance) in self.assignment(sites).items() if indices)
+
+
+def solve_k_median(problem, k, fixed_sites=()):
+    """
+    Place k new printers (in addition to fixed_sites) with greedy + swap.
+    Returns the list of chosen new sites.
+    """
+    fixed_sites = list(fixed_sites)
+    candidates = [site for site in problem.sites if site not in fixed_sites]
+    k = min(k, len(candidates))
+    weights = [problem.weights[room_id] for room_id in problem.demand_rooms]
+    columns = {site: [problem.distance(room_id, site) for room_id in problem.demand_rooms] for site in candidates}
+    inf = float('inf')
+
+    def nearest(sites):
+        """Per-demand-room distance to the nearest site in `sites` (plus fixed sites)."""
+        best = [inf] * len(weights)
+        for site in sites:
+            column = columns[site] if site in columns else [problem.distance(r, site) for r in problem.demand_rooms]
+            best = [min(a, b) for a, b in zip(best, column)]
+        return best
+
+    def total(best):
+        # A room no open site reaches yet counts as a very long walk, so sites that
+        # reach new rooms win and the comparisons stay finite
+        return sum(w * (d if d < inf else UNREACHED_DISTANCE) for w, d in zip(weights, best))
+
+    # Greedy: repeatedly open the site that lowers the cost most
+    chosen = []
+    current = nearest(fixed_sites)
+    for _ in range(k):
+        best_site, best_cost = None, inf
+        for site in candidates:
+            if site in chosen:
+                continue
+            cost = total([min(a, b) for a, b in zip(current, columns[site])])
+            if cost < best_cost:
+                best_site, best_cost = site, cost
+        chosen.append(best_site)
+        current = [min(a, b) for a, b in zip(current, columns[best_site])]
+
+    # Swap: replace a chosen site with an unchosen one while that improves the cost
+    best_cost = total(nearest(fixed_sites + chosen))
+    for _ in range(MAX_SWAP_PASSES):
+        improved = False
+        for i in range(len(chosen)):
+            others = nearest(fixed_sites + chosen[:i] + chosen[i + 1:])
+            for site in candidates:
+                if site in chosen:
+                    continue
+                cost = total([min(a, b) for a, b in zip(others, columns[site])])
+                if cost < best_cost - 1e-9:
+                    chosen[i], best_cost, improved = site, cost, True
+                    others = nearest(fixed_sites + chosen[:i] + chosen[i + 1:])
+        if not improved:
+            break
+    return chosen
+
+
+def printer_entry(site, room, printer_id, label):
+    """Template `printers` entry placing a printer at the centre of a grid cell."""
+    return {
+        'id': printer_id,
+        'room': room['id'],
+        'grid_rx': round((site[0] + 0.5 - room['grid_x']) / room['grid_w'], 3),
+        'grid_ry': round((site[1] + 0.5 - room['grid_y']) / room['grid_h'], 3),
+        'label': label,
+    }
+
+
+def placement_report(problem, printers):
+    """
+    Expected walk distance and queue load per printer for a list of template printer entries.
+    Rooms no printer can be reached from are listed under unreachable_rooms and left out of
+    the walk figures (so the report stays finite, valid JSON).
+    """
+    sites = [_site_for_printer(printer, problem.rooms) for printer in printers]
+    assignment = problem.assignment(sites)
+    unreachable = sorted(problem.unreachable_rooms + [room_id for room_id, (indices, _) in assignment.items()
+                                                      if not indices])
+    served = {room_id: value for room_id, value in assignment.items() if value[0]}
+    total_weight = sum(problem.weights[room_id] for room_id in served) or 1.0
+
+    per_printer = {printer['id']: {'label': printer.get('label'), 'room': printer['room'], 'rooms': [],
+                                   'demand': 0.0, 'walk_sum': 0.0} for printer in printers}
+    for room_id, (indices, distance) in served.items():
+        # A room between tied printers (e.g. two on one cell) splits its demand between them
+        share = problem.weights[room_id] / len(indices)
+        for index in indices:
+            entry = per_printer[printers[index]['id']]
+            entry['rooms'].append(room_id)
+            entry['demand'] += share
+            entry['walk_sum'] += share * distance
+
+    fair_share = 1.0 / len(printers) if printers else 0.0
+    for entry in per_printer.values():
+        entry['queue_share'] = round(entry['demand'] / total_weight, 4)
+        entry['load_factor'] = round(entry['queue_share'] / fair_share, 3) if fair_share else 0.0
+        entry['mean_walk'] = round(entry['walk_sum'] / entry['demand'], 3) if entry['demand'] else 0.0
+        del entry['walk_sum']
+
+    distances = [distance for _, distance in served.values()]
+    return {
+        'printers': per_printer,
+        'expected_walk': round(sum(problem.weights[r] * d for r, (_, d) in served.items()) / total_weight, 3),
+        'max_walk': round(max(distances), 3) if distances else 0.0,
+        'unreachable_rooms': unreachable,
+    }
+
+
+def optimize_template(template, k=None, add=0, demand=None):
+    """
+    Optimize a template's printer placement.
+    With add > 0 the existing printers stay and `add` more are placed; otherwise all
+    printers are relocated (k defaults to the current printer count).
+    Returns (updated template, report) - the report compares before and after.
+    """
+    template = thaw_template(template)
+    problem = PlacementProblem(template, demand)
+    existing = [p for p in template.get('printers', []) if p.get('room') in problem.rooms]
+
+    if add:
+        kept = existing
+        new_sites = solve_k_median(problem, add, [_site_for_printer(p, problem.rooms) for p in kept])
+    else:
+        kept = []
+        new_sites = solve_k_median(problem, k if k is not None else len(existing))
+
+    printers = list(kept)
+    for site in new_sites:
+        number = len(printers) + 1
+        while any(p['id'] == f"printer-{number}" for p in printers):
+            number += 1
+        printers.append(printer_entry(site, problem.rooms[problem.site_rooms[site]], f"printer-{number}", f"P{number}"))
+
+    updated = dict(template)
+    updated['printers'] = printers
+    report = {
+        'before': placement_report(problem, existing),
+        'after': placement_report(problem, printers),
+    }
+    return updated, report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Optimize printer placement on a floor template")
+    parser.add_argument("template", help="Floor template JSON")
+    parser.add_argument("--k", type=int, default=None, help="Relocate all printers, placing this many (default: current count)")
+    parser.add_argument("--add", type=int, default=0, help="Keep existing printers and add this many")
+    parser.add_argument("--demand", help="JSON file of room id -> demand weight (overrides per-type defaults)")
+    parser.add_argument("--out", help="Write the updated template here (default: print printers only)")
+    parser.add_argument("--report", help="Write the placement report JSON here")
+    args = parser.parse_args()
+
+    demand = None
+    if args.demand:
+        with open(args.demand, 'r', encoding='utf-8') as f:
+            demand = json.load(f)
+
+    updated, report = optimize_template(load_template(args.template), k=args.k, add=args.add, demand=demand)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(updated, f, indent=2)
+        print(f"Updated template written to {args.out}")
+    else:
+        print(json.dumps(updated['printers'], indent=2))
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.report}")
+
+    before, after = report['before'], report['after']
+    print(f"Expected walk: {before['expected_walk']} -> {after['expected_walk']} grid units "
+          f"(max {before['max_walk']} -> {after['max_walk']})")
+    if after['unreachable_rooms']:
+        print(f"  Unreachable from every printer: {', '.join(after['unreachable_rooms'])}")
+    for printer_id, entry in after['printers'].items():
+        print(f"  {entry['label'] or printer_id} in {entry['room']}: queue share {entry['queue_share']:.0%}, "
+              f"load x{entry['load_factor']}, mean walk {entry['mean_walk']}")
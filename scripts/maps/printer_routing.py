@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Nearest Printer Routing
+Answers "which enabled printer is closest to this room" from precomputed
+walking distances over the floor templates.
+
+Each building becomes one walkable graph:
+- every grid cell of a floor is a node; cells of the same room are connected
+  (8-neighbour, diagonal steps cost sqrt(2))
+- corridors and uncovered cells are open space and connect to each other freely
+- a room connects to open space through its doors, or through any shared wall
+  when the template gives it no door
+- two rooms connect only through a door on their shared wall
+- stairs/lift rooms with the same template id are linked across floors
+
+One Dijkstra run per printer gives the distance from that printer to every room
+(measured from the room's centre cell). Each room keeps its printers sorted by
+distance, so a nearest-enabled query only walks that short list. Distances are
+in grid units (multiply by grid_size / 100 for metres at the default scale).
+
+Usage:
+    router = PrinterRouter()
+    router.add_floor("MAINACADE", 1, load_template(path), room_keys, printer_keys)
+    router.build()
+    router.nearest(room_id)          # -> [(printer_id, distance)]
+    router.set_enabled(printer_id, False)
+"""
+
+import heapq
+import json
+import math
+import os
+
+from floor_generator import get_room_grid_coordinate
+
+OPEN_SPACE_TYPES = {'corridor'}
+SHAFT_TYPES = {'stairs', 'elevator'}
+FLOOR_CHANGE_COST = {  # Grid units to move one floor up/down
+    'stairs': 6.0,
+    'elevator': 4.0,
+}
+DIAGONAL_COST = math.sqrt(2)
+ROUTES_VERSION = 1
+
+
+def room_cells(room):
+    """Grid cells (x, y) covered by a room."""
+    x0, y0 = int(room['grid_x']), int(room['grid_y'])
+    return [
+        (x, y)
+        for x in range(x0, x0 + int(room['grid_w']))
+        for y in range(y0, y0 + int(room['grid_h']))
+    ]
+
+
+def centre_cell(room):
+    """Cell containing the centre of a room."""
+    grid_x, grid_y = get_room_grid_coordinate(room)
+    return (min(int(grid_x), int(room['grid_x'] + room['grid_w']) - 1),
+            min(int(grid_y), int(room['grid_y'] + room['grid_h']) - 1))
+
+
+def _door_pairs(doors):
+    """Set of frozenset({cell_a, cell_b}) pairs joined by a door on the wall between them."""
+    pairs = set()
+    for door in doors:
+        x, y = int(door['grid_x']), int(door['grid_y'])
+        if door.get('orientation', 'horizontal') == 'horizontal':
+            pairs.add(frozenset(((x, y - 1), (x, y))))
+        else:
+            pairs.add(frozenset(((x - 1, y), (x, y))))
+    return pairs
+
+
+def floor_graph(template):
+    """
+    Build the walkable graph of one floor template.
+    Returns (adjacency, rooms) where adjacency maps cell -> [(cell, cost)] and
+    rooms maps template room id -> room spec.
+    """
+    cols = int(template.get('grid_cols', 24))
+    rows = int(template.get('grid_rows', 16))
+    rooms = {room['id']: room for room in template.get('rooms', [])}
+
+    # Later rooms win on overlap, as when drawing
+    owner = {}
+    for room_id, room in rooms.items():
+        for cell in room_cells(room):
+            if 0 <= cell[0] < cols and 0 <= cell[1] < rows:
+                owner[cell] = room_id
+
+    def is_open(room_id):
+        return room_id is None or rooms[room_id].get('type') in OPEN_SPACE_TYPES
+
+    doors = _door_pairs(template.get('doors', []))
+    rooms_with_doors = set()
+    for pair in doors:
+        for cell in pair:
+            if owner.get(cell) is not None and not is_open(owner[cell]):
+                rooms_with_doors.add(owner[cell])
+
+    def passable(cell_a, cell_b):
+        room_a, room_b = owner.get(cell_a), owner.get(cell_b)
+        if room_a == room_b or (is_open(room_a) and is_open(room_b)):
+            return True
+        if frozenset((cell_a, cell_b)) in doors:
+            return True
+        # A room the template gave no door opens onto any adjacent open space
+        if is_open(room_a):
+            return room_b not in rooms_with_doors
+        if is_open(room_b):
+            return room_a not in rooms_with_doors
+        return False
+
+    adjacency = {}
+    for x in range(cols):
+        for y in range(rows):
+            cell = (x, y)
+            edges = []
+            for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                other = (x + dx, y + dy)
+                if 0 <= other[0] < cols and 0 <= other[1] < rows and passable(cell, other):
+                    edges.append((other, 1.0))
+            # Diagonal steps only inside one room (or open space), never through a corner
+            for dx, dy in ((1, 1), (1, -1), (-1, 1), (-1, -1)):
+                other = (x + dx, y + dy)
+                if not (0 <= other[0] < cols and 0 <= other[1] < rows):
+                    continue
+                room_a, room_b = owner.get(cell), owner.get(other)
+                if room_a == room_b or (is_open(room_a) and is_open(room_b)):
+                    if passable(cell, (x + dx, y)) and passable(cell, (x, y + dy)):
+                        edges.append((other, DIAGONAL_COST))
+            adjacency[cell] = edges
+
+    return adjacency, rooms
+
+
+class PrinterRouter:
+    """
+    Precomputed room -> printer walking distances with nearest-enabled queries.
+
+    Rooms and printers are identified by caller-chosen keys (e.g. database ids);
+    floors are added per building, then build() computes all routes.
+    """
+
+    def __init__(self):
+        self.floors = {}      # (building, floor_number) -> (template, room_keys, printer_keys)
+        self.room_info = {}   # room_key -> {'building', 'floor_number', 'template_room_id'}
+        self.printer_info = {}  # printer_key -> {'building', 'floor_number', 'room_key'}
+        self.routes = {}      # room_key -> [(distance, printer_key)] sorted by distance
+        self.disabled = set()
+
+    def add_floor(self, building, floor_number, template, room_keys=None, printer_keys=None):
+        """
+        Register one floor of a building.
+
+        Args:
+            building: Building key (floors of one building are linked by stairs/lifts)
+            floor_number: Floor number (adjacent numbers are one floor apart)
+            template: Floor template dict (grid_cols/grid_rows/rooms/doors/printers)
+            room_keys: Dict template room id -> room key (default "<building>/F<n>/<room id>")
+            printer_keys: Dict template printer id -> printer key (default "<building>/F<n>/<printer id>")
+        """
+        prefix = f"{building}/F{floor_number}/"
+        if room_keys is None:
+            room_keys = {room['id']: prefix + room['id'] for room in template.get('rooms', [])}
+        if printer_keys is None:
+            printer_keys = {printer['id']: prefix + printer['id'] for printer in template.get('printers', [])}
+        self.floors[(building, floor_number)] = (template, room_keys, printer_keys)
+
+    # ------------------------------------------------------------------
+    # Precomputation
+    # ------------------------------------------------------------------
+
+    def build(self):
+        """Compute walking distances from every printer to every room. Returns self."""
+        self.room_info = {}
+        self.printer_info = {}
+        self.routes = {}
+
+        buildings = {}
+        for (building, floor_number) in self.floors:
+            buildings.setdefault(building, []).append(floor_number)
+
+        for building, floor_numbers in buildings.items():
+            self._build_building(building, sorted(floor_numbers))
+
+        for room_routes in self.routes.values():
+            room_routes.sort()
+        return self
+
+    def _build_building(self, building, floor_numbers):
+        adjacency = {}   # (floor_number, cell) or ('shaft', id, floor_number) -> [(node, cost)]
+        room_nodes = {}  # room_key -> node
+        printer_nodes = {}
+        shafts = {}      # shaft room id -> {floor_number: type}
+
+        for floor_number in floor_numbers:
+            template, room_keys, printer_keys = self.floors[(building, floor_number)]
+            floor_adjacency, rooms = floor_graph(template)
+            for cell, edges in floor_adjacency.items():
+                adjacency[(floor_number, cell)] = [((floor_number, other), cost) for other, cost in edges]
+
+            for room_id, room in rooms.items():
+                room_key = room_keys.get(room_id)
+                if room_key is not None:
+                    room_nodes[room_key] = (floor_number, centre_cell(room))
+                    self.room_info[room_key] = {
+                        'building': building, 'floor_number': floor_number, 'template_room_id': room_id,
+                    }
+                if room.get('type') in SHAFT_TYPES:
+                    # Every cell of a stair/lift room reaches the shaft for free
+                    shaft = ('shaft', room_id, floor_number)
+                    shafts.setdefault(room_id, {})[floor_number] = room['type']
+                    adjacency[shaft] = []
+                    for cell in room_cells(room):
+                        node = (floor_number, cell)
+                        if node in adjacency:
+                            adjacency[node].append((shaft, 0.0))
+                            adjacency[shaft].append((node, 0.0))
+
+            for printer in template.get('printers', []):
+                printer_key = printer_keys.get(printer['id'])
+                room = rooms.get(printer.get('room'))
+                if printer_key is None or room is None:
+                    continue
+                grid_x, grid_y = get_room_grid_coordinate(room, printer.get('grid_rx', 0.5), printer.get('grid_ry', 0.5))
+                printer_nodes[printer_key] = (floor_number, (int(grid_x), int(grid_y)))
+                self.printer_info[printer_key] = {
+                    'building': building, 'floor_number': floor_number, 'room_key': room_keys.get(room['id']),
+                }
+
+        # Link the same shaft on consecutive floors
+        for room_id, floors in shafts.items():
+            for floor_number, shaft_type in floors.items():
+                upper = floor_number + 1
+                if upper in floors:
+                    cost = FLOOR_CHANGE_COST.get(shaft_type, FLOOR_CHANGE_COST['stairs'])
+                    adjacency[('shaft', room_id, floor_number)].append((('shaft', room_id, upper), cost))
+                    adjacency[('shaft', room_id, upper)].append((('shaft', room_id, floor_number), cost))
+
+        node_rooms = {}
+        for room_key, node in room_nodes.items():
+            node_rooms.setdefault(node, []).append(room_key)
+
+        for printer_key, source in printer_nodes.items():
+            for node, distance in dijkstra(adjacency, source).items():
+                for room_key in node_rooms.get(node, ()):
+                    self.routes.setdefault(room_key, []).append((round(distance, 3), printer_key))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def set_enabled(self, printer_key, enabled=True):
+        """Mark a printer enabled/disabled for nearest() queries (no recomputation)."""
+        if enabled:
+            self.disabled.discard(printer_key)
+        else:
+            self.disabled.add(printer_key)
+
+    def nearest(self, room_key, k=1):
+        """
+        The k closest enabled printers reachable from a room, as [(printer_key, distance)].
+        Returns [] for unknown rooms or when no enabled printer is reachable.
+        """
+        result = []
+        for distance, printer_key in self.routes.get(room_key, ()):
+            if printer_key in self.disabled:
+                continue
+            result.append((printer_key, distance))
+            if len(result) >= k:
+                break
+        return result
+
+    def distance(self, room_key, printer_key):
+        """Walking distance between a room and a printer, or None when unreachable."""
+        for distance, key in self.routes.get(room_key, ()):
+            if key == printer_key:
+                return distance
+        return None
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def to_dict(self):
+        """Serializable index: rooms with their printers sorted by distance."""
+        return {
+            'version': ROUTES_VERSION,
+            'rooms': {
+                room_key: {**self.room_info.get(room_key, {}),
+                           'printers': [[printer_key, distance] for distance, printer_key in routes]}
+                for room_key, routes in self.routes.items()
+            },
+            'printers': self.printer_info,
+            'disabled': sorted(self.disabled),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a query-ready router from to_dict() output (no templates needed)."""
+        router = cls()
+        for room_key, room in data.get('rooms', {}).items():
+            router.routes[room_key] = [(distance, printer_key) for printer_key, distance in room.get('printers', [])]
+            router.room_info[room_key] = {k: v for k, v in room.items() if k != 'printers'}
+        router.printer_info = dict(data.get('printers', {}))
+        router.disabled = set(data.get('disabled', []))
+        return router
+
+    def save(self, path):
+        """Atomically write the routing index as JSON."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def dijkstra(adjacency, source):
+    """Shortest distances from source to every reachable node."""
+    distances = {source: 0.0}
+    heap = [(0.0, 0, source)]  # (distance, tie-breaker, node): nodes mix cell and shaft tuples
+    pushed = 0
+    while heap:
+        distance, _, node = heapq.heappop(heap)
+        if distance > distances.get(node, math.inf):
+            continue
+        for other, cost in adjacency.get(node, ()):
+            candidate = distance + cost
+            if candidate < distances.get(other, math.inf):
+                distances[other] = candidate
+                pushed += 1
+                heapq.heappush(heap, (candidate, pushed, other))
+    return distances
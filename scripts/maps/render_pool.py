@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Browser Render Pool
+Long-lived Chromium (async Playwright) that rasterizes SVG markup to PNG.
+One browser is launched per process and N pages render jobs from a shared
+queue in parallel. SVGs are loaded with set_content - no temp files, no
+file:// navigation. Other scripts submit jobs and get futures back.
+
+Usage:
+    from render_pool import get_render_pool
+    future = get_render_pool().submit(svg_content, "out.png")
+    future.result()
+"""
+
+import asyncio
+import atexit
+import os
+import re
+import threading
+from concurrent.futures import Future
+
+from floor_generator import OUTPUT_WIDTH
+
+RENDER_TIMEOUT_MS = 5000
+
+PAGE_TEMPLATE = '<!DOCTYPE html><html><body style="margin:0; background:transparent">{svg}</body></html>'
+
+
+def _svg_height(svg_content, width):
+    """Output height for an SVG rendered at `width`, keeping the viewBox aspect ratio."""
+    viewbox_match = re.search(r'viewBox="0 0 (\d+) (\d+)"', svg_content)
+    if viewbox_match:
+        return int(width * (int(viewbox_match.group(2)) / int(viewbox_match.group(1))))
+    return int(width * 0.583)
+
+
+def _strip_xml_declaration(svg_content):
+    """Inline SVG in HTML must not carry an <?xml ...?> declaration."""
+    if svg_content.lstrip().startswith('<?xml'):
+        return svg_content.split('?>', 1)[1]
+    return svg_content
+
+
+class BrowserRenderPool:
+    """
+    Pool of Chromium pages rendering SVG -> PNG on a background event loop.
+
+    The event loop runs in a daemon thread, so synchronous callers just call
+    submit() and wait on the returned concurrent.futures.Future.
+    """
+
+    def __init__(self, num_pages=None, width=OUTPUT_WIDTH):
+        self.num_pages = num_pages or os.cpu_count() or 1
+        self.width = width
+        self.loop = None
+        self.thread = None
+        self.queue = None
+        self.ready = threading.Event()
+        self.start_error = None
+        self.closed = False
+        self._playwright = None
+        self._browser = None
+        self._workers = []
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Launch the browser and page workers (idempotent). Raises if Playwright is unavailable."""
+        if self.thread is not None:
+            self.ready.wait()
+            if self.start_error:
+                raise self.start_error
+            return self
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run_loop, name="svg-render-pool", daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        if self.start_error:
+            raise self.start_error
+        return self
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._launch())
+        except Exception as e:
+            self.start_error = e
+            self.ready.set()
+            return
+        self.ready.set()
+        self.loop.run_forever()
+
+    async def _launch(self):
+        from playwright.async_api import async_playwright
+
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True, args=['--disable-gpu', '--no-sandbox'])
+        self.queue = asyncio.Queue()
+        for _ in range(self.num_pages):
+            context = await self._browser.new_context(
+                viewport={'width': self.width, 'height': _svg_height('', self.width)},
+                device_scale_factor=1
+            )
+            page = await context.new_page()
+            self._workers.append(asyncio.ensure_future(self._page_worker(page)))
+
+    async def _page_worker(self, page):
+        """Render queued jobs one at a time on a dedicated page."""
+        while True:
+            job = await self.queue.get()
+            if job is None:
+                break
+            svg_content, output_path, width, future = job
+            try:
+                png_bytes = await self._render(page, svg_content, width)
+                if output_path:
+                    with open(output_path, 'wb') as f:
+                        f.write(png_bytes)
+                if not future.cancelled():
+                    future.set_result(png_bytes)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+
+    async def _render(self, page, svg_content, width):
+        await page.set_viewport_size({'width': width, 'height': _svg_height(svg_content, width)})
+        await page.set_content(PAGE_TEMPLATE.format(svg=_strip_xml_declaration(svg_content)),
+                               wait_until='load', timeout=RENDER_TIMEOUT_MS)
+        svg_element = await page.query_selector('svg')
+        if svg_element:
+            return await svg_element.screenshot(timeout=RENDER_TIMEOUT_MS)
+        return await page.screenshot(full_page=True, timeout=RENDER_TIMEOUT_MS)
+
+    def close(self):
+        """Stop page workers and close the browser."""
+        if self.closed or self.loop is None or self.start_error:
+            self.closed = True
+            return
+        self.closed = True
+
+        async def shutdown():
+            for _ in self._workers:
+                await self.queue.put(None)
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            await self._browser.close()
+            await self._playwright.stop()
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(timeout=30)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    def submit(self, svg_content, output_path=None, width=None):
+        """
+        Queue an SVG for rendering. Returns a concurrent.futures.Future resolving to
+        the PNG bytes (also written to output_path when given).
+        """
+        if self.closed:
+            raise RuntimeError("Render pool is closed")
+        self.start()
+        future = Future()
+        job = (svg_content, output_path, width or self.width, future)
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, job)
+        return future
+
+    def render(self, svg_content, output_path=None, width=None, timeout=30):
+        """Render one SVG synchronously and return the PNG bytes."""
+        return self.submit(svg_content, output_path, width).result(timeout=timeout)
+
+    def render_files(self, jobs, width=None):
+        """
+        Render many (svg_path, png_path) pairs in parallel across the pool's pages.
+        Returns a list aligned with jobs: True, or the exception raised for that file.
+        """
+        futures = []
+        for svg_path, png_path in jobs:
+            with open(svg_path, 'r', encoding='utf-8') as f:
+                futures.append(self.submit(f.read(), png_path, width))
+
+        results = []
+        for future in futures:
+            try:
+                future.result()
+                results.append(True)
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+# ============================================================================
+# SHARED POOL
+# ============================================================================
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_render_pool(num_pages=None):
+    """Return the process-wide render pool, launching it on first use."""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None or _shared_pool.closed:
+            _shared_pool = BrowserRenderPool(num_pages=num_pages)
+            atexit.register(_shared_pool.close)
+    return _shared_pool.start()
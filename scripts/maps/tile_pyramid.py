@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Floor Map Tile Pyramid
+Post-render stage that turns each full-size floor PNG into a multi-resolution
+tile set: every zoom level halves the previous one, each level is saved as a
+whole image and cut into fixed-size tiles, and a small JSON descriptor tells
+clients what to load. Phones can show a small level first and fetch sharper
+tiles only for the area they zoom into.
+
+Layout for floors_diagrams/MAINACADE_F1.png:
+    MAINACADE_F1.tiles/tiles.json        descriptor
+    MAINACADE_F1.tiles/<z>.webp          whole image at zoom level z
+    MAINACADE_F1.tiles/<z>/<x>_<y>.webp  tiles at zoom level z
+
+Level 0 is the smallest image, the highest level is the source resolution.
+WebP is used when Pillow supports it, otherwise optimized PNG.
+
+Usage:
+    python tile_pyramid.py [directory]
+"""
+
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, features
+    PIL_AVAILABLE = True
+except ImportError:
+    Image = None
+    features = None
+    PIL_AVAILABLE = False
+
+from floor_generator import content_sha256
+
+TILE_SIZE = 256           # Tile edge in pixels
+MIN_LEVEL_WIDTH = 300     # Stop halving once a level would be narrower than this
+WEBP_QUALITY = 85
+TILES_SUFFIX = ".tiles"
+DESCRIPTOR_FILENAME = "tiles.json"
+PYRAMID_VERSION = 1       # Bump when the tile layout changes so existing sets are rebuilt
+
+
+def tile_format():
+    """Return (format name, file extension) for tiles: WebP when Pillow supports it."""
+    if PIL_AVAILABLE and features.check('webp'):
+        return ('WEBP', 'webp')
+    return ('PNG', 'png')
+
+
+def tiles_dir_for(png_path):
+    """Directory holding the tile set of a PNG (MAINACADE_F1.png -> MAINACADE_F1.tiles)."""
+    return os.path.splitext(png_path)[0] + TILES_SUFFIX
+
+
+def level_sizes(width, height, min_width=MIN_LEVEL_WIDTH):
+    """(width, height) per zoom level, smallest first, ending at the source size."""
+    sizes = [(width, height)]
+    while sizes[-1][0] // 2 >= min_width:
+        w, h = sizes[-1]
+        sizes.append((w // 2, max(1, h // 2)))
+    return sizes[::-1]
+
+
+def _save_image(image, path, fmt):
+    if fmt == 'WEBP':
+        image.save(path, 'WEBP', quality=WEBP_QUALITY, method=6)
+    else:
+        image.save(path, 'PNG', optimize=True)
+
+
+def load_descriptor(tiles_dir):
+    """Load a tile set descriptor, or None when missing/unreadable."""
+    try:
+        with open(os.path.join(tiles_dir, DESCRIPTOR_FILENAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def build_tile_pyramid(png_path, tile_size=TILE_SIZE, force=False):
+    """
+    Build the tile set for one PNG. Returns the descriptor dict.
+    Skipped (existing descriptor returned) when the source PNG has not changed.
+    """
+    if not PIL_AVAILABLE:
+        raise RuntimeError("Pillow is required for tile pyramids: pip install pillow")
+
+    with open(png_path, 'rb') as f:
+        source_sha256 = content_sha256(f.read())
+
+    tiles_dir = tiles_dir_for(png_path)
+    fmt, ext = tile_format()
+    existing = load_descriptor(tiles_dir)
+    if (not force and existing
+            and existing.get('source_sha256') == source_sha256
+            and existing.get('version') == PYRAMID_VERSION
+            and existing.get('tile_size') == tile_size
+            and existing.get('format') == ext):
+        return existing
+
+    # Rebuild from scratch so tiles of a previous (larger) layout don't linger
+    if os.path.isdir(tiles_dir):
+        shutil.rmtree(tiles_dir)
+    os.makedirs(tiles_dir)
+
+    with Image.open(png_path) as source:
+        source = source.convert('RGBA') if fmt == 'PNG' else source.convert('RGB')
+        width, height = source.size
+        levels = []
+        for zoom, (level_width, level_height) in enumerate(level_sizes(width, height)):
+            if (level_width, level_height) == source.size:
+                level_image = source
+            else:
+                level_image = source.resize((level_width, level_height), Image.LANCZOS)
+            _save_image(level_image, os.path.join(tiles_dir, f"{zoom}.{ext}"), fmt)
+
+            cols = -(-level_width // tile_size)
+            rows = -(-level_height // tile_size)
+            level_dir = os.path.join(tiles_dir, str(zoom))
+            os.makedirs(level_dir)
+            for x in range(cols):
+                for y in range(rows):
+                    box = (x * tile_size, y * tile_size,
+                           min((x + 1) * tile_size, level_width), min((y + 1) * tile_size, level_height))
+                    _save_image(level_image.crop(box), os.path.join(level_dir, f"{x}_{y}.{ext}"), fmt)
+
+            levels.append({
+                'zoom': zoom,
+                'width': level_width,
+                'height': level_height,
+                'scale': level_width / width,
+                'cols': cols,
+                'rows': rows,
+                'image': f"{zoom}.{ext}",
+            })
+
+    descriptor = {
+        'version': PYRAMID_VERSION,
+        'source': os.path.basename(png_path),
+        'source_sha256': source_sha256,
+        'width': width,
+        'height': height,
+        'tile_size': tile_size,
+        'format': ext,
+        'tile_url_template': "{z}/{x}_{y}." + ext,
+        'levels': levels,
+    }
+    tmp_path = os.path.join(tiles_dir, DESCRIPTOR_FILENAME + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(descriptor, f, indent=2)
+    os.replace(tmp_path, os.path.join(tiles_dir, DESCRIPTOR_FILENAME))
+    return descriptor
+
+
+def _build_tile_pyramid_task(job):
+    """Process pool entry point: returns the descriptor, or the exception raised."""
+    png_path, tile_size = job
+    try:
+        return build_tile_pyramid(png_path, tile_size)
+    except Exception as e:
+        return e
+
+
+def build_tile_pyramids(png_paths, tile_size=TILE_SIZE, max_workers=None):
+    """
+    Build tile sets for many PNGs in a process pool.
+    Returns a list aligned with png_paths: descriptor dicts, or the exception raised.
+
+    Args:
+        png_paths: List of full-size PNG paths
+        tile_size: Tile edge in pixels
+        max_workers: Pool size (None = CPU count, 1 = build serially in this process)
+    """
+    jobs = [(png_path, tile_size) for png_path in png_paths]
+    if not jobs:
+        return []
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(jobs))
+
+    if max_workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                return list(pool.map(_build_tile_pyramid_task, jobs))
+        except (OSError, RuntimeError) as e:
+            print(f"    Warning: Process pool unavailable ({e}), building tiles serially")
+
+    return [_build_tile_pyramid_task(job) for job in jobs]
+
+
+def build_directory_tiles(directory, tile_size=TILE_SIZE, max_workers=None):
+    """Build (or refresh) tile sets for every floor PNG in a directory."""
+    if not PIL_AVAILABLE:
+        print("Pillow not installed - skipping tile pyramids (pip install pillow)")
+        return []
+
+    png_paths = sorted(
+        os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.png')
+    )
+    if not png_paths:
+        return []
+
+    print(f"  Building tile pyramids for {len(png_paths)} PNG files ({tile_format()[1]})...")
+    results = build_tile_pyramids(png_paths, tile_size, max_workers=max_workers)
+    for png_path, result in zip(png_paths, results):
+        if isinstance(result, Exception):
+            print(f"    ✗ Failed tiles for {os.path.basename(png_path)}: {result}")
+    return results
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    target_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(script_dir, "floors_diagrams")
+    build_directory_tiles(target_dir)
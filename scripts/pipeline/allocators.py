@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Unique Value Allocators
+=======================
+Collision-free generators for values the schema (or common sense) requires
+to be unique, so the data generator never retries on a collision:
+
+- EmailAllocator: one counter per (local part, domain); the n-th user with
+  the same name gets name<n>@domain, so allocation is O(1) regardless of how
+  many users share a name.
+- CodeAllocator: fixed-width codes from a pattern (e.g. 'XXXXXXXX', 'AA99999999')
+  after an optional literal prefix ('PAY-').
+  A counter is passed through a keyed Feistel permutation of the pattern's
+  value space (cycle-walking back into range), then written in the pattern's
+  alphabets. Codes look random but are distinct by construction until the
+  space is exhausted.
+
+Both are deterministic for a given random state, like the rest of the generator.
+A CodeAllocator's state() can be saved and restored, so a later run (generate.py
+--delta) keeps issuing codes that do not clash with earlier ones.
+"""
+
+import string
+
+# Pattern characters -> alphabets (any other character is copied literally)
+PATTERN_ALPHABETS = {
+    'A': string.ascii_uppercase,
+    '9': string.digits,
+    'N': string.digits[1:],                         # Non-zero digit (no leading zeros)
+    'X': string.ascii_uppercase + string.digits,
+}
+
+FEISTEL_ROUNDS = 4
+MAX_GROUP_VALUES = 10000  # Adjacent pattern positions are formatted together through lookup tables of this size
+_MASK64 = (1 << 64) - 1
+
+
+class EmailAllocator:
+    """Unique email addresses: per-base-name counters instead of probing for free suffixes."""
+
+    def __init__(self):
+        self.used = set()
+        self.counters = {}
+
+    def reserve(self, email):
+        """Mark a fixed address (e.g. a seeded test account) as taken. Returns False if it already was."""
+        if email in self.used:
+            return False
+        self.used.add(email)
+        return True
+
+    def allocate(self, local_part, domain):
+        """local_part@domain, or local_part<n>@domain for the n-th repeat of the same base."""
+        key = (local_part, domain)
+        count = self.counters.get(key, 0)
+        while True:
+            email = f"{local_part}{count or ''}@{domain}"
+            count += 1
+            # Only a reserved or digit-suffixed base name can already hold this address
+            if email not in self.used:
+                break
+        self.counters[key] = count
+        self.used.add(email)
+        return email
+
+
+class CodeAllocator:
+    """
+    Unique fixed-width codes following a pattern, e.g. CodeAllocator('N9999999', random, prefix='PAY-').
+
+    The i-th code is the pattern's i-th value under a keyed permutation, so all
+    codes are distinct and no previously issued code has to be remembered.
+    """
+
+    def __init__(self, pattern, rng, prefix=''):
+        self.pattern = pattern
+        self.prefix = prefix
+        self.slots = [(index, PATTERN_ALPHABETS[char]) for index, char in enumerate(pattern) if char in PATTERN_ALPHABETS]
+        self.size = 1
+        for _, alphabet in self.slots:
+            self.size *= len(alphabet)
+        self.counter = 0
+        self.segments = self._segments()
+
+        # Feistel network over the smallest even bit width covering the value space
+        bits = max(2, (self.size - 1).bit_length())
+        bits += bits % 2
+        self.half_bits = bits // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        self.keys = [rng.getrandbits(64) for _ in range(FEISTEL_ROUNDS)]
+
+    def permute(self, value):
+        """Bijection on range(self.size): Feistel permutation with cycle walking."""
+        half_bits, half_mask, size = self.half_bits, self.half_mask, self.size
+        while True:
+            left, right = value >> half_bits, value & half_mask
+            for key in self.keys:
+                # Round function: multiply-xorshift mix of the right half with the round key
+                mixed = ((right * 0x9E3779B97F4A7C15 + key) & _MASK64) >> 17
+                left, right = right, left ^ ((mixed ^ (mixed >> 23)) & half_mask)
+            value = (left << half_bits) | right
+            if value < size:
+                return value
+
+    def _segments(self):
+        """
+        The pattern as segments, last first: literal text, or (radix, table) for a run of
+        adjacent positions whose combined values are spelled out in `table`.
+        """
+        segments = []
+        group = []   # Alphabets of the current run, last position first
+        radix = 1
+
+        def close_group():
+            if group:
+                table = ['']
+                for alphabet in group:
+                    table = [char + suffix for char in alphabet for suffix in table]
+                segments.append((radix, table))
+
+        for char in reversed(self.pattern):
+            alphabet = PATTERN_ALPHABETS.get(char)
+            if alphabet is None or radix * len(alphabet) > MAX_GROUP_VALUES:
+                close_group()
+                group, radix = [], 1
+            if alphabet is None:
+                # Adjacent literal characters form one segment (built back to front)
+                if segments and isinstance(segments[-1], str):
+                    segments[-1] = char + segments[-1]
+                else:
+                    segments.append(char)
+            else:
+                group.append(alphabet)
+                radix *= len(alphabet)
+        close_group()
+        return segments
+
+    def format(self, value):
+        """Write a value in range(self.size) in the pattern's alphabets."""
+        parts = []
+        for segment in self.segments:
+            if isinstance(segment, str):
+                parts.append(segment)
+            else:
+                value, digit = divmod(value, segment[0])
+                parts.append(segment[1][digit])
+        parts.append(self.prefix)
+        return ''.join(reversed(parts))
+
+    def state(self):
+        """Position of the allocator (keys and counter), e.g. for a snapshot manifest."""
+        return {'keys': list(self.keys), 'counter': self.counter}
+
+    def restore(self, state):
+        """Continue from a state() taken on an allocator with the same pattern."""
+        self.keys = list(state['keys'])
+        self.counter = state['counter']
+
+    def next(self):
+        """The next unique code."""
+        if self.counter >= self.size:
+            raise ValueError(f"Code pattern '{self.pattern}' exhausted after {self.size:,} values")
+        value = self.permute(self.counter)
+        self.counter += 1
+        return self.format(value)
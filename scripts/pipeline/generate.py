@@ -7,6 +7,7 @@ Generates comprehensive, realistic test data for the HCMIU Smart Printing Servic
 
 import random
 import string
+import heapq
 import bcrypt
 import uuid
 import yaml
@@ -16,6 +17,27 @@ from datetime import datetime, timedelta, date
 from pathlib import Path
 from collections import defaultdict
 
+from translation import translate_to_vietnamese, translate_batch
+from timeutil import (
+    SECONDS_PER_MINUTE, SECONDS_PER_HOUR, SECONDS_PER_DAY, as_of, set_as_of, cap_at_as_of, to_epoch, from_epoch,
+    random_epoch_in_range, random_epoch_with_pattern, spread_epochs, format_datetime, format_datetimes,
+    format_date, batch_rng, NUMPY_AVAILABLE, np,
+)
+from scale import apply_scale, print_estimate, estimate_tables
+from population import (
+    ENROLLING_ACADEMIC_YEARS, TEST_STUDENT_EMAILS, TEST_STAFF_EMAIL, NO_PAYMENT_EMAILS,
+    MIN_TEST_PRINT_JOBS, MIN_TEST_DEPOSITS,
+)
+from allocators import EmailAllocator, CodeAllocator
+from skew import SkewedPicker
+from snapshot import snapshot_path, write_snapshot, load_snapshot, SNAPSHOT_JOB_STUDENTS
+from schema_phases import split_schema, disable_constraints, revalidate_constraints
+from sql_batches import SqlBatchWriter
+from printer_states import (
+    PRINTING, RECOVERING, ERROR, MAINTAINED, UNPLUGGED, SILENT_TRANSITIONS, ERROR_CODES,
+    printer_log_config, final_state_of, physical_status, simulate_printer_states,
+)
+
 # ============================================================================
 # CONFIGURATION - Update these paths as needed  
 # ============================================================================
@@ -26,6 +48,9 @@ MEDIA_FOLDER = os.path.join(script_dir, "..", "..", "assets", "docs")
 PROFILE_PICS_FOLDER = os.path.join(script_dir, "..", "..", "assets", "profile_pics")
 PRINTER_PICS_FOLDER = os.path.join(script_dir, "..", "..", "assets", "printer_pics")
 OUTPUT_SQL_FILE = os.path.join(script_dir, "..", "..", "database", "schema", "insert.sql")
+DELTA_SQL_FILE = os.path.join(script_dir, "..", "..", "database", "schema", "insert_delta.sql")  # --delta output
+PRINTER_ROUTES_FILE = os.path.join(script_dir, "..", "maps", "printer_routes.json")  # Nearest-printer index for the app
+FLOOR_HITMAPS_DIR = os.path.join(script_dir, "..", "maps", "floors_diagrams", "hitmaps")  # Tap-to-select hit-maps
 
 # Supabase storage configuration
 SUPABASE_BASE_URL = "https://ilzhoxyiftrpphhbwliz.supabase.co/storage/v1/object/public"
@@ -33,14 +58,30 @@ SUPABASE_BUCKET_PRINT_JOBS = "print_jobs_files"
 SUPABASE_BUCKET_FLOOR_DIAGRAMS = "floor_diagrams"
 SUPABASE_BUCKET_PRINTER_MODEL_IMAGES = "printer_model_images"
 
-delete_path = os.path.join(script_dir, "..", "..", "database", "schema", "delete.sql")
+delete_path = os.path.join(script_dir, "..", "..", "database", "scripts", "delete.sql")
 design_path = os.path.join(script_dir, "..", "..", "database", "schema", "design.sql")
 
 BULK_INSERT_SIZE = 1000  # Number of rows per INSERT statement
 
+CODE_CAPACITY_MARGIN = 2  # Code allocators must hold this many times the estimated rows (estimates are averages)
+
+SEMESTER_BONUS_RECEIVE_RATE = 0.8   # Share of eligible (non-test) students who have received a semester bonus
+SEMESTER_BONUS_MAX_DELAY_DAYS = 30  # A received bonus lands 0..N days after the semester starts
+
 INCLUDE_SCHEMA_RESET = True  # When True, prepend delete.sql and design.sql content to output
+UPSERT_MODE = False          # When True (--upsert), rows are MERGEd into the existing schema instead of INSERTed after a reset
+DEFER_INDEXES = True         # With the schema reset: create secondary indexes and validate FKs after the data load (see schema_phases.py)
+TABLOCK_INSERTS = False      # Set by main() when the deferred-index schema is written: INSERT ... WITH (TABLOCK) into the new tables
+
+# Batching of the generated data section (see sql_batches.py)
+SET_NOCOUNT = True           # Emit SET NOCOUNT ON before the data
+GO_EVERY_STATEMENTS = 20     # End a batch with GO after this many statements (0 = no limit); each INSERT carries BULK_INSERT_SIZE rows
+GO_PER_TABLE = True          # Also end a batch whenever the target table changes
+GO_MAX_BATCH_KB = 4096       # ...and before a batch's SQL text would exceed this size, to bound compile memory (0 = no limit)
+ROWS_PER_TRANSACTION = 20000 # Wrap about this many rows in BEGIN/COMMIT TRANSACTION (0 = autocommit per statement)
 SKIP_USE_STATEMENT = True     # When True, omit the "USE database; GO" block (set to True for SQL Server versions that don't support USE)
 SQL_SERVER_MODE = True        # When True, generate SQL Server compatible syntax
+REFERENCE_ID_NAMESPACE = uuid.UUID('6f1c9a52-3d7e-5b8a-9c41-2e5d7f0a8b13')  # UUIDv5 namespace for stable reference ids
 
 # ============================================================================
 # UTILITY FUNCTIONS
@@ -136,54 +177,97 @@ def get_printer_image_url(model_name, brand_name):
     
     return None
 
+BCRYPT_ROUNDS = 10
+BCRYPT_SALT_ALPHABET = "./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+_salt_seed = None  # Set by seed_uuids() so password hashes repeat between runs
+
+def bcrypt_salt(password):
+    """bcrypt salt: random, or with a seed derived from the seed and password (same hash every run)."""
+    if _salt_seed is None:
+        return bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    salt_rng = random.Random(f"{_salt_seed}:{password}")
+    # 22 characters of bcrypt's base64; the last one carries 2 bits, so it is one of ".Oeu"
+    chars = salt_rng.choices(BCRYPT_SALT_ALPHABET, k=21)
+    chars.append(salt_rng.choice(BCRYPT_SALT_ALPHABET[::16]))
+    return f"$2b${BCRYPT_ROUNDS:02d}${''.join(chars)}".encode()
+
 def generate_password_hash(password="123456"):
     """
     Generate a bcrypt password hash compatible with Spring's BCryptPasswordEncoder
     (default strength 10).
     """
-    salt = bcrypt.gensalt(rounds=10)
-    return bcrypt.hashpw(password.encode(), salt).decode()
+    return bcrypt.hashpw(password.encode(), bcrypt_salt(password)).decode()
+
+_uuid_rng = None  # Seeded by seed_uuids() so random ids repeat between runs
+
+def seed_uuids(seed):
+    """Draw generate_uuid() ids (and password salts) from `seed` (None: os randomness)."""
+    global _uuid_rng, _salt_seed
+    _uuid_rng = random.Random(seed) if seed is not None else None
+    _salt_seed = seed
 
 def generate_uuid():
     """Generate a UUID string for SQL Server.""" 
+    if _uuid_rng is not None:
+        value = uuid.UUID(int=_uuid_rng.getrandbits(128), version=4)
+    else:
+        value = uuid.uuid4()
     if SQL_SERVER_MODE:
         # Return bare GUID string; BulkInsertHelper will add quotes
-        return str(uuid.uuid4()).upper()
+        return str(value).upper()
     else:
-        return str(uuid.uuid4())
+        return str(value)
 
-def generate_deposit_code():
-    """Generate an 8-character alphanumeric code (A-Z, 0-9) for deposit reference."""
-    chars = string.ascii_uppercase + string.digits
-    return ''.join(random.choice(chars) for _ in range(8)).upper()
+def reference_uuid(table_name, *natural_key):
+    """Deterministic UUIDv5 for a reference row, derived from its table and natural key.
+    
+    The same key gives the same id on every run, e.g.
+    reference_uuid('room', floor_id, room_code); child rows key on their parent's id.
+    """
+    name = table_name + ':' + '/'.join(str(part) for part in natural_key)
+    value = str(uuid.uuid5(REFERENCE_ID_NAMESPACE, name))
+    return value.upper() if SQL_SERVER_MODE else value
 
 def random_date_in_range(start_days_ago, end_days_ago=0):
-    """Generate a random date within a range of days ago."""
-    start_date = datetime.now() - timedelta(days=start_days_ago)
-    end_date = datetime.now() - timedelta(days=end_days_ago)
-    time_between = end_date - start_date
-    days_between = time_between.days
-    if days_between <= 0:
-        return start_date
-    random_days = random.randrange(max(1, days_between))
-    return start_date + timedelta(days=random_days)
+    """Generate a random date within a range of days ago (relative to the fixed as-of instant)."""
+    return from_epoch(random_epoch_in_range(start_days_ago, end_days_ago))
 
 def random_datetime_with_pattern(days_ago, hour_patterns):
     """Generate datetime with specific hour patterns."""
-    date = random_date_in_range(days_ago)
-    
-    # Choose hour based on patterns
-    if random.random() < 0.5:  # 50% peak hours
-        hour = random.choice(hour_patterns.get('peak', [9, 10, 14, 15]))
-    elif random.random() < 0.3:  # 30% normal hours  
-        hour = random.choice(hour_patterns.get('normal', [8, 11, 16]))
-    else:  # 20% low hours
-        hour = random.choice(hour_patterns.get('low', [7, 17, 18]))
-    
-    minute = random.randint(0, 59)
-    second = random.randint(0, 59)
-    
-    return date.replace(hour=hour, minute=minute, second=second)
+    return from_epoch(random_epoch_with_pattern(days_ago, hour_patterns))
+
+def semester_bonus_grants(enroll_days, start_days, always_received):
+    """
+    Cross-join students x semester bonuses: a pair is eligible when the student enrolled
+    on or before the semester start (both given as day numbers since the epoch).
+
+    Returns (student_index, bonus_index, received, received_day) for the eligible pairs,
+    student-major like a nested loop. Students flagged in `always_received` always receive
+    the bonus, others with SEMESTER_BONUS_RECEIVE_RATE; received_day is meaningless where
+    received is False. With NumPy the mask and the draws are computed in one batch.
+    """
+    if not NUMPY_AVAILABLE:
+        student_index, bonus_index, received, received_day = [], [], [], []
+        for i, enrolled in enumerate(enroll_days):
+            for j, start in enumerate(start_days):
+                if enrolled <= start:
+                    student_index.append(i)
+                    bonus_index.append(j)
+                    received.append(always_received[i] or random.random() < SEMESTER_BONUS_RECEIVE_RATE)
+                    received_day.append(start + random.randint(0, SEMESTER_BONUS_MAX_DELAY_DAYS))
+        return student_index, bonus_index, received, received_day
+
+    enroll = np.asarray(enroll_days, dtype=np.int64).astype('datetime64[D]')
+    starts = np.asarray(start_days, dtype=np.int64).astype('datetime64[D]')
+    eligible = enroll[:, None] <= starts[None, :]
+    student_index, bonus_index = np.nonzero(eligible)
+
+    rng = batch_rng()
+    count = len(student_index)
+    received = np.asarray(always_received, dtype=bool)[student_index] | (rng.random(count) < SEMESTER_BONUS_RECEIVE_RATE)
+    received_day = starts[bonus_index] + rng.integers(0, SEMESTER_BONUS_MAX_DELAY_DAYS + 1, size=count).astype('timedelta64[D]')
+    return (student_index.tolist(), bonus_index.tolist(), received.tolist(),
+            received_day.astype(np.int64).tolist())
 
 def sql_escape(text):
     """Escape single quotes for SQL."""
@@ -191,6 +275,55 @@ def sql_escape(text):
         return None
     return str(text).replace("'", "''")
 
+def sql_literal(value):
+    """Format a Python value as a SQL literal (as used in INSERT ... VALUES)."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, str):
+        # Always use NVARCHAR literals for strings to preserve Unicode (Vietnamese, etc.)
+        return f"N'{sql_escape(value)}'"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, datetime):
+        return f"'{value.strftime('%Y-%m-%d %H:%M:%S')}'"
+    if isinstance(value, date):
+        return f"'{value.strftime('%Y-%m-%d')}'"
+    return str(value)
+
+def merge_statement(table_name_sql, columns, values_list):
+    """Upsert a batch of rows keyed on the first column (the primary key).
+    
+    The rows are staged in a temp table shaped like the target, so they get the
+    target's column types, then MERGEd: new keys are inserted, and existing rows
+    are updated only when a value differs (EXCEPT compares NULLs as equal).
+    """
+    column_list = ", ".join(columns)
+    key, others = columns[0], columns[1:]
+    source_columns = ", ".join(f"source.{column}" for column in others)
+    target_columns = ", ".join(f"target.{column}" for column in others)
+    update_list = ", ".join(f"{column} = source.{column}" for column in others)
+    
+    sql = f"SELECT TOP 0 {column_list} INTO #upsert_stage FROM {table_name_sql};\n"
+    sql += f"INSERT INTO #upsert_stage ({column_list}) VALUES\n"
+    sql += ",\n".join(values_list)
+    sql += ";\n"
+    sql += f"MERGE INTO {table_name_sql} WITH (HOLDLOCK) AS target\n"
+    sql += "USING #upsert_stage AS source\n"
+    sql += f"ON target.{key} = source.{key}\n"
+    if others:
+        sql += f"WHEN MATCHED AND EXISTS (SELECT {source_columns} EXCEPT SELECT {target_columns}) THEN\n"
+        sql += f"    UPDATE SET {update_list}\n"
+    sql += f"WHEN NOT MATCHED BY TARGET THEN\n"
+    sql += f"    INSERT ({column_list}) VALUES ({', '.join(f'source.{column}' for column in columns)});\n"
+    sql += "DROP TABLE #upsert_stage;"
+    return sql
+
+def sql_batch_writer(out):
+    """SqlBatchWriter over a text stream, configured by the batching constants above."""
+    return SqlBatchWriter(out, statements_per_batch=GO_EVERY_STATEMENTS, per_table=GO_PER_TABLE,
+                          max_batch_bytes=GO_MAX_BATCH_KB * 1024, rows_per_transaction=ROWS_PER_TRANSACTION,
+                          nocount=SET_NOCOUNT)
+
 def generate_student_code(prefix, start_number, index):
     """Generate student code in format S20210001."""
     return f"{prefix}{start_number + index}"
@@ -214,12 +347,6 @@ def generate_phone_number(prefixes):
     remaining = ''.join(random.choices(string.digits, k=8))
     return f"{prefix}{remaining}"
 
-def generate_serial_number():
-    """Generate printer serial number."""
-    prefix = ''.join(random.choices(string.ascii_uppercase, k=2))
-    number = ''.join(random.choices(string.digits, k=8))
-    return f"{prefix}{number}"
-
 def generate_document_name(templates, courses, file_ext):
     """Generate realistic document names."""
     template = random.choice(templates)
@@ -238,7 +365,7 @@ def generate_document_name(templates, courses, file_ext):
     if "{title}" in template:
         template = template.replace("{title}", random.choice(courses)[:10])
     if "{date}" in template:
-        template = template.replace("{date}", datetime.now().strftime("%m%d"))
+        template = template.replace("{date}", from_epoch(as_of()).strftime("%m%d"))
     
     return f"{template}{file_ext}"
 
@@ -247,11 +374,16 @@ def generate_document_name(templates, courses, file_ext):
 # ============================================================================
 
 class BulkInsertHelper:
-    """Helper class to manage bulk inserts."""
+    """Helper class to manage bulk inserts.
     
-    def __init__(self, table_name, columns):
+    If a sink callable is given, each flushed INSERT statement is passed to it
+    immediately instead of being buffered, so memory stays bounded to one batch.
+    """
+    
+    def __init__(self, table_name, columns, sink=None):
         self.table_name = table_name
         self.columns = columns
+        self.sink = sink
         self.rows = []
         self.statements = []
     
@@ -263,7 +395,7 @@ class BulkInsertHelper:
             self.flush()
     
     def flush(self):
-        """Write accumulated rows as a bulk INSERT statement."""
+        """Write accumulated rows as a bulk INSERT (or, in UPSERT_MODE, MERGE) statement."""
         if not self.rows:
             return
         
@@ -283,30 +415,20 @@ class BulkInsertHelper:
         values_list = []
         
         for row in self.rows:
-            formatted_values = []
-            for value in row:
-                if value is None:
-                    formatted_values.append("NULL")
-                elif isinstance(value, str):
-                    # Always use NVARCHAR literals for strings to preserve Unicode (Vietnamese, etc.)
-                    formatted_values.append(f"N'{sql_escape(value)}'")
-                elif isinstance(value, bool):
-                    formatted_values.append("1" if value else "0")
-                elif isinstance(value, (date, datetime)):
-                    # Format date/datetime as quoted string
-                    if isinstance(value, datetime):
-                        formatted_values.append(f"'{value.strftime('%Y-%m-%d %H:%M:%S')}'")
-                    else:
-                        formatted_values.append(f"'{value.strftime('%Y-%m-%d')}'")
-                else:
-                    formatted_values.append(str(value))
-            values_list.append(f"({', '.join(formatted_values)})")
+            values_list.append(f"({', '.join(sql_literal(value) for value in row)})")
         
-        sql = f"INSERT INTO {table_name_sql} ({column_list}) VALUES\n"
-        sql += ",\n".join(values_list)
-        sql += ";"
+        if UPSERT_MODE:
+            sql = merge_statement(table_name_sql, self.columns, values_list)
+        else:
+            table_hint = " WITH (TABLOCK)" if TABLOCK_INSERTS else ""
+            sql = f"INSERT INTO {table_name_sql}{table_hint} ({column_list}) VALUES\n"
+            sql += ",\n".join(values_list)
+            sql += ";"
         
-        self.statements.append(sql)
+        if self.sink:
+            self.sink(sql)
+        else:
+            self.statements.append(sql)
         self.rows = []
     
     def get_statements(self):
@@ -326,6 +448,8 @@ class PrintingServiceDataGenerator:
         self.media_files = media_files
         self.profile_pics_files = profile_pics_files or []
         self.sql_statements = []
+        self.sql_out = None  # When set (a SqlBatchWriter), statements are streamed to it instead of buffered
+        self.sql_statement_count = 0
         
         # Data storage for relationships
         self.users = []
@@ -376,6 +500,9 @@ class PrintingServiceDataGenerator:
         self.output_test_dir = os.path.join(maps_dir, "output_test")
         
         
+        # System configuration data
+        self.system_configs = []
+        
         # Fund and supplier purchase data
         self.fund_sources = []
         self.supplier_purchases = []
@@ -384,30 +511,50 @@ class PrintingServiceDataGenerator:
         # Language and translation data
         self.languages = []
         
+        # Running state carried into a snapshot manifest (see snapshot.py) / restored for --delta
+        self.student_balances = None           # student_id -> wallet balance after payments
+        self.job_student_picker = None         # Skewed pickers for job -> student / printer
+        self.job_printer_picker = None
+        self.delta_payment_accounts = None     # (no-payment ids, test ids) from a snapshot
+        
+        # Unique value allocators: every value is distinct on first draw (see allocators.py)
+        self.email_allocator = EmailAllocator()
+        self.citizen_ids = CodeAllocator('N99999999', random)            # 9 digits, no leading zero
+        self.serial_numbers = CodeAllocator('AA99999999', random)        # Printer serial numbers
+        self.deposit_codes = CodeAllocator('XXXXXXXX', random)           # 8-char transfer memo code
+        self.deposit_references = CodeAllocator('N9999999', random, prefix='DEP-')    # 90M values each
+        self.payment_references = CodeAllocator('N9999999', random, prefix='PAY-')
+        self.supplier_payment_references = CodeAllocator('N9999999', random, prefix='PAY')
+        
+        # Reference data (faculties ... price rows) gets natural-key UUIDv5 ids, so reruns keep its ids
+        self.stable_reference_ids = spec.get('stable_reference_ids', False)
+        
         # System state
         self.current_academic_year = spec['current_academic_year']
         self.semester_names = spec['semester_names']
         
+    def reference_id(self, table_name, *natural_key):
+        """Id for a reference row: stable (UUIDv5 of the natural key) when the spec's
+        stable_reference_ids is set, else a fresh random GUID."""
+        if self.stable_reference_ids:
+            return reference_uuid(table_name, *natural_key)
+        return generate_uuid()
+    
     def add_sql(self, statement):
-        """Add a SQL statement."""
-        self.sql_statements.append(statement)
+        """Add a SQL statement (or write it straight to the output stream if streaming)."""
+        self.sql_statement_count += 1
+        if self.sql_out is not None:
+            self.sql_out.write_statement(statement)
+        else:
+            self.sql_statements.append(statement)
     
     def is_test_student(self, email):
         """Check if an email belongs to a test student account."""
-        test_student_emails = [
-            "student.test@edu.vn",
-            "phandienmanhthienk16@siu.edu.vn",
-            "leanhtuank16@siu.edu.vn",
-            "nguyenhongbaongock16@siu.edu.vn",
-            "phanthanhthaituank16@siu.edu.vn",
-            "lengocdangkhoak16@siu.edu.vn",
-            "lyhieuvyk17@siu.edu.vn",
-        ]
-        return email in test_student_emails
+        return email in TEST_STUDENT_EMAILS
     
     def is_test_staff(self, email):
         """Check if an email belongs to a test staff account."""
-        return email == "staff.test@edu.vn"
+        return email == TEST_STAFF_EMAIL
     
     def is_test_account(self, email):
         """Check if an email belongs to any test account."""
@@ -422,8 +569,15 @@ class PrintingServiceDataGenerator:
             return None
         return next((s for s in self.students if s['user_id'] == user['user_id']), None)
     
-    def generate_all_data(self):
-        """Generate all database entries."""
+    def generate_all_data(self, sql_out=None):
+        """Generate all database entries.
+        
+        If sql_out (a SqlBatchWriter, or a writable text stream to write unbatched)
+        is given, statements are streamed to it as they are produced and an empty
+        string is returned.
+        """
+        self.stream_to(sql_out)
+        
         print("Generating user data...")
         self.generate_users()
         
@@ -464,8 +618,143 @@ class PrintingServiceDataGenerator:
         print("Generating languages and translations...")
         self.generate_languages_and_translations()
         
+        self.end_stream(sql_out)
         return "\n\n".join(self.sql_statements)
     
+    def check_code_capacity(self):
+        """Raise ValueError before generating if a code allocator is too small for the estimated rows."""
+        rows = {table: count for table, count, _ in estimate_tables(self.spec)}
+        allocators = [
+            ('citizen ids', self.citizen_ids, rows['user']),
+            ('printer serial numbers', self.serial_numbers, rows['printer_physical']),
+            ('deposit codes', self.deposit_codes, rows['deposit']),
+            ('deposit references', self.deposit_references, rows['deposit']),
+            ('payment references', self.payment_references, rows['payment']),
+            ('supplier payment references', self.supplier_payment_references, rows['supplier_paper_purchase']),
+        ]
+        for name, allocator, count in allocators:
+            if count * CODE_CAPACITY_MARGIN > allocator.size - allocator.counter:
+                raise ValueError(f"Pattern '{allocator.pattern}' for {name} holds {allocator.size:,} values, "
+                                 f"too few for about {count:,} rows; widen it")
+    
+    def stream_to(self, sql_out):
+        """Stream statements to sql_out (text streams are wrapped in an unbatched SqlBatchWriter)."""
+        if sql_out is not None and not isinstance(sql_out, SqlBatchWriter):
+            sql_out = SqlBatchWriter(sql_out)
+        self.sql_out = sql_out
+    
+    def end_stream(self, sql_out):
+        """Close the writer stream_to() created for a text stream (callers close their own writers)."""
+        if self.sql_out is not None and self.sql_out is not sql_out:
+            self.sql_out.close()
+    
+    def snapshot(self):
+        """Snapshot manifest of the generated data for a later delta run (see snapshot.py)."""
+        job_printer_weights = {}
+        if self.job_printer_picker is not None:
+            for printer, weight in zip(self.job_printer_picker.items, self.job_printer_picker.weights):
+                job_printer_weights[printer['printer_id']] = weight
+        job_students = []
+        if self.job_student_picker is not None:
+            # The most popular students only: they take most of the picks, and the manifest stays small
+            popular = heapq.nlargest(SNAPSHOT_JOB_STUDENTS,
+                                     zip(self.job_student_picker.weights, range(len(self.job_student_picker.items))))
+            for weight, index in sorted(popular, key=lambda pair: pair[1]):
+                student = self.job_student_picker.items[index]
+                job_students.append({'student_id': student['student_id'], 'user_id': student['user_id'], 'weight': weight})
+        no_payment_student_ids, test_student_ids = self.payment_accounts()
+        
+        return {
+            'as_of': as_of(),
+            'job_students': job_students,
+            'printers': [{
+                'printer_id': printer['printer_id'],
+                'is_enabled': printer['is_enabled'],
+                'status': printer['status'],
+                'printing_status': printer['printing_status'],
+                'location': printer.get('location'),
+                'chain_state': printer.get('chain_state'),
+                'open_error_log_id': printer.get('open_error_log_id'),
+                'job_weight': job_printer_weights.get(printer['printer_id'], 0.0),
+            } for printer in self.printers],
+            'staff_user_ids': [staff_member['user_id'] for staff_member in self.staff],
+            'page_sizes': self.page_sizes,
+            'page_size_prices': self.page_size_prices,
+            'color_mode_prices': self.color_mode_prices,
+            'page_discount_packages': self.page_discount_packages,
+            'balances': self.student_balances or {},
+            'payment_accounts': [sorted(no_payment_student_ids), sorted(test_student_ids)],
+            'payment_references': self.payment_references.state(),
+            'last_timestamps': {
+                'print_job': max((job['created_at'] for job in self.print_jobs), default=None),
+                'payment': max((payment['transaction_date'] for payment in self.payments), default=None),
+                'printer_log': as_of(),
+            },
+        }
+    
+    def generate_delta(self, snapshot, until, sql_out=None):
+        """Generate only the traffic after a snapshot: print jobs (with files and pages),
+        payments, ledger rows and printer logs over (snapshot as_of, until].
+        
+        Returns the snapshot for the next delta. Deposits, audit logs and reference
+        data are not generated; the students, printers and pricing rows come from
+        the snapshot and must already be in the database.
+        """
+        self.stream_to(sql_out)
+        since = snapshot['as_of']
+        until = set_as_of(until)
+        if until <= since:
+            raise ValueError(f"Delta end {format_datetime(until)} is not after the snapshot ({format_datetime(since)})")
+        
+        # Restore the running state
+        self.page_sizes = snapshot['page_sizes']
+        self.page_size_prices = snapshot['page_size_prices']
+        self.color_mode_prices = snapshot['color_mode_prices']
+        self.page_discount_packages = snapshot['page_discount_packages']
+        self.staff = [{'user_id': user_id} for user_id in snapshot['staff_user_ids']]
+        self.printers = [dict(printer) for printer in snapshot['printers']]
+        self.student_balances = dict(snapshot['balances'])
+        self.delta_payment_accounts = tuple(set(ids) for ids in snapshot['payment_accounts'])
+        self.payment_references.restore(snapshot['payment_references'])
+        job_students = snapshot['job_students']
+        job_printers = [printer for printer in self.printers if printer['job_weight'] > 0]
+        if job_students and job_printers:
+            self.job_student_picker = SkewedPicker.from_weights(job_students, [s['weight'] for s in job_students])
+            self.job_printer_picker = SkewedPicker.from_weights(job_printers, [p['job_weight'] for p in job_printers])
+        
+        print(f"Delta window: {format_datetime(since)} -> {format_datetime(until)}")
+        
+        print("Generating print jobs...")
+        self.add_sql("\n-- ============================================")
+        self.add_sql("-- PRINT JOBS DATA (DELTA)")
+        self.add_sql("-- ============================================")
+        
+        # Jobs arrive uniformly over the window at the configured hourly rate
+        jobs_per_hour = (self.spec.get('delta') or {}).get('print_jobs_per_hour', 2)
+        expected_jobs = jobs_per_hour * (until - since) / SECONDS_PER_HOUR
+        num_jobs = int(expected_jobs) + (random.random() < expected_jobs % 1)
+        if self.job_student_picker is None:
+            num_jobs = 0
+        
+        bulks = self._print_job_bulks()
+        for _ in range(num_jobs):
+            created_ts = random.randint(since + 1, until)
+            uploaded_created_at = created_ts - random.randint(0, 30) * SECONDS_PER_MINUTE
+            self._add_print_job(self.job_student_picker.pick(), self.job_printer_picker.pick(),
+                                created_ts, uploaded_created_at, bulks)
+        for bulk in bulks:
+            for stmt in bulk.get_statements():
+                self.add_sql(stmt)
+        
+        print("Generating payments...")
+        self.generate_payments()
+        
+        print("Generating activity logs...")
+        self.generate_activity_logs(since)
+        
+        self.end_stream(sql_out)
+        return self.snapshot()
+    
     def generate_users(self):
         """Generate user accounts."""
         self.add_sql("-- ============================================")
@@ -478,7 +767,6 @@ class PrintingServiceDataGenerator:
         
         first_names = self.spec['first_names']
         last_names = self.spec['last_names']
-        used_emails = set()
         
         # Generate shared password hash for all users
         shared_password_hash = generate_password_hash("123456")
@@ -509,7 +797,7 @@ class PrintingServiceDataGenerator:
                 age_years = random.randint(18, 25)
             else:
                 age_years = random.randint(25, 60)
-            birth_date = datetime.now() - timedelta(days=age_years * 365 + random.randint(0, 365))
+            birth_date = from_epoch(as_of()) - timedelta(days=age_years * 365 + random.randint(0, 365))
             return birth_date.date()
         
         # Add test accounts first
@@ -518,27 +806,16 @@ class PrintingServiceDataGenerator:
             return local.replace('.', ' ').title()
         
         # Seeded student test accounts (all use SmartPrint@123)
-        test_student_emails = [
-            "student.test@edu.vn",
-            "phandienmanhthienk16@siu.edu.vn",
-            "leanhtuank16@siu.edu.vn",
-            "nguyenhongbaongock16@siu.edu.vn",
-            "phanthanhthaituank16@siu.edu.vn",
-            "lengocdangkhoak16@siu.edu.vn",
-            "lyhieuvyk17@siu.edu.vn",
-        ]
-        
-        for test_email in test_student_emails:
-            if test_email in used_emails:
+        for test_email in TEST_STUDENT_EMAILS:
+            if not self.email_allocator.reserve(test_email):
                 continue
             test_id = generate_uuid()
-            used_emails.add(test_email)
             test_phone = generate_phone_number(phone_prefixes)
             test_created_at = random_date_in_range(365, 30)
             test_full_name = name_from_email(test_email)
             test_date_of_birth = generate_date_of_birth('student')
             test_gender = random.choice(['male', 'female'])
-            test_citizen_id = f"{random.randint(100000000, 999999999)}"
+            test_citizen_id = self.citizen_ids.next()
             test_address = f"{random.randint(1, 999)} {random.choice(['Street', 'Avenue', 'Road'])}"
             test_profile_picture = get_profile_picture()
             test_email_verified = 1
@@ -566,14 +843,13 @@ class PrintingServiceDataGenerator:
         
         # Test staff account (password SmartPrint@123)
         test_staff_id = generate_uuid()
-        test_staff_email = "staff.test@edu.vn"
-        if test_staff_email not in used_emails:
-            used_emails.add(test_staff_email)
+        test_staff_email = TEST_STAFF_EMAIL
+        self.email_allocator.reserve(test_staff_email)
         test_staff_phone = generate_phone_number(phone_prefixes)
         test_staff_created_at = random_date_in_range(365, 30)
         test_staff_date_of_birth = generate_date_of_birth('staff')
         test_staff_gender = random.choice(['male', 'female'])
-        test_staff_citizen_id = f"{random.randint(100000000, 999999999)}"
+        test_staff_citizen_id = self.citizen_ids.next()
         test_staff_address = f"{random.randint(1, 999)} {random.choice(['Street', 'Avenue', 'Road'])}"
         test_staff_profile_picture = get_profile_picture()
         test_staff_email_verified = 1
@@ -614,20 +890,15 @@ class PrintingServiceDataGenerator:
                 user_type = 'staff'
                 email_domain = random.choice(self.spec['staff_email_domains'])
             
-            # Ensure email uniqueness to satisfy UNIQUE(email) constraint
-            base_email = generate_email(full_name, email_domain)
-            email = base_email
-            suffix = 1
-            while email in used_emails:
-                email = f"{base_email.split('@')[0]}{suffix}@{base_email.split('@')[1]}"
-                suffix += 1
-            used_emails.add(email)
+            # Unique email (UNIQUE(email)): repeated names get a per-name counter suffix
+            local_part, _, domain = generate_email(full_name, email_domain).partition('@')
+            email = self.email_allocator.allocate(local_part, domain)
             phone = generate_phone_number(phone_prefixes)
             created_at = random_date_in_range(730, 30)  # 2 years to 1 month ago
             is_active = 1  # All users are active now
             date_of_birth = generate_date_of_birth(user_type)
             gender = random.choice(['male', 'female'])
-            citizen_id = f"{random.randint(100000000, 999999999)}"
+            citizen_id = self.citizen_ids.next()
             address = f"{random.randint(1, 999)} {random.choice(['Street', 'Avenue', 'Road'])}"
             profile_picture = get_profile_picture()
             email_verified = random.choice([0, 1])  # Some verified, some not
@@ -673,7 +944,7 @@ class PrintingServiceDataGenerator:
         faculties_config = self.spec['faculties']
         
         for faculty_config in faculties_config:
-            faculty_id = generate_uuid()
+            faculty_id = self.reference_id('faculty', faculty_config['code'])
             created_at = random_date_in_range(365 * 30, 365 * 10)  # 10-30 years ago
             
             faculty_data = {
@@ -703,7 +974,7 @@ class PrintingServiceDataGenerator:
         
         for faculty in self.faculties:
             for dept_config in faculty['departments']:
-                department_id = generate_uuid()
+                department_id = self.reference_id('department', dept_config['code'])
                 created_at = random_date_in_range(365 * 25, 365 * 5)
                 
                 dept_data = {
@@ -739,7 +1010,7 @@ class PrintingServiceDataGenerator:
         
         for department in self.departments:
             for major_config in department['majors']:
-                major_id = generate_uuid()
+                major_id = self.reference_id('major', major_config['code'])
                 created_at = random_date_in_range(365 * 20, 365 * 2)
                 
                 major_data = {
@@ -773,8 +1044,8 @@ class PrintingServiceDataGenerator:
         academic_years_config = self.spec['academic_years']
         
         for year_config in academic_years_config:
-            academic_year_id = generate_uuid()
-            created_at = datetime.now()
+            academic_year_id = self.reference_id('academic_year', year_config['year_name'])
+            created_at = from_epoch(as_of())
             
             academic_year_data = {
                 'academic_year_id': academic_year_id,
@@ -803,15 +1074,17 @@ class PrintingServiceDataGenerator:
         
         classes_per_major_year = self.spec['classes_per_major_year']
         max_students_per_class = self.spec['max_students_per_class']
+        extra_classes = self.plan_extra_classes()
         
         for major in self.majors:
             for academic_year in self.academic_years:
                 for year_level in range(1, major['duration_years'] + 1):
-                    for class_num in range(1, classes_per_major_year + 1):
-                        class_id = generate_uuid()
-                        class_name = f"{major['code']}{year_level:02d}0{class_num}"
+                    num_extra = extra_classes.get((major['major_id'], academic_year['academic_year_id'], year_level), 0)
+                    for class_num in range(1, classes_per_major_year + num_extra + 1):
+                        class_name = f"{major['code']}{year_level:02d}{class_num:02d}"
                         class_code = f"{major['code']}-{academic_year['year_name']}-Y{year_level}-{class_num:02d}"
-                        created_at = datetime.now()
+                        class_id = self.reference_id('class', class_code)
+                        created_at = from_epoch(as_of())
                         
                         class_data = {
                             'class_id': class_id,
@@ -819,7 +1092,8 @@ class PrintingServiceDataGenerator:
                             'academic_year_id': academic_year['academic_year_id'],
                             'class_name': class_name,
                             'year_level': year_level,
-                            'max_students': max_students_per_class
+                            'max_students': max_students_per_class,
+                            'overflow': class_num > classes_per_major_year  # Added for the student population
                         }
                         
                         self.classes.append(class_data)
@@ -834,6 +1108,39 @@ class PrintingServiceDataGenerator:
         for stmt in bulk_classes.get_statements():
             self.add_sql(stmt)
         
+        if extra_classes:
+            print(f"  Added {sum(extra_classes.values()):,} classes to seat the student population")
+    
+    def plan_extra_classes(self):
+        """
+        Classes needed beyond classes_per_major_year so every active student user gets a seat.
+        
+        The enrolling slots (major x enrolling academic year x year level) first fill their
+        classes_per_major_year classes; the remaining students need ceil(overflow / students_per_class)
+        more classes, spread round-robin over the slots. Returns {(major_id, academic_year_id, year_level): count}.
+        """
+        population = sum(1 for user in self.users if user['user_type'] == 'student' and user['is_active'])
+        students_per_class = self.spec['students_per_class']
+        enrolling_slots = [
+            (major['major_id'], academic_year['academic_year_id'], year_level)
+            for major in self.majors
+            for academic_year in self.academic_years
+            if academic_year['year_name'] in ENROLLING_ACADEMIC_YEARS
+            for year_level in range(1, major['duration_years'] + 1)
+        ]
+        if not enrolling_slots:
+            return {}
+        
+        base_capacity = len(enrolling_slots) * self.spec['classes_per_major_year'] * students_per_class
+        overflow = max(0, population - base_capacity)
+        num_extra = -(-overflow // students_per_class)
+        per_slot, remainder = divmod(num_extra, len(enrolling_slots))
+        return {
+            slot: per_slot + (1 if index < remainder else 0)
+            for index, slot in enumerate(enrolling_slots)
+            if per_slot or index < remainder
+        }
+        
     def generate_students(self):
         """Generate student-specific data."""
         self.add_sql("\n-- ============================================")
@@ -867,18 +1174,29 @@ class PrintingServiceDataGenerator:
         student_index = 0
         
         # Find a suitable class for assignment (current/recent academic year)
-        suitable_classes = [
-            class_info for class_info in self.classes
-            if any(ay['academic_year_id'] == class_info['academic_year_id'] and 
-                  ay['year_name'] in ['2023-2024', '2024-2025'] 
-                  for ay in self.academic_years)
-        ]
+        enrolling_year_ids = {
+            ay['academic_year_id'] for ay in self.academic_years if ay['year_name'] in ENROLLING_ACADEMIC_YEARS
+        }
+        suitable_classes = [class_info for class_info in self.classes if class_info['academic_year_id'] in enrolling_year_ids]
+        
+        # Seats per class: regular classes fill up in order; classes added by plan_extra_classes
+        # share the students left over from the regular classes evenly
+        regular_capacity = sum(students_per_class for c in suitable_classes if not c.get('overflow'))
+        overflow_classes = [c for c in suitable_classes if c.get('overflow')]
+        overflow = max(0, len(student_users) - regular_capacity)
+        overflow_share, overflow_remainder = divmod(overflow, len(overflow_classes)) if overflow_classes else (0, 0)
+        overflow_index = 0
         
-        # Distribute students across classes
+        # Distribute students across classes (one pass over the students)
         for class_info in suitable_classes:
+            if class_info.get('overflow'):
+                seats = overflow_share + (1 if overflow_index < overflow_remainder else 0)
+                overflow_index += 1
+            else:
+                seats = students_per_class
             # Assign students to this class
-            class_size = min(students_per_class, len(student_users) - student_index)
-            if class_size <= 0:
+            class_size = min(seats, len(student_users) - student_index)
+            if class_size <= 0 and student_index >= len(student_users):
                 break
                 
             for i in range(class_size):
@@ -924,6 +1242,9 @@ class PrintingServiceDataGenerator:
                 
                 student_index += 1
         
+        if student_index < len(student_users):
+            print(f"  Warning: no class seat for {len(student_users) - student_index:,} student users")
+        
         for stmt in bulk.get_statements():
             self.add_sql(stmt)
     
@@ -984,14 +1305,22 @@ class PrintingServiceDataGenerator:
             maps_dir_abs = os.path.abspath(maps_dir)
             if maps_dir_abs not in sys.path:
                 sys.path.insert(0, maps_dir_abs)
-            from floor_generator import generate_floor_diagram, get_room_grid_coordinate, grid_to_image_coordinate
+            from floor_generator import (
+                generate_floor_diagrams, load_template, get_room_grid_coordinate, grid_to_image_coordinate,
+                LAYERS_DIRNAME, PRINTER_ROOM_TYPES
+            )
         except ImportError as e:
             print(f"Warning: Could not import floor_generator: {e}")
             import traceback
             traceback.print_exc()
-            generate_floor_diagram = None
+            generate_floor_diagrams = None
             get_room_grid_coordinate = None
             grid_to_image_coordinate = None
+            PRINTER_ROOM_TYPES = frozenset()  # The printer room rule lives in floor_generator
+            
+            def load_template(template_path):
+                with open(template_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
         
         # Generate brands
         bulk_brands = BulkInsertHelper("brand", [
@@ -1001,7 +1330,7 @@ class PrintingServiceDataGenerator:
         brands_config = self.spec['printer_brands']
         
         for brand_config in brands_config:
-            brand_id = generate_uuid()
+            brand_id = self.reference_id('printer_brand', brand_config['name'])
             created_at = random_date_in_range(1095, 365)  # 3 years to 1 year ago
             
             brand_data = {
@@ -1031,7 +1360,7 @@ class PrintingServiceDataGenerator:
         
         for brand in self.brands:
             for model_config in brand['models']:
-                model_id = generate_uuid()
+                model_id = self.reference_id('printer_model', brand['brand_id'], model_config['name'])
                 description = f"{brand['name']} {model_config['name']} - Professional printing solution"
                 created_at = random_date_in_range(1095, 365)
                 
@@ -1086,18 +1415,24 @@ class PrintingServiceDataGenerator:
         for stmt in bulk_models.get_statements():
             self.add_sql(stmt)
         
-        # Generate buildings (3 buildings)
+        # Generate buildings: the 3 showcase buildings on the hand-written templates,
+        # or every campus building from the spec when floors are laid out procedurally
         bulk_buildings = BulkInsertHelper("building", [
             "building_id", "building_code", "address", "campus_name", "created_at"
         ])
         
-        # Create 3 buildings
-        building_names = ["Main Academic Building", "Science & Technology Building", "Library & Research Center"]
-        campus_name = "Main Campus"  # Default campus
+        procedural_layout = self.spec.get('floor_layout', 'templates') == 'procedural'
+        if procedural_layout:
+            building_entries = self.campus_buildings()
+        else:
+            building_names = ["Main Academic Building", "Science & Technology Building", "Library & Research Center"]
+            building_entries = [
+                (building_name, building_name[:10].upper().replace(' ', '').replace('&', ''), "Main Campus")
+                for building_name in building_names
+            ]
         
-        for building_name in building_names:
-            building_id = generate_uuid()
-            building_code = building_name[:10].upper().replace(' ', '').replace('&', '')
+        for building_name, building_code, campus_name in building_entries:
+            building_id = self.reference_id('building', building_code)
             address = f"{building_name}, {campus_name}"
             
             building_data = {
@@ -1136,20 +1471,26 @@ class PrintingServiceDataGenerator:
             "floor_template_5.json"
         ]
         
-        print(f"  Generating {len(self.buildings)} buildings with 5 floors each...")
+        floors_per_building = int(self.spec.get('floors_per_building', 5))
+        print(f"  Generating {len(self.buildings)} buildings with {floors_per_building} floors each...")
         floor_count = 0
-        total_floors = len(self.buildings) * 5
+        total_floors = len(self.buildings) * floors_per_building
         
         # Create floor data structures first
         for building in self.buildings:
-            for floor_num in range(1, 6):  # 5 floors (1-5)
+            if procedural_layout:
+                floor_template_paths = self.procedural_floor_templates(building['building_code'], floors_per_building)
+            for floor_num in range(1, floors_per_building + 1):
                 floor_count += 1
-                floor_id = generate_uuid()
+                floor_id = self.reference_id('floor', building['building_id'], floor_num)
                 
-                # Select template (cycle through templates)
-                template_idx = (floor_num - 1) % len(template_files)
-                template_file = template_files[template_idx]
-                template_path = os.path.join(self.floor_templates_dir, template_file)
+                if procedural_layout:
+                    template_path = floor_template_paths[floor_num - 1]
+                else:
+                    # Select template (cycle through templates)
+                    template_idx = (floor_num - 1) % len(template_files)
+                    template_file = template_files[template_idx]
+                    template_path = os.path.join(self.floor_templates_dir, template_file)
                 
                 floor_data = {
                     'floor_id': floor_id,
@@ -1197,15 +1538,12 @@ class PrintingServiceDataGenerator:
             'Elevator': ['Elevator']
         }
         
-        # Printer-allowed room types
-        printer_room_types = {'lab', 'classroom', 'library'}
-        
-        room_count = 0
+        # Diagram render tasks, collected per floor and rendered in one parallel batch below
+        diagram_tasks = []
         for floor in self.floors:
-            # Load template
+            # Load template (parsed once, shared by rooms, diagrams and printers)
             try:
-                with open(floor['template_path'], 'r', encoding='utf-8') as f:
-                    template = json.load(f)
+                template = load_template(floor['template_path'])
             except Exception as e:
                 print(f"Warning: Could not load template {floor['template_path']}: {e}")
                 continue
@@ -1225,8 +1563,8 @@ class PrintingServiceDataGenerator:
                 if not room_spec.get('label') or room_spec.get('type') in ['corridor', 'stairs', 'elevator']:
                     continue
                 
-                room_id = generate_uuid()
                 room_code = f"{floor['floor_number']}{room_counter:02d}"
+                room_id = self.reference_id('room', floor['floor_id'], room_code)
                 template_type = room_spec.get('type', 'office')
                 room_type = room_type_mapping.get(template_type, 'Office')
                 template_room_id = room_spec.get('id', '').lower()
@@ -1289,7 +1627,7 @@ class PrintingServiceDataGenerator:
                     'room_type': room_type,
                     'template_type': template_type,
                     'room_spec': room_spec,
-                    'allows_printer': template_type in printer_room_types,
+                    'allows_printer': template_type in PRINTER_ROOM_TYPES,
                     'template_room_id': template_room_id
                 }
                 
@@ -1308,50 +1646,48 @@ class PrintingServiceDataGenerator:
                 
                 room_counter += 1
             
-            # Generate floor diagram with room mappings (after rooms are created)
+            # Queue floor diagrams with room mappings (after rooms are created)
             # Skip PNG generation for speed - only generate SVG (much faster)
-            if generate_floor_diagram:
+            if generate_floor_diagrams:
                 # Debug: print room mapping for troubleshooting
                 if room_mapping:
                     print(f"    Room mapping for {floor['building_code']} F{floor['floor_number']}: {len(room_mapping)} rooms")
-                try:
-                    # Generate SVG only (fast) - PNG will be generated in batch afterward
-                    diagram_filename, grid_to_pixel_scale = generate_floor_diagram(
-                        floor['template_path'],
-                        self.floors_diagrams_dir,
-                        floor['building_code'],
-                        floor['floor_number'],
-                        room_mapping if room_mapping else {},
-                        generate_png=False,  # Skip PNG during pipeline for speed
-                        include_printers=False  # NO printers in floors_diagrams
-                    )
-                    # Generate full Supabase URL for floor diagram
-                    if diagram_filename:
-                        floor['file_url'] = f"{SUPABASE_BASE_URL}/{SUPABASE_BUCKET_FLOOR_DIAGRAMS}/{diagram_filename}"
-                    else:
-                        floor['file_url'] = None
-                    floor['grid_to_pixel_scale'] = grid_to_pixel_scale
-                    
-                    # Also generate SVG WITH printers for output_test folder
-                    try:
-                        generate_floor_diagram(
-                            floor['template_path'],
-                            self.output_test_dir,
-                            floor['building_code'],
-                            floor['floor_number'],
-                            room_mapping if room_mapping else {},
-                            generate_png=False,  # Skip PNG during pipeline for speed
-                            include_printers=True  # WITH printers in output_test
-                        )
-                    except Exception as e:
-                        print(f"    Warning: Could not generate test diagram with printers for {floor['building_code']} F{floor['floor_number']}: {e}")
-                    
-                    if (room_count + 1) % 5 == 0 or (room_count + 1) == len(self.floors):
-                        print(f"    Generated {room_count + 1}/{len(self.floors)} floor diagrams...")
-                except Exception as e:
-                    print(f"    Warning: Could not generate floor diagram for {floor['building_code']} F{floor['floor_number']}: {e}")
-            
-            room_count += 1
+                # NO printers in floors_diagrams, plus the separate layers (shared per-template
+                # base + per-floor overlays); output_test is composed from the layers in main()
+                diagram_tasks.append((floor, {
+                    'template_path': floor['template_path'],
+                    'output_dir': self.floors_diagrams_dir,
+                    'building_code': floor['building_code'],
+                    'floor_number': floor['floor_number'],
+                    'room_mapping': room_mapping if room_mapping else {},
+                    'generate_png': False,  # Skip PNG during pipeline for speed - PNG is generated in batch afterward
+                    'include_printers': False,
+                    'layers_dir': os.path.join(self.floors_diagrams_dir, LAYERS_DIRNAME),
+                }))
+        
+        # Render all floor diagrams as independent tasks in a process pool
+        if diagram_tasks:
+            print(f"  Rendering {len(diagram_tasks)} floor diagrams...")
+            results = generate_floor_diagrams(
+                [task for _, task in diagram_tasks],
+                max_workers=self.spec.get('floor_diagram_workers')
+            )
+            generated = 0
+            for (floor, _), result in zip(diagram_tasks, results):
+                label = f"{floor['building_code']} F{floor['floor_number']}"
+                if isinstance(result, Exception):
+                    print(f"    Warning: Could not generate floor diagram for {label}: {result}")
+                    continue
+                
+                diagram_filename, grid_to_pixel_scale = result
+                # Generate full Supabase URL for floor diagram
+                if diagram_filename:
+                    floor['file_url'] = f"{SUPABASE_BASE_URL}/{SUPABASE_BUCKET_FLOOR_DIAGRAMS}/{diagram_filename}"
+                else:
+                    floor['file_url'] = None
+                floor['grid_to_pixel_scale'] = grid_to_pixel_scale
+                generated += 1
+            print(f"    Generated {generated}/{len(self.floors)} floor diagrams...")
         
         # IMPORTANT: Insert floors BEFORE rooms (rooms have FK to floors)
         # Now generate floor SQL with diagram filenames (after diagrams are generated)
@@ -1383,27 +1719,26 @@ class PrintingServiceDataGenerator:
         
         # Use only test staff for printer creation
         # Find test staff user first, then find corresponding staff record
-        test_staff_user = next((u for u in self.users if u.get('email') == 'staff.test@edu.vn'), None)
+        test_staff_user = next((u for u in self.users if u.get('email') == TEST_STAFF_EMAIL), None)
         creator_staff = None
         if test_staff_user and self.staff:
             creator_staff = next((s for s in self.staff if s.get('user_id') == test_staff_user['user_id']), None)
         
         # Map room template IDs to database room IDs for printer assignment
-        room_template_to_db = {}  # Maps template room ID -> database room data
+        room_template_to_db = {}  # Maps (floor_id, template room ID) -> database room data
         for room in self.rooms:
             template_id = room.get('template_room_id', '').lower()
             if template_id:
-                room_template_to_db[template_id] = room
+                room_template_to_db[(room['floor_id'], template_id)] = room
         
         status_options = ['idle', 'idle', 'idle', 'idle', 'idle', 'printing', 'maintained', 'unplugged']
         printing_status_options = ['printing', 'paper_jam', 'low_toner', 'out_of_paper', 'network_error', 'error']
         
         # Generate printers from specs for each floor
         for floor in self.floors:
-            # Load template to get printers
+            # Load template to get printers (cached)
             try:
-                with open(floor['template_path'], 'r', encoding='utf-8') as f:
-                    template = json.load(f)
+                template = load_template(floor['template_path'])
             except Exception as e:
                 continue
             
@@ -1412,7 +1747,7 @@ class PrintingServiceDataGenerator:
             for printer_spec in printers_spec:
                 # Find the room by template ID
                 room_template_id = printer_spec.get('room', '').lower()
-                room = room_template_to_db.get(room_template_id)
+                room = room_template_to_db.get((floor['floor_id'], room_template_id))
                 
                 if not room:
                     continue  # Room not found, skip this printer
@@ -1420,7 +1755,7 @@ class PrintingServiceDataGenerator:
                 printer_id = generate_uuid()
                 model = random.choice(self.models)
                 
-                serial_number = generate_serial_number()
+                serial_number = self.serial_numbers.next()
                 installed_date = random_date_in_range(1095, 30)
                 last_maintenance = random_date_in_range(90, 0)
                 created_at = installed_date
@@ -1470,6 +1805,7 @@ class PrintingServiceDataGenerator:
                     'is_enabled': is_enabled,
                     'status': status,
                     'printing_status': printing_status,
+                    'installed_date': installed_date,
                     'printer_spec': printer_spec  # Store spec for diagram generation
                 }
                 
@@ -1489,6 +1825,109 @@ class PrintingServiceDataGenerator:
         for stmt in bulk_printers.get_statements():
             self.add_sql(stmt)
     
+    def campus_buildings(self):
+        """
+        (building_name, building_code, campus_name) for every building in the spec's
+        `campuses` list (entries like "A1 - Main Building"), plus `generated_campuses`
+        synthetic campuses of `buildings_per_generated_campus` buildings each.
+        """
+        buildings = []
+        for campus in self.spec.get('campuses', []):
+            for entry in campus.get('buildings', []):
+                code, _, name = entry.partition(' - ')
+                buildings.append((name.strip() or code.strip(), code.strip().upper(), campus['name']))
+        
+        for campus_index in range(1, int(self.spec.get('generated_campuses', 0) or 0) + 1):
+            campus_name = f"Generated Campus {campus_index}"
+            for building_index in range(1, int(self.spec.get('buildings_per_generated_campus', 10)) + 1):
+                code = f"G{campus_index}B{building_index:02d}"
+                buildings.append((f"Building {code}", code, campus_name))
+        return buildings
+    
+    def procedural_floor_templates(self, building_code, num_floors):
+        """
+        Lay out a building's floors procedurally and save them as templates under
+        specs/generated/. Returns the template paths, one per floor.
+        The building's printers_per_building printers are spread over its floors.
+        """
+        from layout_generator import generate_floor_template, save_template, split_printers
+        
+        printer_range = self.spec.get('printers_per_building', {'min': 2, 'max': 8})
+        num_printers = random.randint(printer_range['min'], printer_range['max'])
+        printer_counts = split_printers(num_printers, num_floors, random)
+        grid_cols = int(self.spec.get('floor_grid_cols', 24))
+        grid_rows = int(self.spec.get('floor_grid_rows', 16))
+        
+        paths = []
+        for floor_num in range(1, num_floors + 1):
+            # Seeded per floor so the layout only depends on the run seed and draw order
+            layout_rng = random.Random(random.getrandbits(64))
+            template = generate_floor_template(layout_rng, floor_num, printer_counts[floor_num - 1], grid_cols, grid_rows)
+            path = os.path.join(self.floor_templates_dir, "generated", f"{building_code}_F{floor_num}.json")
+            paths.append(save_template(template, path))
+        return paths
+    
+    def floor_template_keys(self):
+        """
+        Database ids of every floor's rooms and printers keyed by their template ids:
+        returns {floor_id: (room_keys, printer_keys)} for the routing index and hit-maps,
+        grouped in one pass over the rooms and printers.
+        """
+        keys = {floor['floor_id']: ({}, {}) for floor in self.floors}
+        room_floors = {}
+        for room in self.rooms:
+            room_floors[room['room_id']] = room['floor_id']
+            if room.get('template_room_id') and room['floor_id'] in keys:
+                keys[room['floor_id']][0][room['template_room_id']] = room['room_id']
+        for printer in self.printers:
+            floor_id = room_floors.get(printer['room_id'])
+            if floor_id in keys:
+                keys[floor_id][1][printer['printer_spec']['id']] = printer['printer_id']
+        return keys
+    
+    def build_printer_router(self):
+        """
+        Build the nearest-printer routing index over the generated floors, keyed by
+        database room_id / printer_id. Returns None when the maps modules are unavailable.
+        """
+        try:
+            from floor_generator import load_template
+            from printer_routing import PrinterRouter
+        except ImportError as e:
+            print(f"Warning: Could not import printer_routing: {e}")
+            return None
+        
+        router = PrinterRouter()
+        floor_keys = self.floor_template_keys()
+        for floor in self.floors:
+            room_keys, printer_keys = floor_keys[floor['floor_id']]
+            router.add_floor(floor['building_id'], floor['floor_number'], load_template(floor['template_path']),
+                             room_keys=room_keys, printer_keys=printer_keys)
+        router.build()
+        for printer in self.printers:
+            router.set_enabled(printer['printer_id'], printer['is_enabled'])
+        return router
+    
+    def export_floor_hitmaps(self, output_dir):
+        """
+        Write a tap-to-select hit-map (<building>_F<n>.hitmap.json/.bin) per floor,
+        keyed by database room_id / printer_id. Returns the number of floors written.
+        """
+        try:
+            from floor_generator import load_template
+            from hitmap import FloorHitMap
+        except ImportError as e:
+            print(f"Warning: Could not import hitmap: {e}")
+            return 0
+        
+        floor_keys = self.floor_template_keys()
+        for floor in self.floors:
+            room_keys, printer_keys = floor_keys[floor['floor_id']]
+            hitmap = FloorHitMap.from_template(load_template(floor['template_path']), room_keys, printer_keys,
+                                               scale=floor.get('grid_to_pixel_scale'))
+            hitmap.save(os.path.join(output_dir, f"{floor['building_code']}_F{floor['floor_number']}"))
+        return len(self.floors)
+    
     def generate_page_allocation_system(self):
         """Generate page sizes and pricing configuration."""
         self.add_sql("\n-- ============================================")
@@ -1510,7 +1949,7 @@ class PrintingServiceDataGenerator:
         created_at = random_date_in_range(365, 30)
         
         for page_data in page_sizes_data:
-            page_size_id = generate_uuid()
+            page_size_id = self.reference_id("page_size", page_data["name"])
             
             self.page_sizes.append({
                 "page_size_id": page_size_id,
@@ -1564,7 +2003,7 @@ class PrintingServiceDataGenerator:
                     end_day = 30
                 end_date = datetime(term_year_end, end_month, end_day)
                 
-                semester_id = generate_uuid()
+                semester_id = self.reference_id('semester', ay['academic_year_id'], term_name)
                 self.semesters.append({
                     "semester_id": semester_id,
                     "academic_year_id": ay['academic_year_id'],
@@ -1579,7 +2018,7 @@ class PrintingServiceDataGenerator:
                     term_name,
                     start_date.strftime('%Y-%m-%d'),
                     end_date.strftime('%Y-%m-%d'),
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    format_datetime(as_of())
                 ])
         
         for stmt in bulk_semesters.get_statements():
@@ -1602,7 +2041,7 @@ class PrintingServiceDataGenerator:
         
         created_at = random_date_in_range(365, 30)
         for page_size in self.page_sizes:
-            price_id = generate_uuid()
+            price_id = self.reference_id('page_size_price', page_size['page_size_id'])
             size_name = page_size["size_name"]
             page_price = page_prices.get(size_name, base_price_a4)
             
@@ -1670,7 +2109,7 @@ class PrintingServiceDataGenerator:
         created_at = random_date_in_range(365, 30)
         
         for mode_data in color_modes_data:
-            color_mode_id = generate_uuid()
+            color_mode_id = self.reference_id("color_mode", mode_data["name"])
             
             self.color_modes.append({
                 'color_mode_id': color_mode_id,
@@ -1710,7 +2149,7 @@ class PrintingServiceDataGenerator:
             if not matching_color_mode:
                 raise ValueError(f"No color_mode found for: {price_setting['mode']}")
             
-            setting_id = generate_uuid()
+            setting_id = self.reference_id('color_mode_price', matching_color_mode['color_mode_id'])
                 
             self.color_mode_prices.append({
                 'setting_id': setting_id,
@@ -1747,7 +2186,7 @@ class PrintingServiceDataGenerator:
         ]
         
         for pkg in discount_packages:
-            package_id = generate_uuid()
+            package_id = self.reference_id('page_discount_package', pkg['min_pages'])
             
             self.page_discount_packages.append({
                 'package_id': package_id,
@@ -1811,7 +2250,7 @@ class PrintingServiceDataGenerator:
         ]
         
         for pkg in bonus_packages:
-            package_id = generate_uuid()
+            package_id = self.reference_id('deposit_bonus_package', pkg['name'])
             created_at = random_date_in_range(365, 30)
             
             self.deposit_bonus_packages.append({
@@ -1847,7 +2286,7 @@ class PrintingServiceDataGenerator:
         default_semester_bonus = 125000  # 125,000 VND per semester
         
         for semester in self.semesters:
-            bonus_id = generate_uuid()
+            bonus_id = self.reference_id('semester_bonus', semester['semester_id'])
             bonus_amount = default_semester_bonus
             created_at = semester['start_date']
             if isinstance(created_at, str):
@@ -1878,69 +2317,49 @@ class PrintingServiceDataGenerator:
         ])
         
         # Identify test students for guaranteed semester bonuses
-        test_student_emails = [
-            "student.test@edu.vn",
-            "phandienmanhthienk16@siu.edu.vn",
-            "leanhtuank16@siu.edu.vn",
-            "nguyenhongbaongock16@siu.edu.vn",
-            "phanthanhthaituank16@siu.edu.vn",
-            "lengocdangkhoak16@siu.edu.vn",
-            "lyhieuvyk17@siu.edu.vn",
-        ]
-        test_student_ids = set()
-        for email in test_student_emails:
-            user = next((u for u in self.users if u['email'] == email), None)
-            if user:
-                student = next((s for s in self.students if s['user_id'] == user['user_id']), None)
-                if student:
-                    test_student_ids.add(student['student_id'])
-        
-        for student in self.students:
-            enrollment_date = student.get('enrollment_date')
-            if not enrollment_date:
-                continue
-            if isinstance(enrollment_date, str):
-                enrollment_date = datetime.strptime(enrollment_date, '%Y-%m-%d').date()
-            elif isinstance(enrollment_date, datetime):
-                enrollment_date = enrollment_date.date()
+        test_user_ids = {u['user_id'] for u in self.users if u['email'] in TEST_STUDENT_EMAILS}
+        
+        # Semesters that have a bonus, with their start as a day number
+        semester_by_id = {s['semester_id']: s for s in self.semesters}
+        bonus_semesters = [(semester_bonus, semester_by_id[semester_bonus['semester_id']])
+                           for semester_bonus in self.semester_bonuses
+                           if semester_bonus['semester_id'] in semester_by_id]
+        start_days = [to_epoch(semester['start_date']) // SECONDS_PER_DAY for _, semester in bonus_semesters]
+        semester_starts = [format_datetime(day * SECONDS_PER_DAY) for day in start_days]
+        
+        enrolled_students = [s for s in self.students if s.get('enrollment_date')]
+        enroll_days = [to_epoch(s['enrollment_date']) // SECONDS_PER_DAY for s in enrolled_students]
+        # Test accounts always receive the bonus
+        always_received = [s['user_id'] in test_user_ids for s in enrolled_students]
+        
+        # Only students enrolled on or before the semester start are eligible
+        student_index, bonus_index, received_flags, received_days = semester_bonus_grants(
+            enroll_days, start_days, always_received)
+        # Received dates fall within a few weeks of each semester start: format each distinct day once
+        date_labels = {day: format_date(day * SECONDS_PER_DAY) for day in set(received_days)}
+        
+        for i, j, received, received_day in zip(student_index, bonus_index, received_flags, received_days):
+            student = enrolled_students[i]
+            semester_bonus, semester = bonus_semesters[j]
+            student_bonus_id = generate_uuid()
             
-            is_test_account = student['student_id'] in test_student_ids
+            self.student_semester_bonuses.append({
+                'student_bonus_id': student_bonus_id,
+                'student_id': student['student_id'],
+                'semester_bonus_id': semester_bonus['bonus_id'],
+                'semester_id': semester['semester_id'],
+                'received': received
+            })
             
-            for semester_bonus in self.semester_bonuses:
-                semester = next((s for s in self.semesters if s['semester_id'] == semester_bonus['semester_id']), None)
-                if not semester:
-                    continue
-                
-                semester_start = semester['start_date']
-                if isinstance(semester_start, str):
-                    semester_start = datetime.strptime(semester_start, '%Y-%m-%d').date()
-                elif isinstance(semester_start, datetime):
-                    semester_start = semester_start.date()
-                
-                # Only give bonus if student was enrolled before semester start
-                if enrollment_date <= semester_start:
-                    student_bonus_id = generate_uuid()
-                    # Test accounts always receive bonus, regular students 80% chance
-                    received = True if is_test_account else (random.random() < 0.8)
-                    received_date = semester_start + timedelta(days=random.randint(0, 30)) if received else None
-                    
-                    self.student_semester_bonuses.append({
-                        'student_bonus_id': student_bonus_id,
-                        'student_id': student['student_id'],
-                        'semester_bonus_id': semester_bonus['bonus_id'],
-                        'semester_id': semester['semester_id'],
-                        'received': received
-                    })
-                    
-                    bulk_student_semester_bonuses.add_row([
-                        student_bonus_id,
-                    student['student_id'],
-                        semester_bonus['bonus_id'],
-                        semester['semester_id'],
-                        1 if received else 0,
-                        received_date.strftime('%Y-%m-%d') if received_date else None,
-                        semester_start.strftime('%Y-%m-%d %H:%M:%S')
-                    ])
+            bulk_student_semester_bonuses.add_row([
+                student_bonus_id,
+                student['student_id'],
+                semester_bonus['bonus_id'],
+                semester['semester_id'],
+                1 if received else 0,
+                date_labels[received_day] if received else None,
+                semester_starts[j]
+            ])
         
         for stmt in bulk_student_semester_bonuses.get_statements():
             self.add_sql(stmt)
@@ -1965,57 +2384,25 @@ class PrintingServiceDataGenerator:
         # Note: This is only for payment generation logic, actual balance is computed via view
         student_balance_map = {}
         
-        # Identify test students - ONLY generate deposits for hard-coded test accounts
-        # NOTE: leanhtuank16@siu.edu.vn is excluded from deposits/payments
-        test_student_emails = [
-            "student.test@edu.vn",
-            "phandienmanhthienk16@siu.edu.vn",
-            "nguyenhongbaongock16@siu.edu.vn",
-            "phanthanhthaituank16@siu.edu.vn",
-            "lengocdangkhoak16@siu.edu.vn",
-            "lyhieuvyk17@siu.edu.vn",
-        ]
-        test_student_ids = set()
-        for email in test_student_emails:
-            user = next((u for u in self.users if u['email'] == email), None)
-            if user:
-                student = next((s for s in self.students if s['user_id'] == user['user_id']), None)
-                if student:
-                    test_student_ids.add(student['student_id'])
-        
-        # Identify leanhtuank16 account to exclude from deposits/payments
-        leanhtuan_email = "leanhtuank16@siu.edu.vn"
-        leanhtuan_student_id = None
-        leanhtuan_user = next((u for u in self.users if u['email'] == leanhtuan_email), None)
-        if leanhtuan_user:
-            leanhtuan_student = next((s for s in self.students if s['user_id'] == leanhtuan_user['user_id']), None)
-            if leanhtuan_student:
-                leanhtuan_student_id = leanhtuan_student['student_id']
-        
-        # Track used deposit codes to ensure uniqueness
-        used_deposit_codes = set()
+        # Test students are guaranteed a few deposits; leanhtuank16 has no deposits/payments
+        no_payment_student_ids, test_student_ids = self.payment_accounts()
         
-        for student in self.students:
-            # Skip leanhtuank16 account - no deposits/payments for this account
-            if student['student_id'] == leanhtuan_student_id:
-                continue
-            
-            is_test_account = student['student_id'] in test_student_ids
-            # ONLY generate deposits for hard-coded test accounts
-            if not is_test_account:
-                continue
-            
-            # Test accounts get 5-9 deposits each
-            num_deposits = random.randint(5, 9)
-            
+        # Deposits come from the whole student population (skipping leanhtuank16 - no
+        # deposits/payments for this account): avg_deposits_per_student on average, mostly
+        # from a few frequent depositors; separately, every test account gets at least MIN_TEST_DEPOSITS
+        deposit_students = [s for s in self.students if s['student_id'] not in no_payment_student_ids]
+        total_deposits = round(self.spec.get('avg_deposits_per_student', 0) * len(deposit_students))
+        deposit_skew = (self.spec.get('skew') or {}).get('deposit_student')
+        deposit_counts = SkewedPicker(deposit_students, deposit_skew).counts(total_deposits) if deposit_students else []
+        deposit_counts = [max(count, MIN_TEST_DEPOSITS) if student['student_id'] in test_student_ids else count
+                          for student, count in zip(deposit_students, deposit_counts)]
+        
+        for student, num_deposits in zip(deposit_students, deposit_counts):
             for _ in range(num_deposits):
                 deposit_id = generate_uuid()
                 
-                # Generate unique deposit code
-                deposit_code = generate_deposit_code()
-                while deposit_code in used_deposit_codes:
-                    deposit_code = generate_deposit_code()
-                used_deposit_codes.add(deposit_code)
+                # Unique deposit code (UNIQUE(deposit_code))
+                deposit_code = self.deposit_codes.next()
                 
                 # Deposit amounts: 125,000 - 2,500,000 VND, weighted towards lower amounts
                 deposit_amount = random.choices(
@@ -2035,7 +2422,7 @@ class PrintingServiceDataGenerator:
                 
                 total_credited = deposit_amount + bonus_amount
                 method = random.choice(payment_methods)
-                reference = f"DEP-{random.randint(100000, 999999)}"
+                reference = self.deposit_references.next()
                 
                 # Payment status distribution: completed (90%), pending (5%), failed (3%), expired (1%), cancelled (1%)
                 rand = random.random()
@@ -2050,13 +2437,13 @@ class PrintingServiceDataGenerator:
                 else:
                     status = 'cancelled'
                 
-                # Transaction date: scattered randomly in the past (last 6 months)
-                transaction_date = random_date_in_range(180, 0)
+                # Transaction date: scattered randomly in the past (last 6 months), as epoch seconds
+                transaction_date = random_epoch_in_range(180, 0)
                 
                 # Expired_at: 10 minutes after transaction_date if status is expired or pending
                 expired_at = None
                 if status in ['expired', 'pending']:
-                    expired_at = transaction_date + timedelta(minutes=10)
+                    expired_at = transaction_date + 10 * SECONDS_PER_MINUTE
                 
                 # Cancellation reason: only if cancelled
                 cancellation_reason = None
@@ -2102,8 +2489,8 @@ class PrintingServiceDataGenerator:
                     method,
                     reference,
                     status,
-                    transaction_date.strftime('%Y-%m-%d %H:%M:%S'),
-                    expired_at.strftime('%Y-%m-%d %H:%M:%S') if expired_at else None,
+                    format_datetime(transaction_date),
+                    format_datetime(expired_at),
                     cancellation_reason
                 ])
         
@@ -2141,8 +2528,9 @@ class PrintingServiceDataGenerator:
         fund_types = ['school_budget', 'donation', 'revenue', 'other']
         fund_type_weights = [0.5, 0.2, 0.2, 0.1]  # 50% school budget, 20% donation, 20% revenue, 10% other
         
-        # Generate 10-20 fund sources
-        num_funds = random.randint(10, 20)
+        # Number of fund sources (spec range, 10-20 by default)
+        fund_range = self.spec.get('fund_sources', {'min': 10, 'max': 20})
+        num_funds = random.randint(fund_range['min'], fund_range['max'])
         creator_staff = random.choice(self.staff) if self.staff else None
         
         fund_source_names = {
@@ -2231,8 +2619,9 @@ class PrintingServiceDataGenerator:
         payment_methods = ['bank_transfer', 'check', 'cash', 'credit_card', 'wire_transfer']
         payment_statuses = ['completed', 'completed', 'completed', 'pending', 'completed']  # Mostly completed
         
-        # Generate 15-30 supplier purchases
-        num_purchases = random.randint(15, 30)
+        # Number of supplier purchases (spec range, 15-30 by default)
+        purchase_range = self.spec.get('supplier_purchases', {'min': 15, 'max': 30})
+        num_purchases = random.randint(purchase_range['min'], purchase_range['max'])
         
         for i in range(num_purchases):
             purchase_id = generate_uuid()
@@ -2241,7 +2630,7 @@ class PrintingServiceDataGenerator:
             purchase_date = random_date_in_range(365, 0)  # Last year
             
             payment_method = random.choice(payment_methods)
-            payment_reference = f"PAY{random.randint(100000, 999999)}"
+            payment_reference = self.supplier_payment_references.next()
             payment_status = random.choice(payment_statuses)
             invoice_number = f"INV-{random.randint(2023000, 2024999)}"
             notes = f"Paper purchase from {supplier_name}"
@@ -2375,6 +2764,12 @@ class PrintingServiceDataGenerator:
             config_id = generate_uuid()
             description = description_map.get(key, f"System configuration for {key.replace('_', ' ')}")
             
+            self.system_configs.append({
+                'config_id': config_id,
+                'config_key': key,
+                'updated_at': updated_at
+            })
+            
             bulk_config.add_row([
                 config_id, key, str(value), description,
                 updated_at.strftime('%Y-%m-%d %H:%M:%S')
@@ -2392,11 +2787,11 @@ class PrintingServiceDataGenerator:
         file_types = self.spec['permitted_extensions']
         
         for file_type in file_types:
-            file_type_id = generate_uuid()
             created_at = random_date_in_range(365, 30)
             
             # Remove dot prefix from extension (e.g., ".pdf" -> "pdf")
             extension = file_type['extension'].lstrip('.').lower()
+            file_type_id = self.reference_id('permitted_file_type', extension)
             
             # Get a staff member for updated_by if available
             updater_staff_id = None
@@ -2417,8 +2812,9 @@ class PrintingServiceDataGenerator:
     def generate_print_jobs(self):
         """Generate realistic print jobs with pages.
 
-        Hard-coded test accounts: exactly 20 jobs each.
-        Other students: random number of jobs based on spec distribution.
+        Every student may print (avg_print_jobs_per_student on average); which students
+        print most and which printers the jobs go to follow the spec's skew section
+        (job_student, job_printer). Test accounts always get a few jobs.
         """
         self.add_sql("\n-- ============================================")
         self.add_sql("-- PRINT JOBS DATA")
@@ -2433,15 +2829,6 @@ class PrintingServiceDataGenerator:
         avg_jobs = self.spec['avg_print_jobs_per_student']
         variance = self.spec['print_job_variance']
         
-        # Distributions
-        file_type_dist = self.spec['file_types']
-        paper_size_dist = self.spec['paper_size_distribution']
-        orientation_dist = self.spec['orientation_distribution']
-        print_side_dist = self.spec['print_side_distribution']
-        color_mode_dist = self.spec['color_mode_distribution']
-        status_dist = self.spec['print_status_distribution']
-        copy_dist = self.spec['copy_distribution']
-        
         # Activity patterns
         hour_patterns = {
             'peak': self.spec['peak_hours'],
@@ -2449,16 +2836,48 @@ class PrintingServiceDataGenerator:
             'low': self.spec['low_hours'],
         }
         
-        # Document templates
-        doc_templates = self.spec['document_name_templates']
-        courses = self.spec['course_names']
-        
-        # Enabled printers only
+        # Enabled printers only; jobs are skewed towards a few hot printers (library printers first)
         enabled_printers = [p for p in self.printers if p['is_enabled']]
+        skew = self.spec.get('skew') or {}
+        library_printers = [index for index, p in enumerate(enabled_printers)
+                            if self.room_by_id[p['room_id']]['template_type'] == 'library']
+        printer_picker = SkewedPicker(enabled_printers, skew.get('job_printer'), preferred=library_printers)
+        self.job_printer_picker = printer_picker
+        
+        bulks = self._print_job_bulks()
+        
+        # Hard-coded test students (guaranteed a few jobs), including the one that never pays
+        test_student_ids = set().union(*self.payment_accounts())
+        
+        # Jobs come from the whole student population: avg_print_jobs_per_student on average,
+        # mostly from a few power users; separately, every test account gets at least MIN_TEST_PRINT_JOBS
+        job_students = list(self.students)
+        total_jobs = round(self.spec.get('avg_print_jobs_per_student', 0) * len(job_students))
+        self.job_student_picker = SkewedPicker(job_students, skew.get('job_student')) if job_students else None
+        job_counts = self.job_student_picker.counts(total_jobs) if job_students else []
+        job_counts = [max(count, MIN_TEST_PRINT_JOBS) if student['student_id'] in test_student_ids else count
+                      for student, count in zip(job_students, job_counts)]
+        
+        for student, num_jobs in zip(job_students, job_counts):
+            for _ in range(num_jobs):
+                # Pick printer
+                printer = printer_picker.pick()
+                
+                # Uploaded and created scattered over the last 6 months (created with the hour patterns)
+                uploaded_created_at = random_epoch_in_range(180, 0)
+                created_ts = random_epoch_with_pattern(180, hour_patterns)
+                self._add_print_job(student, printer, created_ts, uploaded_created_at, bulks)
         
-        # Use actual media files if available
-        use_real_files = len(self.media_files) > 0
+        # Flush SQL (uploaded files, jobs, pages)
+        for bulk in bulks:
+            for stmt in bulk.get_statements():
+                self.add_sql(stmt)
         
+        # Generate payments for completed print jobs
+        self.generate_payments()
+    
+    def _print_job_bulks(self):
+        """BulkInsertHelpers for (uploaded_file, print_job, print_job_page)."""
         # Uploaded files (saved documents)
         bulk_uploaded_files = BulkInsertHelper("uploaded_file", [
             "uploaded_file_id", "student_id", "file_name", "file_type", "file_size_kb", "page_count", "file_url", "created_at"
@@ -2476,267 +2895,251 @@ class PrintingServiceDataGenerator:
         bulk_pages = BulkInsertHelper("print_job_page", [
             "page_record_id", "job_id", "page_number", "is_printed", "printed_at"
         ])
+        return bulk_uploaded_files, bulk_jobs, bulk_pages
+    
+    def _add_print_job(self, student, printer, created_ts, uploaded_created_at, bulks):
+        """Add one print job (with its uploaded file and pages) for a student on a printer.
         
-        # Identify hard-coded test students
-        test_student_emails = [
-            "student.test@edu.vn",
-            "phandienmanhthienk16@siu.edu.vn",
-            "leanhtuank16@siu.edu.vn",
-            "nguyenhongbaongock16@siu.edu.vn",
-            "phanthanhthaituank16@siu.edu.vn",
-            "lengocdangkhoak16@siu.edu.vn",
-            "lyhieuvyk17@siu.edu.vn",
-        ]
-        test_student_ids = set()
-        for email in test_student_emails:
-            user = next((u for u in self.users if u['email'] == email), None)
-            if user:
-                student = next((s for s in self.students if s['user_id'] == user['user_id']), None)
-                if student:
-                    test_student_ids.add(student['student_id'])
-        
-        # ONLY generate jobs for hard-coded test accounts
-        for student in self.students:
-            is_test_account = student['student_id'] in test_student_ids
-            # Skip non-test accounts
-            if not is_test_account:
-                continue
-            
-            # Test accounts get 5-15 jobs each
-            num_jobs = random.randint(5, 15)
-            
-            for _ in range(num_jobs):
-                job_id = generate_uuid()
-                
-                # Pick printer
-                printer = random.choice(enabled_printers)
-                
-                # File info (uploaded_file)
-                file_name = None
-                file_url = None
-                file_size_kb = None
-                file_ext = None
-                
-                if use_real_files and self.media_files:
-                    file_name = random.choice(self.media_files)
-                    file_url = f"{SUPABASE_BASE_URL}/{SUPABASE_BUCKET_PRINT_JOBS}/{file_name}"
-                    file_ext = os.path.splitext(file_name)[1].lstrip('.').lower() or weighted_choice(file_type_dist)
-                    try:
-                        media_path = os.path.join(MEDIA_FOLDER, file_name)
-                        if os.path.exists(media_path):
-                            file_size_kb = max(1, os.path.getsize(media_path) // 1024)
-                        else:
-                            file_size_kb = random.randint(100, 10240)
-                    except Exception:
-                        file_size_kb = random.randint(100, 10240)
-                else:
-                    file_ext = weighted_choice(file_type_dist)
-                    file_name = generate_document_name(doc_templates, courses, f".{file_ext}")
-                    file_url = f"{SUPABASE_BASE_URL}/{SUPABASE_BUCKET_PRINT_JOBS}/{file_name}"
-                    if file_ext == 'pdf':
-                        file_size_kb = random.randint(500, 5000)
-                    elif file_ext in ['jpg', 'png', 'webp']:
-                        file_size_kb = random.randint(200, 2000)
-                    elif file_ext == 'docx':
-                        file_size_kb = random.randint(100, 1000)
-                    elif file_ext in ['xlsx', 'xls']:
-                        file_size_kb = random.randint(50, 500)
-                    elif file_ext == 'pptx':
-                        file_size_kb = random.randint(1000, 10000)
-                    else:
-                        file_size_kb = random.randint(100, 1000)
-                
-                # Calculate number of pages for this document (needed for both uploaded_file and print_job)
-                avg_pages = self.spec['avg_pages_per_document']
-                page_variance = self.spec['pages_variance']
-                min_pages = self.spec['min_pages_per_job']
-                max_pages = self.spec['max_pages_per_job']
-                num_pages = max(min_pages, min(max_pages, int(random.gauss(avg_pages, page_variance))))
-                
-                # Create uploaded_file record
-                uploaded_file_id = generate_uuid()
-                # Uploaded file created_at: scattered randomly in the past (last 6 months)
-                uploaded_created_at = random_date_in_range(180, 0)
-                
-                bulk_uploaded_files.add_row([
-                    uploaded_file_id,
-                    student['student_id'],
-                    file_name,
-                    file_ext,
-                    file_size_kb,
-                    num_pages,  # page_count
-                    file_url,
-                    uploaded_created_at.strftime('%Y-%m-%d %H:%M:%S')
-                ])
-                
-                # Paper size
-                paper_size_name = weighted_choice(paper_size_dist)
-                matching_page_size = next(
-                    (ps for ps in self.page_sizes if ps["size_name"] == paper_size_name),
-                    None
-                )
-                if not matching_page_size:
-                    matching_page_size = next(
-                        (ps for ps in self.page_sizes if ps["size_name"] == "A4"),
-                        self.page_sizes[0] if self.page_sizes else None
-                    )
-                if not matching_page_size:
-                    raise ValueError(f"No page sizes available. Available sizes: {[ps['size_name'] for ps in self.page_sizes]}")
-                
-                paper_size_id = matching_page_size["page_size_id"]
-                matching_page_size_price = next(
-                    (psp for psp in self.page_size_prices if psp['page_size_id'] == paper_size_id),
-                    None
-                )
-                if not matching_page_size_price:
-                    raise ValueError(f"No page_size_price found for page_size_id: {paper_size_id}")
-                page_size_price_id = matching_page_size_price['price_id']
-                
-                # Other settings
-                orientation = weighted_choice(orientation_dist)
-                print_side = weighted_choice(print_side_dist)
-                color_mode_name = weighted_choice(color_mode_dist)
-                num_copies = int(weighted_choice(copy_dist))
-                
-                # Status: 90% completed, 10% other statuses
-                # Allowed values: 'queued', 'printing', 'completed', 'failed', 'cancelled', 'pending_payment'
-                rand_status = random.random()
-                if rand_status < 0.90:
-                    status = 'completed'
-                elif rand_status < 0.92:
-                    status = 'queued'
-                elif rand_status < 0.94:
-                    status = 'printing'
-                elif rand_status < 0.96:
-                    status = 'failed'
-                elif rand_status < 0.98:
-                    status = 'cancelled'
+        created_ts / uploaded_created_at are epoch seconds; bulks is the
+        (uploaded_file, print_job, print_job_page) BulkInsertHelper triple.
+        """
+        bulk_uploaded_files, bulk_jobs, bulk_pages = bulks
+        use_real_files = len(self.media_files) > 0
+        file_type_dist = self.spec['file_types']
+        paper_size_dist = self.spec['paper_size_distribution']
+        orientation_dist = self.spec['orientation_distribution']
+        print_side_dist = self.spec['print_side_distribution']
+        color_mode_dist = self.spec['color_mode_distribution']
+        copy_dist = self.spec['copy_distribution']
+        doc_templates = self.spec['document_name_templates']
+        courses = self.spec['course_names']
+        job_id = generate_uuid()
+        
+        # File info (uploaded_file)
+        file_name = None
+        file_url = None
+        file_size_kb = None
+        file_ext = None
+        
+        if use_real_files and self.media_files:
+            file_name = random.choice(self.media_files)
+            file_url = f"{SUPABASE_BASE_URL}/{SUPABASE_BUCKET_PRINT_JOBS}/{file_name}"
+            file_ext = os.path.splitext(file_name)[1].lstrip('.').lower() or weighted_choice(file_type_dist)
+            try:
+                media_path = os.path.join(MEDIA_FOLDER, file_name)
+                if os.path.exists(media_path):
+                    file_size_kb = max(1, os.path.getsize(media_path) // 1024)
                 else:
-                    status = 'pending_payment'
-                
-                # Color mode price
-                matching_color_mode_price = next(
-                    (cmp for cmp in self.color_mode_prices if cmp['color_mode_name'] == color_mode_name),
-                    None
-                )
-                if not matching_color_mode_price:
-                    raise ValueError(f"No color_mode_price found for color_mode: {color_mode_name}")
-                color_mode_price_id = matching_color_mode_price['setting_id']
-                
-                # Timing: scattered randomly in the past (last 6 months)
-                created_at = random_datetime_with_pattern(180, hour_patterns)
-                start_time = None
-                end_time = None
-                if status in ['completed', 'failed']:
-                    start_time = created_at + timedelta(minutes=random.randint(1, 30))
-                    duration_minutes = random.randint(1, 15)
-                    end_time = start_time + timedelta(minutes=duration_minutes)
-                elif status == 'printing':
-                    start_time = created_at + timedelta(minutes=random.randint(1, 30))
-                
-                # Pages - num_pages was already calculated above for uploaded_file
-                total_pages = num_pages * num_copies
-                
-                # Pricing: base_price * color_multiplier * total_pages
-                base_page_price = matching_page_size_price['page_price']
-                color_multiplier = matching_color_mode_price['price_multiplier']
-                price_per_page = base_page_price * color_multiplier
-                subtotal_before_discount = total_pages * price_per_page
-                
-                page_discount_package_id = None
-                discount_percentage = None
-                for pdp in sorted(self.page_discount_packages, key=lambda x: x.get('min_pages', 0), reverse=True):
-                    if total_pages >= pdp['min_pages']:
-                        page_discount_package_id = pdp['package_id']
-                        discount_percentage = pdp['discount_percentage']
-                        break
-                
-                discount_amount = subtotal_before_discount * (discount_percentage if discount_percentage else 0.0)
-                total_price = subtotal_before_discount - discount_amount
-                
-                # Store job
-                job_data = {
-                    'job_id': job_id,
-                    'student_id': student['student_id'],
-                    'printer_id': printer['printer_id'],
-                    'uploaded_file_id': uploaded_file_id,
-                    'num_pages': num_pages,
-                    'total_pages': total_pages,
-                    'page_size_price_id': page_size_price_id,
-                    'color_mode_price_id': color_mode_price_id,
-                    'page_discount_package_id': page_discount_package_id,
-                    'paper_size_name': matching_page_size['size_name'],
-                    'num_copies': num_copies,
-                    'subtotal_before_discount': subtotal_before_discount,
-                    'discount_percentage': discount_percentage,
-                    'discount_amount': discount_amount,
-                    'total_price': total_price,
-                    'status': status,
-                    'created_at': created_at
-                }
-                self.print_jobs.append(job_data)
-                
-                # Add to bulk insert
-                bulk_jobs.add_row([
-                    job_id, student['student_id'], printer['printer_id'],
-                    uploaded_file_id,
-                    page_size_price_id, color_mode_price_id, page_discount_package_id,
-                    orientation, print_side, num_copies,
-                    total_pages,
-                    int(subtotal_before_discount),
-                    discount_percentage if discount_percentage is not None else None,
-                    int(discount_amount),
-                    int(total_price),
-                    status,
-                    start_time.strftime('%Y-%m-%d %H:%M:%S') if start_time else None,
-                    end_time.strftime('%Y-%m-%d %H:%M:%S') if end_time else None,
-                    created_at.strftime('%Y-%m-%d %H:%M:%S')
-                ])
-                
-                # Pages for this job
-                # Determine which pages are printed based on job status
-                pages_printed = 0
-                if status == 'completed':
-                    pages_printed = num_pages  # All pages printed
-                elif status == 'printing':
-                    # Some pages printed (random between 1 and num_pages-1)
-                    pages_printed = random.randint(1, max(1, num_pages - 1)) if num_pages > 1 else 0
-                # For 'queued', 'failed', 'cancelled': pages_printed = 0
-                
-                for page_num in range(1, num_pages + 1):
-                    page_record_id = generate_uuid()
-                    is_printed = 1 if page_num <= pages_printed else 0
-                    # printed_at is set if page is printed and we have end_time or start_time
-                    printed_at = None
-                    if is_printed:
-                        if end_time:
-                            # Distribute printed_at times between start_time and end_time
-                            if pages_printed > 0:
-                                time_per_page = (end_time - start_time).total_seconds() / pages_printed if start_time and end_time else 0
-                                printed_at = start_time + timedelta(seconds=time_per_page * (page_num - 1)) if start_time else None
-                            else:
-                                printed_at = end_time
-                        elif start_time:
-                            printed_at = start_time
-                    
-                    bulk_pages.add_row([
-                        page_record_id, 
-                        job_id, 
-                        page_num,
-                        1 if is_printed else 0,  # is_printed
-                        printed_at.strftime('%Y-%m-%d %H:%M:%S') if printed_at else None  # printed_at
-                    ])
+                    file_size_kb = random.randint(100, 10240)
+            except Exception:
+                file_size_kb = random.randint(100, 10240)
+        else:
+            file_ext = weighted_choice(file_type_dist)
+            file_name = generate_document_name(doc_templates, courses, f".{file_ext}")
+            file_url = f"{SUPABASE_BASE_URL}/{SUPABASE_BUCKET_PRINT_JOBS}/{file_name}"
+            if file_ext == 'pdf':
+                file_size_kb = random.randint(500, 5000)
+            elif file_ext in ['jpg', 'png', 'webp']:
+                file_size_kb = random.randint(200, 2000)
+            elif file_ext == 'docx':
+                file_size_kb = random.randint(100, 1000)
+            elif file_ext in ['xlsx', 'xls']:
+                file_size_kb = random.randint(50, 500)
+            elif file_ext == 'pptx':
+                file_size_kb = random.randint(1000, 10000)
+            else:
+                file_size_kb = random.randint(100, 1000)
+        
+        # Calculate number of pages for this document (needed for both uploaded_file and print_job)
+        avg_pages = self.spec['avg_pages_per_document']
+        page_variance = self.spec['pages_variance']
+        min_pages = self.spec['min_pages_per_job']
+        max_pages = self.spec['max_pages_per_job']
+        num_pages = max(min_pages, min(max_pages, int(random.gauss(avg_pages, page_variance))))
+        
+        # Create uploaded_file record
+        uploaded_file_id = generate_uuid()
+        
+        bulk_uploaded_files.add_row([
+            uploaded_file_id,
+            student['student_id'],
+            file_name,
+            file_ext,
+            file_size_kb,
+            num_pages,  # page_count
+            file_url,
+            format_datetime(uploaded_created_at)
+        ])
         
-        # Flush SQL
-        for stmt in bulk_uploaded_files.get_statements():
-            self.add_sql(stmt)
-        for stmt in bulk_jobs.get_statements():
-            self.add_sql(stmt)
-        for stmt in bulk_pages.get_statements():
-            self.add_sql(stmt)
+        # Paper size
+        paper_size_name = weighted_choice(paper_size_dist)
+        matching_page_size = next(
+            (ps for ps in self.page_sizes if ps["size_name"] == paper_size_name),
+            None
+        )
+        if not matching_page_size:
+            matching_page_size = next(
+                (ps for ps in self.page_sizes if ps["size_name"] == "A4"),
+                self.page_sizes[0] if self.page_sizes else None
+            )
+        if not matching_page_size:
+            raise ValueError(f"No page sizes available. Available sizes: {[ps['size_name'] for ps in self.page_sizes]}")
+        
+        paper_size_id = matching_page_size["page_size_id"]
+        matching_page_size_price = next(
+            (psp for psp in self.page_size_prices if psp['page_size_id'] == paper_size_id),
+            None
+        )
+        if not matching_page_size_price:
+            raise ValueError(f"No page_size_price found for page_size_id: {paper_size_id}")
+        page_size_price_id = matching_page_size_price['price_id']
+        
+        # Other settings
+        orientation = weighted_choice(orientation_dist)
+        print_side = weighted_choice(print_side_dist)
+        color_mode_name = weighted_choice(color_mode_dist)
+        num_copies = int(weighted_choice(copy_dist))
+        
+        # Status: 90% completed, 10% other statuses
+        # Allowed values: 'queued', 'printing', 'completed', 'failed', 'cancelled', 'pending_payment'
+        rand_status = random.random()
+        if rand_status < 0.90:
+            status = 'completed'
+        elif rand_status < 0.92:
+            status = 'queued'
+        elif rand_status < 0.94:
+            status = 'printing'
+        elif rand_status < 0.96:
+            status = 'failed'
+        elif rand_status < 0.98:
+            status = 'cancelled'
+        else:
+            status = 'pending_payment'
+        
+        # Color mode price
+        matching_color_mode_price = next(
+            (cmp for cmp in self.color_mode_prices if cmp['color_mode_name'] == color_mode_name),
+            None
+        )
+        if not matching_color_mode_price:
+            raise ValueError(f"No color_mode_price found for color_mode: {color_mode_name}")
+        color_mode_price_id = matching_color_mode_price['setting_id']
+        
+        # Timing (epoch seconds): printing starts shortly after the job is created,
+        # never after the as-of instant (a delta's window end)
+        start_ts = None
+        end_ts = None
+        if status in ['completed', 'failed']:
+            start_ts = cap_at_as_of(created_ts + random.randint(1, 30) * SECONDS_PER_MINUTE)
+            duration_minutes = random.randint(1, 15)
+            end_ts = cap_at_as_of(start_ts + duration_minutes * SECONDS_PER_MINUTE)
+        elif status == 'printing':
+            start_ts = cap_at_as_of(created_ts + random.randint(1, 30) * SECONDS_PER_MINUTE)
+        
+        # Pages - num_pages was already calculated above for uploaded_file
+        total_pages = num_pages * num_copies
+        
+        # Pricing: base_price * color_multiplier * total_pages
+        base_page_price = matching_page_size_price['page_price']
+        color_multiplier = matching_color_mode_price['price_multiplier']
+        price_per_page = base_page_price * color_multiplier
+        subtotal_before_discount = total_pages * price_per_page
+        
+        page_discount_package_id = None
+        discount_percentage = None
+        for pdp in sorted(self.page_discount_packages, key=lambda x: x.get('min_pages', 0), reverse=True):
+            if total_pages >= pdp['min_pages']:
+                page_discount_package_id = pdp['package_id']
+                discount_percentage = pdp['discount_percentage']
+                break
         
-        # Generate payments for completed print jobs
-        self.generate_payments()
+        discount_amount = subtotal_before_discount * (discount_percentage if discount_percentage else 0.0)
+        total_price = subtotal_before_discount - discount_amount
+        
+        # Store job
+        job_data = {
+            'job_id': job_id,
+            'student_id': student['student_id'],
+            'printer_id': printer['printer_id'],
+            'uploaded_file_id': uploaded_file_id,
+            'num_pages': num_pages,
+            'total_pages': total_pages,
+            'page_size_price_id': page_size_price_id,
+            'color_mode_price_id': color_mode_price_id,
+            'page_discount_package_id': page_discount_package_id,
+            'paper_size_name': matching_page_size['size_name'],
+            'num_copies': num_copies,
+            'subtotal_before_discount': subtotal_before_discount,
+            'discount_percentage': discount_percentage,
+            'discount_amount': discount_amount,
+            'total_price': total_price,
+            'status': status,
+            'created_at': created_ts  # epoch seconds
+        }
+        self.print_jobs.append(job_data)
+        
+        # Add to bulk insert
+        bulk_jobs.add_row([
+            job_id, student['student_id'], printer['printer_id'],
+            uploaded_file_id,
+            page_size_price_id, color_mode_price_id, page_discount_package_id,
+            orientation, print_side, num_copies,
+            total_pages,
+            int(subtotal_before_discount),
+            discount_percentage if discount_percentage is not None else None,
+            int(discount_amount),
+            int(total_price),
+            status,
+            format_datetime(start_ts),
+            format_datetime(end_ts),
+            format_datetime(created_ts)
+        ])
+        
+        # Pages for this job
+        # Determine which pages are printed based on job status
+        pages_printed = 0
+        if status == 'completed':
+            pages_printed = num_pages  # All pages printed
+        elif status == 'printing':
+            # Some pages printed (random between 1 and num_pages-1)
+            pages_printed = random.randint(1, max(1, num_pages - 1)) if num_pages > 1 else 0
+        # For 'queued', 'failed', 'cancelled': pages_printed = 0
+        
+        # printed_at for the printed prefix of pages:
+        # spread between start_time and end_time when the job finished, else start_time
+        printed_at_values = []
+        if pages_printed > 0 and start_ts is not None:
+            if end_ts is not None:
+                printed_at_values = [format_datetime(ts) for ts in spread_epochs(start_ts, end_ts, pages_printed)]
+            else:
+                printed_at_values = [format_datetime(start_ts)] * pages_printed
+        
+        for page_num in range(1, num_pages + 1):
+            page_record_id = generate_uuid()
+            is_printed = page_num <= pages_printed
+        
+            bulk_pages.add_row([
+                page_record_id, 
+                job_id, 
+                page_num,
+                1 if is_printed else 0,  # is_printed
+                printed_at_values[page_num - 1] if page_num <= len(printed_at_values) else None  # printed_at
+            ])
+    
+    def payment_accounts(self):
+        """(student ids that never pay, test student ids whose jobs are always paid)."""
+        if self.delta_payment_accounts is not None:
+            return self.delta_payment_accounts
+        email_by_user_id = {u['user_id']: u['email'] for u in self.users}
+        no_payment_student_ids = set()
+        test_student_ids = set()
+        for student in self.students:
+            email = email_by_user_id.get(student['user_id'])
+            if email in NO_PAYMENT_EMAILS:
+                no_payment_student_ids.add(student['student_id'])
+            elif email in TEST_STUDENT_EMAILS:
+                test_student_ids.add(student['student_id'])
+        return no_payment_student_ids, test_student_ids
     
     def generate_payments(self):
         """Generate payment records for print jobs."""
@@ -2774,48 +3177,24 @@ class PrintingServiceDataGenerator:
             if pdp.get('is_active', True):
                 page_discount_map[pdp['package_id']] = pdp['discount_percentage']
         
-        # Use pre-calculated balance map from deposit generation
-        # This includes deposits and semester bonuses, but not payments yet
-        student_balance_map = getattr(self, 'student_balance_map', {}).copy()
+        # Running wallet balances: the balance map from deposit generation (deposits and
+        # semester bonuses, no payments yet), or a snapshot's balances in delta mode
+        if self.student_balances is None:
+            self.student_balances = dict(getattr(self, 'student_balance_map', {}))
+        student_balance_map = self.student_balances
+        
+        # Test account jobs always get (completed) payments; leanhtuank16 is excluded from payments
+        no_payment_student_ids, test_student_ids = self.payment_accounts()
         
         # Generate payments only for completed print jobs
         for job in self.print_jobs:
-            # Only create payment for completed jobs
-            job_record = next((j for j in self.print_jobs if j.get('job_id') == job.get('job_id')), None)
-            if not job_record:
-                continue
-            
-            # Check if this is a test account job
-            # NOTE: leanhtuank16@siu.edu.vn is excluded from payments
             student_id = job['student_id']
             
-            # Identify leanhtuank16 account to exclude from payments
-            leanhtuan_email = "leanhtuank16@siu.edu.vn"
-            leanhtuan_student_id = None
-            leanhtuan_user = next((u for u in self.users if u['email'] == leanhtuan_email), None)
-            if leanhtuan_user:
-                leanhtuan_student = next((s for s in self.students if s['user_id'] == leanhtuan_user['user_id']), None)
-                if leanhtuan_student:
-                    leanhtuan_student_id = leanhtuan_student['student_id']
-            
             # Skip payments for leanhtuank16 account
-            if student_id == leanhtuan_student_id:
+            if student_id in no_payment_student_ids:
                 continue
             
-            is_test_account = False
-            test_student_emails = [
-                "student.test@edu.vn",
-                "phandienmanhthienk16@siu.edu.vn",
-                "nguyenhongbaongock16@siu.edu.vn",
-                "phanthanhthaituank16@siu.edu.vn",
-                "lengocdangkhoak16@siu.edu.vn",
-                "lyhieuvyk17@siu.edu.vn",
-            ]
-            student = next((s for s in self.students if s['student_id'] == student_id), None)
-            if student:
-                user = next((u for u in self.users if u['user_id'] == student['user_id']), None)
-                if user and user['email'] in test_student_emails:
-                    is_test_account = True
+            is_test_account = student_id in test_student_ids
             
             # Test account jobs always get payments, regular jobs 90% get payments
             if not is_test_account and random.random() > 0.9:
@@ -2843,21 +3222,18 @@ class PrintingServiceDataGenerator:
             else:
                 method = random.choice(payment_methods)
             
-            payment_reference = f"PAY-{random.randint(100000, 999999)}"
+            payment_reference = self.payment_references.next()
             # Test account payments always completed, regular payments 95% completed
             payment_status = 'completed' if is_test_account else ('completed' if random.random() < 0.95 else 'pending')
             
             # Transaction date should match or be slightly after job creation
-            job_created_at = job.get('created_at')
-            if isinstance(job_created_at, str):
-                job_created_at = datetime.strptime(job_created_at, '%Y-%m-%d %H:%M:%S')
-            elif isinstance(job_created_at, datetime):
-                pass
-            else:
-                job_created_at = random_date_in_range(180, 0)
+            job_created_at = to_epoch(job.get('created_at'))
+            if job_created_at is None:
+                job_created_at = random_epoch_in_range(180, 0)
             
-            # Payment happens at or slightly after job creation (0-2 hours later)
-            transaction_date = job_created_at + timedelta(minutes=random.randint(0, 120))
+            # Payment happens at or slightly after job creation (0-2 hours later, but not after
+            # the as-of instant), as epoch seconds
+            transaction_date = cap_at_as_of(job_created_at + random.randint(0, 120) * SECONDS_PER_MINUTE)
             
             self.payments.append({
                 'payment_id': payment_id,
@@ -2880,7 +3256,7 @@ class PrintingServiceDataGenerator:
                 method,
                 payment_reference,
                 payment_status,
-                transaction_date.strftime('%Y-%m-%d %H:%M:%S')
+                format_datetime(transaction_date)
             ])
         
         for stmt in bulk_payments.get_statements():
@@ -2912,9 +3288,8 @@ class PrintingServiceDataGenerator:
             deposit_amount = deposit['deposit_amount']
             bonus_amount = deposit.get('bonus_amount', 0.0)
             total_credited = deposit.get('total_credited', deposit_amount + bonus_amount)
-            transaction_date = deposit.get('transaction_date')
-            if isinstance(transaction_date, str):
-                transaction_date = datetime.strptime(transaction_date, '%Y-%m-%d %H:%M:%S')
+            # Formatted once, shared by the deposit and bonus entries
+            transaction_date = format_datetime(to_epoch(deposit.get('transaction_date')) or as_of())
             
             # Entry for deposit amount (IN)
             if deposit_amount > 0:
@@ -2928,7 +3303,7 @@ class PrintingServiceDataGenerator:
                     'deposit',
                     deposit_id,
                     f"Nạp tiền: ${deposit_amount:.2f}",
-                    transaction_date.strftime('%Y-%m-%d %H:%M:%S') if transaction_date else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    transaction_date
                 ])
             
             # Entry for bonus amount (IN)
@@ -2943,7 +3318,7 @@ class PrintingServiceDataGenerator:
                     'deposit',
                     deposit_id,
                     f"Bonus nạp tiền: ${bonus_amount:.2f}",
-                    transaction_date.strftime('%Y-%m-%d %H:%M:%S') if transaction_date else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    transaction_date
                 ])
         
         # 2. Ledger entries for SEMESTER BONUSES
@@ -2958,13 +3333,7 @@ class PrintingServiceDataGenerator:
                 continue
             
             bonus_amount = semester_bonus['bonus_amount']
-            received_date = ssb.get('received_date')
-            if isinstance(received_date, str):
-                received_date = datetime.strptime(received_date, '%Y-%m-%d')
-            elif received_date:
-                received_date = datetime.combine(received_date, datetime.min.time())
-            else:
-                received_date = datetime.now()
+            received_date = to_epoch(ssb.get('received_date')) or as_of()
             
             ledger_id = generate_uuid()
             bulk_ledger.add_row([
@@ -2976,7 +3345,7 @@ class PrintingServiceDataGenerator:
                 'student_semester_bonus',
                 student_bonus_id,
                 f"Bonus học kỳ: ${bonus_amount:.2f}",
-                received_date.strftime('%Y-%m-%d %H:%M:%S')
+                format_datetime(received_date)
             ])
         
         # 3. Ledger entries for PAYMENTS (only amount_paid_from_balance)
@@ -2989,11 +3358,7 @@ class PrintingServiceDataGenerator:
             amount_paid_from_balance = payment.get('amount_paid_from_balance', 0.0)
             
             if amount_paid_from_balance > 0:
-                transaction_date = payment.get('transaction_date')
-                if isinstance(transaction_date, str):
-                    transaction_date = datetime.strptime(transaction_date, '%Y-%m-%d %H:%M:%S')
-                elif not transaction_date:
-                    transaction_date = datetime.now()
+                transaction_date = to_epoch(payment.get('transaction_date')) or as_of()
                 
                 ledger_id = generate_uuid()
                 bulk_ledger.add_row([
@@ -3005,7 +3370,7 @@ class PrintingServiceDataGenerator:
                     'payment',
                     payment_id,
                     f"Thanh toán in ấn: ${amount_paid_from_balance:.2f}",
-                    transaction_date.strftime('%Y-%m-%d %H:%M:%S')
+                    format_datetime(transaction_date)
                 ])
         
         # 4. Ledger entries for REFUNDS (if any exist)
@@ -3016,8 +3381,19 @@ class PrintingServiceDataGenerator:
         for stmt in bulk_ledger.get_statements():
             self.add_sql(stmt)
     
-    def generate_activity_logs(self):
-        """Generate printer logs for the printer_log table."""
+    def generate_activity_logs(self, since=None):
+        """Generate printer logs for the printer_log table.
+        
+        Each printer's log is the state-change series of its simulated state chain
+        (print sessions, error bursts, maintenance; see printer_states.py) over
+        days_of_data, ending in the printer's current status. Every real print job
+        adds a linked print_job entry, and configuration/admin actions are spread
+        over the period at the configured yearly rate.
+        
+        With `since` (delta mode) the chains instead continue from each printer's
+        snapshot state over (since, as-of]; errors left open by the snapshot that get
+        resolved, and printers whose status changes, are updated in place.
+        """
         self.add_sql("\n-- ============================================")
         self.add_sql("-- PRINTER LOGS DATA")
         self.add_sql("-- ============================================")
@@ -3028,181 +3404,211 @@ class PrintingServiceDataGenerator:
             "resolved_at", "resolved_by", "resolution_notes", "ip_address", "created_at"
         ])
         
-        log_types = ['print_job', 'error', 'maintenance', 'status_change', 'configuration', 'admin_action']
-        severities = ['info', 'warning', 'error', 'critical']
+        config = printer_log_config(self.spec)
+        end_ts = as_of()
+        period_start = end_ts - self.spec.get('days_of_data', 365) * SECONDS_PER_DAY
+        staff_user_ids = [staff_member['user_id'] for staff_member in self.staff]
         
-        # Generate logs for each printer
+        def staff_user():
+            return random.choice(staff_user_ids) if staff_user_ids else None
+        
+        def ip_address():
+            return f"{random.randint(192, 255)}.{random.randint(168, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}"
+        
+        # Location of each printer for the details JSON (kept on the printer for the snapshot)
+        building_by_id = {b['building_id']: b for b in self.buildings}
         for printer in self.printers:
-            # Each printer has 5-15 logs
-            num_logs = random.randint(5, 15)
-            
-            # Look up room, floor, and building information
-            room = next((r for r in self.rooms if r['room_id'] == printer['room_id']), None)
-            floor = None
-            building = None
-            if room:
-                floor = next((f for f in self.floors if f['floor_id'] == room['floor_id']), None)
-                if floor:
-                    building = next((b for b in self.buildings if b['building_id'] == floor['building_id']), None)
-            
+            if 'location' in printer:
+                continue
+            room = self.room_by_id.get(printer['room_id'])
+            floor = self.floor_by_id.get(room['floor_id']) if room else None
+            building = building_by_id.get(floor['building_id']) if floor else None
             building_name = building['building_name'] if building else 'Unknown Building'
             room_code = room['room_code'] if room else 'Unknown Room'
+            printer['location'] = f"{building_name} Room {room_code}"
+        
+        # 1. State chain: one row per state change (the end of a print session is not logged)
+        if since is None:
+            starts = [max(period_start, to_epoch(printer['installed_date'])) for printer in self.printers]
+            final_states = [final_state_of(printer['status'], printer['printing_status']) for printer in self.printers]
+            initial_states = None
+        else:
+            starts = [since] * len(self.printers)
+            final_states = None
+            initial_states = [tuple(printer['chain_state']) for printer in self.printers]
+        events = simulate_printer_states(starts, end_ts, final_states, config,
+                                         batch_rng() if NUMPY_AVAILABLE else None, initial_states)
+        created_ats = format_datetimes(events['time'])
+        resolved_open_errors = []   # (log_id, resolved_at, resolved_by, note) for errors a snapshot left open
+        
+        maintenance_actions = [
+            "Scheduled maintenance performed",
+            "Toner cartridge replaced",
+            "Paper tray refilled",
+            "Cleaning cycle completed",
+            "Firmware update installed",
+            "Calibration completed"
+        ]
+        
+        for printer_index, ts, from_state, to_state, error_code, resolved_at, created_at in zip(
+                events['printer'], events['time'], events['from_state'], events['to_state'],
+                events['error_code'], events['resolved_at'], created_ats):
+            printer = self.printers[printer_index]
+            if from_state == ERROR and printer.get('open_error_log_id'):
+                # The error still open at the snapshot is resolved by this transition
+                resolved_open_errors.append((printer['open_error_log_id'], ts, staff_user(),
+                                             ERROR_CODES[printer['chain_state'][1]][3]))
+                printer['open_error_log_id'] = None
+            if (from_state, to_state) in SILENT_TRANSITIONS:
+                continue
+            log_id = generate_uuid()
+            location = printer['location']
+            severity = 'info'
+            user_id = None
+            details = None
+            is_resolved = 0
+            resolved_by = None
+            resolution_notes = None
+            ip = None
             
-            # Get print jobs for this printer
-            printer_jobs = [job for job in self.print_jobs if job.get('printer_id') == printer['printer_id']]
-            
-            for _ in range(num_logs):
-                log_id = generate_uuid()
-                log_type = random.choice(log_types)
-                
-                # Determine severity based on log type
-                if log_type == 'error':
-                    severity = random.choice(['error', 'critical'])
-                elif log_type == 'maintenance':
-                    severity = random.choice(['info', 'warning'])
-                elif log_type == 'print_job':
-                    severity = 'info'
-                else:
-                    severity = random.choice(severities)
-                
-                # Generate description based on log type
-                job_id = None
-                user_id = None
-                error_code = None
-                details = None
-                description = ""
-                
-                if log_type == 'print_job':
-                    # Link to an actual print job if available
-                    if printer_jobs and random.random() < 0.7:  # 70% chance to link to real job
-                        job = random.choice(printer_jobs)
-                        job_id = job['job_id']
-                        # Get student for this job
-                        student = next((s for s in self.students if s['student_id'] == job['student_id']), None)
-                        if student:
-                            user_id = student['user_id']
-                        num_pages = job.get('num_pages', 1)
-                        description = f"Print job submitted: {num_pages} page(s)"
-                    else:
-                        description = "Print job queued successfully"
-                    severity = 'info'
-                
-                elif log_type == 'error':
-                    error_types = [
-                        ('PAPER_JAM', 'Paper jam detected in paper path'),
-                        ('OUT_OF_TONER', 'Toner cartridge is empty'),
-                        ('LOW_TONER', 'Toner level is low'),
-                        ('OUT_OF_PAPER', 'Paper tray is empty'),
-                        ('DOOR_OPEN', 'Printer door is open'),
-                        ('NETWORK_ERROR', 'Network connection lost'),
-                        ('OFFLINE', 'Printer went offline'),
-                        ('HARDWARE_ERROR', 'Hardware malfunction detected')
-                    ]
-                    error_code, error_desc = random.choice(error_types)
-                    description = error_desc
-                    details = f'{{"error_type": "{error_code}", "location": "{building_name} Room {room_code}"}}'
-                
-                elif log_type == 'maintenance':
-                    maintenance_actions = [
-                        "Scheduled maintenance performed",
-                        "Toner cartridge replaced",
-                        "Paper tray refilled",
-                        "Cleaning cycle completed",
-                        "Firmware update installed",
-                        "Calibration completed"
-                    ]
-                    description = random.choice(maintenance_actions)
-                    # Maintenance logs are usually performed by staff
-                    staff_member = random.choice(self.staff) if self.staff else None
-                    if staff_member:
-                        user_id = staff_member['user_id']
-                    details = f'{{"maintenance_type": "routine", "location": "{building_name} Room {room_code}"}}'
-                
-                elif log_type == 'status_change':
-                    status_changes = [
-                        "Printer status changed to idle",
-                        "Printer enabled for student use",
-                        "Printer disabled for maintenance",
-                        "Printer status changed to printing",
-                        "Printer status changed to maintained"
-                    ]
-                    description = random.choice(status_changes)
-                    # Status changes can be by staff or system
-                    if random.random() < 0.6:  # 60% by staff
-                        staff_member = random.choice(self.staff) if self.staff else None
-                        if staff_member:
-                            user_id = staff_member['user_id']
-                
-                elif log_type == 'configuration':
-                    config_changes = [
-                        "Printer network settings updated",
-                        "Default paper size changed",
-                        "Print quality settings adjusted",
-                        "Printer name updated",
-                        "Access permissions modified"
-                    ]
-                    description = random.choice(config_changes)
-                    # Configuration changes are always by staff
-                    staff_member = random.choice(self.staff) if self.staff else None
-                    if staff_member:
-                        user_id = staff_member['user_id']
-                
-                elif log_type == 'admin_action':
-                    admin_actions = [
-                        "Printer added to system",
-                        "Printer removed from system",
-                        "Printer location updated",
-                        "Printer model information updated",
-                        "Printer access logs reviewed"
-                    ]
-                    description = random.choice(admin_actions)
-                    # Admin actions are always by staff
-                    staff_member = random.choice(self.staff) if self.staff else None
-                    if staff_member:
-                        user_id = staff_member['user_id']
-                
-                # Generate resolution info for errors
-                is_resolved = 0
-                resolved_at = None
-                resolved_by = None
-                resolution_notes = None
-                
-                if log_type == 'error' and random.random() < 0.6:  # 60% of errors are resolved
+            if to_state == PRINTING:
+                log_type = 'print_job'
+                description = "Print job queued successfully"
+                if random.random() < 0.7:
+                    ip = ip_address()
+            elif to_state == ERROR:
+                log_type = 'error'
+                severity, _, description, note = ERROR_CODES[error_code]
+                details = f'{{"error_type": "{error_code}", "location": "{location}"}}'
+                if resolved_at is not None:
                     is_resolved = 1
-                    created_at = random_date_in_range(365, 7)
-                    resolved_at = created_at + timedelta(hours=random.randint(1, 48))
-                    staff_member = random.choice(self.staff) if self.staff else None
-                    if staff_member:
-                        resolved_by = staff_member['user_id']
-                    resolution_notes = random.choice([
-                        "Issue resolved by clearing paper jam",
-                        "Toner cartridge replaced",
-                        "Paper tray refilled",
-                        "Network connection restored",
-                        "Hardware reset performed",
-                        "Issue resolved after maintenance"
-                    ])
+                    resolved_by = staff_user()
+                    resolution_notes = note
                 else:
-                    created_at = random_date_in_range(365, 0)
-                
-                # Generate IP address (some logs have it, some don't)
-                ip_address = None
-                if log_type in ['print_job', 'admin_action', 'configuration'] and random.random() < 0.7:
-                    ip_address = f"{random.randint(192, 255)}.{random.randint(168, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}"
-                
-                bulk.add_row([
-                    log_id, printer['printer_id'], log_type, severity, description,
-                    job_id, user_id, details, error_code, is_resolved,
-                    resolved_at.strftime('%Y-%m-%d %H:%M:%S') if resolved_at else None,
-                    resolved_by, resolution_notes, ip_address,
-                    created_at.strftime('%Y-%m-%d %H:%M:%S')
-                ])
+                    printer['open_error_log_id'] = log_id
+            elif to_state == MAINTAINED:
+                log_type = 'maintenance'
+                # Maintenance after an error is a repair visit
+                severity = 'warning' if from_state == ERROR else 'info'
+                description = random.choice(maintenance_actions)
+                user_id = staff_user()
+                maintenance_type = 'repair' if from_state == ERROR else 'routine'
+                details = f'{{"maintenance_type": "{maintenance_type}", "location": "{location}"}}'
+            else:
+                log_type = 'status_change'
+                if to_state == RECOVERING:
+                    description = "Printer status changed to printing"
+                elif to_state == UNPLUGGED:
+                    severity = 'warning'
+                    description = "Printer disabled for maintenance"
+                elif from_state == UNPLUGGED:
+                    description = "Printer enabled for student use"
+                else:
+                    description = "Printer status changed to idle"
+                # Status changes can be by staff or system
+                if random.random() < 0.6:  # 60% by staff
+                    user_id = staff_user()
+            
+            bulk.add_row([
+                log_id, printer['printer_id'], log_type, severity, description,
+                None, user_id, details, error_code, is_resolved,
+                format_datetime(resolved_at) if resolved_at is not None else None,
+                resolved_by, resolution_notes, ip, created_at
+            ])
+        
+        # 2. Real print jobs, linked to the job and its student
+        for job in self.print_jobs:
+            if not job.get('printer_id'):
+                continue
+            student = self.student_by_id.get(job['student_id'])
+            bulk.add_row([
+                generate_uuid(), job['printer_id'], 'print_job', 'info',
+                f"Print job submitted: {job.get('num_pages', 1)} page(s)",
+                job['job_id'], student['user_id'] if student else None, None, None, 0,
+                None, None, None, ip_address() if random.random() < 0.7 else None,
+                format_datetime(job['created_at'])
+            ])
+        
+        # 3. Configuration and admin actions (always by staff), a Poisson stream per printer
+        admin_actions = {
+            'configuration': [
+                "Printer network settings updated",
+                "Default paper size changed",
+                "Print quality settings adjusted",
+                "Printer name updated",
+                "Access permissions modified"
+            ],
+            'admin_action': [
+                "Printer location updated",
+                "Printer model information updated",
+                "Printer access logs reviewed"
+            ],
+        }
+        actions_per_second = config['admin_actions_per_year'] / (365 * SECONDS_PER_DAY)
+        if actions_per_second > 0:
+            for printer, start_ts in zip(self.printers, starts):
+                ts = start_ts + random.expovariate(actions_per_second)
+                while ts < end_ts:
+                    log_type = random.choice(list(admin_actions))
+                    bulk.add_row([
+                        generate_uuid(), printer['printer_id'], log_type, random.choice(['info', 'warning']),
+                        random.choice(admin_actions[log_type]),
+                        None, staff_user(), None, None, 0,
+                        None, None, None, ip_address() if random.random() < 0.7 else None,
+                        format_datetime(int(ts))
+                    ])
+                    ts += random.expovariate(actions_per_second)
         
         for stmt in bulk.get_statements():
             self.add_sql(stmt)
+        
+        # Delta mode: bring rows written by earlier runs up to date
+        for log_id, resolved_ts, resolved_by, note in resolved_open_errors:
+            self.add_sql(f"UPDATE printer_log SET is_resolved = 1, resolved_at = {sql_literal(format_datetime(resolved_ts))}, "
+                         f"resolved_by = {sql_literal(resolved_by)}, resolution_notes = {sql_literal(note)} "
+                         f"WHERE log_id = {sql_literal(log_id)};")
+        for printer, final_state in zip(self.printers, events['final_states']):
+            if since is not None and tuple(printer['chain_state']) != final_state:
+                status, printing_status = physical_status(*final_state)
+                printer['status'], printer['printing_status'] = status, printing_status
+                self.add_sql(f"UPDATE printer_physical SET status = {sql_literal(status)}, "
+                             f"printing_status = {sql_literal(printing_status)}, updated_at = {sql_literal(format_datetime(end_ts))} "
+                             f"WHERE printer_id = {sql_literal(printer['printer_id'])};")
+            printer['chain_state'] = list(final_state)
+    
+    def _audit_record_sources(self):
+        """Describe the real entity records that audit events point at.
+        
+        Returns a list of (table_name, records, id_key, owner_user_id_fn, created_at_key).
+        Records are iterated lazily so the audit stream never copies entity lists.
+        """
+        def student_user_id(record):
+            student = self.student_by_id.get(record.get('student_id'))
+            return student['user_id'] if student else None
+        
+        return [
+            ('user', self.users, 'user_id', lambda r: r['user_id'], 'created_at'),
+            ('student', self.students, 'student_id', lambda r: r['user_id'], 'enrollment_date'),
+            ('staff', self.staff, 'staff_id', lambda r: r['user_id'], 'hire_date'),
+            ('print_job', self.print_jobs, 'job_id', student_user_id, 'created_at'),
+            ('deposit', self.deposits, 'deposit_id', student_user_id, 'transaction_date'),
+            ('payment', self.payments, 'payment_id', student_user_id, 'transaction_date'),
+            ('printer_physical', self.printers, 'printer_id', lambda r: None, None),
+            ('system_configuration', self.system_configs, 'config_id', lambda r: None, 'updated_at'),
+        ]
     
     def generate_audit_logs(self):
-        """Generate system audit logs."""
+        """Generate system audit logs as per-record audit trails (linked lists via previous_audit_id).
+        
+        Every audit row references a real entity id (record_id) and links to the
+        previous audit row of the same record via previous_audit_id, so trail
+        traversal queries exercise idx_record_id and idx_previous_audit.
+        
+        Volume: num_audit_logs from spec if set, otherwise
+        system_audit_rate * audit_actions_per_record * number of audited records.
+        Rows are streamed through a bulk helper sink, so memory stays bounded to a
+        single INSERT batch regardless of volume.
+        """
         self.add_sql("\n-- ============================================")
         self.add_sql("-- SYSTEM AUDIT LOGS DATA")
         self.add_sql("-- ============================================")
@@ -3211,10 +3617,7 @@ class PrintingServiceDataGenerator:
             "audit_id", "user_id", "action_type", "table_name", "record_id",
             "previous_audit_id", "changed_field", "ip_address", "user_agent",
             "action_timestamp"
-        ])
-        
-        tables = ['user', 'student', 'staff', 'print_job', 'system_configuration']
-        actions = ['INSERT', 'UPDATE', 'DELETE', 'SELECT']
+        ], sink=self.add_sql)
         
         # Sample user agents
         user_agents = [
@@ -3223,32 +3626,100 @@ class PrintingServiceDataGenerator:
             "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36"
         ]
         
-        # Generate sample audit logs (limited number for performance)
-        num_audit_logs = 1000
+        # Fields that UPDATE events report as changed, per audited table
+        changed_fields = {
+            'user': ['phone_number', 'address', 'profile_picture', 'last_login_at'],
+            'student': ['class_id', 'status'],
+            'staff': ['position'],
+            'print_job': ['print_status'],
+            'deposit': ['payment_status'],
+            'payment': ['payment_status'],
+            'printer_physical': ['status', 'is_enabled', 'printing_status'],
+            'system_configuration': ['config_value']
+        }
         
-        for _ in range(num_audit_logs):
-            audit_id = generate_uuid()
-            user = random.choice(self.users)
-            action = random.choice(actions)
-            table = random.choice(tables)
-            record_id = generate_uuid()
-            
-            # Generate fake IP address
-            ip = f"{random.randint(192, 255)}.{random.randint(168, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}"
-            user_agent = random.choice(user_agents)
-            timestamp = random_date_in_range(365, 0)
-            
-            # Simple changed field JSON
-            changed_field = '{"status": "updated"}' if action == 'UPDATE' else None
-            
-            bulk.add_row([
-                audit_id, user['user_id'], action, table, record_id,
-                None, changed_field, ip, user_agent,
-                timestamp.strftime('%Y-%m-%d %H:%M:%S')
-            ])
+        sources = self._audit_record_sources()
+        num_records = sum(len(records) for _, records, _, _, _ in sources)
+        staff_user_ids = [s['user_id'] for s in self.staff] or [u['user_id'] for u in self.users]
+        if num_records == 0 or not staff_user_ids:
+            return
         
-        for stmt in bulk.get_statements():
-            self.add_sql(stmt)
+        # Volume sized from spec
+        num_audit_logs = self.spec.get('num_audit_logs')
+        if num_audit_logs is None:
+            audit_rate = self.spec.get('system_audit_rate', 0.3)
+            actions_per_record = self.spec.get('audit_actions_per_record', 4)
+            num_audit_logs = int(round(audit_rate * actions_per_record * num_records))
+        num_audit_logs = int(num_audit_logs)
+        
+        print(f"  Streaming {num_audit_logs:,} audit rows across {num_records:,} records...")
+        
+        # Trail lengths are skewed (exponential weights) but sum exactly to num_audit_logs.
+        # Weights come from a dedicated RNG that is replayed, so no per-record list is kept.
+        weight_seed = random.getrandbits(64)
+        weight_rng = random.Random(weight_seed)
+        total_weight = sum(weight_rng.expovariate(1.0) for _ in range(num_records))
+        weight_rng = random.Random(weight_seed)
+        
+        now = as_of()
+        window_start = now - 365 * SECONDS_PER_DAY
+        
+        cumulative_weight = 0.0
+        allocated = 0
+        emitted = 0
+        
+        for table_name, records, id_key, owner_user_id, created_at_key in sources:
+            fields = changed_fields.get(table_name, ['status'])
+            for record in records:
+                cumulative_weight += weight_rng.expovariate(1.0)
+                target = int(round(num_audit_logs * cumulative_weight / total_weight))
+                trail_length = target - allocated
+                allocated = target
+                if trail_length <= 0:
+                    continue
+                
+                # Trail starts when the record was created (or at the window start)
+                created_at = to_epoch(record.get(created_at_key)) if created_at_key else None
+                trail_start = max(window_start, created_at) if created_at is not None else window_start
+                trail_seconds = max(1, now - trail_start)
+                offsets = sorted(random.randrange(trail_seconds) for _ in range(trail_length))
+                
+                record_id = record[id_key]
+                owner_id = owner_user_id(record)
+                previous_audit_id = None
+                
+                for event_index, offset in enumerate(offsets):
+                    audit_id = generate_uuid()
+                    
+                    # INSERT opens the trail, then reads/updates, occasionally a final DELETE
+                    if event_index == 0:
+                        action = 'INSERT'
+                    elif event_index == trail_length - 1 and random.random() < 0.03:
+                        action = 'DELETE'
+                    else:
+                        action = 'UPDATE' if random.random() < 0.7 else 'SELECT'
+                    
+                    # Owners act on their own records most of the time, staff otherwise
+                    if owner_id and random.random() < 0.8:
+                        actor_id = owner_id
+                    else:
+                        actor_id = random.choice(staff_user_ids)
+                    
+                    changed_field = f'{{"{random.choice(fields)}": "updated"}}' if action == 'UPDATE' else None
+                    ip = f"{random.randint(192, 255)}.{random.randint(168, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}"
+                    
+                    bulk.add_row([
+                        audit_id, actor_id, action, table_name, record_id,
+                        previous_audit_id, changed_field, ip, random.choice(user_agents),
+                        format_datetime(trail_start + offset)
+                    ])
+                    previous_audit_id = audit_id
+                    
+                    emitted += 1
+                    if emitted % 1000000 == 0:
+                        print(f"    {emitted:,}/{num_audit_logs:,} audit rows written...")
+        
+        bulk.flush()
     
     def generate_languages_and_translations(self):
         """Generate language data and Vietnamese translations for all name/description columns."""
@@ -3268,10 +3739,10 @@ class PrintingServiceDataGenerator:
         ]
         
         self.languages = []
-        created_at = datetime.now()
+        created_at = from_epoch(as_of())
         
         for lang_data in languages_data:
-            language_id = generate_uuid()
+            language_id = self.reference_id('language', lang_data['acronym'])
             self.languages.append({
                 'language_id': language_id,
                 'language_name': lang_data['name'],
@@ -3299,171 +3770,46 @@ class PrintingServiceDataGenerator:
             "translation_id", "table_name", "entry_id", "column_name", "language_id", "translation", "created_at"
         ])
         
-        created_at = datetime.now()
-        
-        # Helper function to translate common terms
-        def translate_to_vietnamese(text):
-            """Translate English text to Vietnamese for common academic and system terms.
-            Returns the Vietnamese translation, or None if translation is not possible."""
-            if not text:
-                return None
-            
-            text_lower = text.lower()
-            original_text = text
-            
-            # Common term translations (exact matches)
-            translations = {
-                'Computer Lab': 'Phòng máy tính',
-                'IT Lab': 'Phòng IT',
-                'Programming Lab': 'Phòng lập trình',
-                'Software Lab': 'Phòng phần mềm',
-                'Hardware Lab': 'Phòng phần cứng',
-                'Lecture Hall': 'Giảng đường',
-                'Classroom': 'Phòng học',
-                'Hall': 'Hội trường',
-                'Auditorium': 'Phòng hội thảo',
-                'Library': 'Thư viện',
-                'Reading Room': 'Phòng đọc',
-                'Study Area': 'Khu học tập',
-                'Reference Section': 'Khu tham khảo',
-                'Office': 'Văn phòng',
-                'Faculty Office': 'Văn phòng Khoa',
-                'Staff Office': 'Văn phòng Nhân viên',
-                'Administrative Office': 'Văn phòng Hành chính',
-                'Student Lounge': 'Phòng sinh hoạt',
-                'Common Area': 'Khu chung',
-                'Recreation Room': 'Phòng giải trí',
-                'Break Room': 'Phòng nghỉ',
-                'Storage Room': 'Kho',
-                'Supply Room': 'Kho vật tư',
-                'Equipment Storage': 'Kho thiết bị',
-                "Men's": "Nhà vệ sinh Nam",
-                "Women's": "Nhà vệ sinh Nữ",
-                'Stairwell': 'Cầu thang',
-                'Stairs': 'Thang bộ',
-                'Elevator': 'Thang máy',
-                'Main Campus': 'Khuôn viên chính',
-                'Main Academic Building': 'Tòa nhà Học thuật Chính',
-                'Science & Technology Building': 'Tòa nhà Khoa học & Công nghệ',
-                'Library & Research Center': 'Trung tâm Thư viện & Nghiên cứu',
-                'color': 'Màu',
-                'grayscale': 'Xám',
-                'black-white': 'Đen trắng',
-                'fall': 'Thu',
-                'spring': 'Xuân',
-                'summer': 'Hè'
-            }
-            
-            # Direct match
-            if text in translations:
-                return translations[text]
-            
-            # Pattern-based translations for academic terms
-            result = text
-            
-            # Faculty/Department/Major patterns
-            if text.startswith('Faculty of '):
-                result = 'Khoa ' + text[11:]
-            elif text.startswith('Department of '):
-                result = 'Bộ môn ' + text[14:]
-            elif text.startswith('Major in '):
-                result = 'Ngành ' + text[9:]
-            
-            # Common academic field translations
-            field_translations = {
-                'computer science': 'Khoa học Máy tính',
-                'computer engineering': 'Kỹ thuật Máy tính',
-                'software engineering': 'Kỹ thuật Phần mềm',
-                'data science': 'Khoa học Dữ liệu',
-                'information systems': 'Hệ thống Thông tin',
-                'electrical engineering': 'Kỹ thuật Điện',
-                'electronics engineering': 'Kỹ thuật Điện tử',
-                'telecommunications engineering': 'Kỹ thuật Viễn thông',
-                'control & automation engineering': 'Kỹ thuật Điều khiển & Tự động hóa',
-                'mechanical engineering': 'Kỹ thuật Cơ khí',
-                'automotive engineering': 'Kỹ thuật Ô tô',
-                'manufacturing engineering': 'Kỹ thuật Sản xuất',
-                'mechatronics engineering': 'Kỹ thuật Cơ điện tử',
-                'computer science & engineering': 'Khoa học & Kỹ thuật Máy tính',
-                'electrical & electronics engineering': 'Kỹ thuật Điện & Điện tử'
-            }
-            
-            # Check for field matches (case-insensitive)
-            for eng_field, vi_field in field_translations.items():
-                if eng_field in text_lower:
-                    # Replace the English field name with Vietnamese
-                    # Handle "&" variations
-                    if ' & ' in text or ' &' in text or '& ' in text:
-                        # Replace "&" with "và" in Vietnamese
-                        result = result.replace(' & ', ' và ').replace(' &', ' và').replace('& ', 'và ')
-                    result = result.replace(eng_field.title(), vi_field).replace(eng_field, vi_field)
-                    break
-            
-            # Common word replacements
-            replacements = [
-                ('Lab', 'Phòng'),
-                ('Building', 'Tòa nhà'),
-                ('Center', 'Trung tâm'),
-                ('Engineering', 'Kỹ thuật'),
-                ('Science', 'Khoa học'),
-                ('Technology', 'Công nghệ'),
-                ('Research', 'Nghiên cứu'),
-                ('Academic', 'Học thuật')
-            ]
-            
-            # Apply replacements if not already translated
-            if result == text:
-                for eng, vi in replacements:
-                    if eng in result:
-                        result = result.replace(eng, vi)
-            
-            # If still unchanged, return None (don't add to translation table)
-            # Only add translations that are actually different from the original
-            if result == original_text:
-                return None
-            
-            # Check if result still contains common English words - if so, it's not fully translated
-            # Common English words that shouldn't appear in Vietnamese translations
-            english_indicators = ['Engineering', 'Science', 'Technology', 'Building', 'Center', 
-                                'Research', 'Academic', 'and ', ' of ', 'Paper Distributors',
-                                'Printing Materials', 'Campus Supply', 'Educational Supplies',
-                                'Stationery Solutions', 'Electrical', 'Mechanical', 'Computer',
-                                'Materials Corp', 'Materials Inc', 'Distributors', 'Supplies Co',
-                                'Solutions', 'Corp', 'Inc', 'Ltd', 'Co']
-            
-            # If result contains English words, it's not a proper translation - return None
-            if any(indicator in result for indicator in english_indicators):
-                return None
-            
-            return result
-        
-        def add_translation_if_different(table_name, entry_id, column_name, original_text):
-            """Add translation to bulk_translations only if it's different from original and fully Vietnamese."""
-            if not original_text:
-                return
-            translated = translate_to_vietnamese(original_text)
-            if translated and translated != original_text:
-                translation_id = generate_uuid()
-                bulk_translations.add_row([
-                    translation_id, table_name, entry_id, column_name,
-                    vietnamese_lang_id, translated,
-                    created_at.strftime('%Y-%m-%d %H:%M:%S')
-                ])
+        created_at = from_epoch(as_of())
+        
+        created_at_sql = created_at.strftime('%Y-%m-%d %H:%M:%S')
+        
+        def add_translations_if_different(table_name, entries):
+            """Translate a batch of (entry_id, column_name, original_text) entries and add
+            a row for each one that is different from the original and fully Vietnamese."""
+            translated_texts = translate_batch([text for _, _, text in entries])
+            for (entry_id, column_name, original_text), translated in zip(entries, translated_texts):
+                if translated and translated != original_text:
+                    translation_id = generate_uuid()
+                    bulk_translations.add_row([
+                        translation_id, table_name, entry_id, column_name,
+                        vietnamese_lang_id, translated,
+                        created_at_sql
+                    ])
         
         # 1. Faculty translations
-        for faculty in self.faculties:
-            add_translation_if_different('faculty', faculty['faculty_id'], 'faculty_name', faculty.get('name'))
-            add_translation_if_different('faculty', faculty['faculty_id'], 'description', faculty.get('description'))
+        add_translations_if_different('faculty', [
+            entry
+            for faculty in self.faculties
+            for entry in ((faculty['faculty_id'], 'faculty_name', faculty.get('name')),
+                          (faculty['faculty_id'], 'description', faculty.get('description')))
+        ])
         
         # 2. Department translations
-        for dept in self.departments:
-            add_translation_if_different('department', dept['department_id'], 'department_name', dept.get('name'))
-            add_translation_if_different('department', dept['department_id'], 'description', dept.get('description'))
+        add_translations_if_different('department', [
+            entry
+            for dept in self.departments
+            for entry in ((dept['department_id'], 'department_name', dept.get('name')),
+                          (dept['department_id'], 'description', dept.get('description')))
+        ])
         
         # 3. Major translations
-        for major in self.majors:
-            add_translation_if_different('major', major['major_id'], 'major_name', major.get('name'))
-            add_translation_if_different('major', major['major_id'], 'description', major.get('description'))
+        add_translations_if_different('major', [
+            entry
+            for major in self.majors
+            for entry in ((major['major_id'], 'major_name', major.get('name')),
+                          (major['major_id'], 'description', major.get('description')))
+        ])
         
         # 4. Class translations
         # Skip class translations - class names are codes (e.g., "CS0101") and don't need translation
@@ -3488,32 +3834,42 @@ class PrintingServiceDataGenerator:
         #         ])
         
         # 6. Building translations
-        for building in self.buildings:
-            add_translation_if_different('building', building['building_id'], 'campus_name', building.get('campus_name'))
+        add_translations_if_different('building', [
+            (building['building_id'], 'campus_name', building.get('campus_name'))
+            for building in self.buildings
+        ])
         
         # 7. Room translations
         # Only translate rooms that have meaningful names (skip if name is just a code)
-        for room in self.rooms:
-            room_name = room.get('room_name', '')
-            # Skip if room_name looks like a code (e.g., "101", "F1R01") or is too short
-            if room_name and len(room_name) > 3 and not room_name.replace(' ', '').replace('-', '').isdigit():
-                add_translation_if_different('room', room['room_id'], 'room_name', room_name)
+        # Skip if room_name looks like a code (e.g., "101", "F1R01") or is too short
+        add_translations_if_different('room', [
+            (room['room_id'], 'room_name', room['room_name'])
+            for room in self.rooms
+            if room.get('room_name') and len(room['room_name']) > 3
+            and not room['room_name'].replace(' ', '').replace('-', '').isdigit()
+        ])
         
         # 8. Brand translations
-        for brand in self.brands:
-            add_translation_if_different('brand', brand['brand_id'], 'brand_name', brand.get('name'))
+        add_translations_if_different('brand', [
+            (brand['brand_id'], 'brand_name', brand.get('name'))
+            for brand in self.brands
+        ])
         
         # 9. Printer model translations
-        for model in self.models:
-            add_translation_if_different('printer_model', model['model_id'], 'model_name', model.get('name'))
-            add_translation_if_different('printer_model', model['model_id'], 'description', model.get('description'))
+        add_translations_if_different('printer_model', [
+            entry
+            for model in self.models
+            for entry in ((model['model_id'], 'model_name', model.get('name')),
+                          (model['model_id'], 'description', model.get('description')))
+        ])
         
         # 10. Semester translations
         # Only translate term_name (fall, spring, summer) - these are already handled in translate_to_vietnamese
-        for semester in self.semesters:
-            term_name = semester.get('term_name', '')
-            if term_name in ['fall', 'spring', 'summer']:
-                add_translation_if_different('semester', semester['semester_id'], 'term_name', term_name)
+        add_translations_if_different('semester', [
+            (semester['semester_id'], 'term_name', semester['term_name'])
+            for semester in self.semesters
+            if semester.get('term_name', '') in ['fall', 'spring', 'summer']
+        ])
         
         # 11. Deposit bonus package translations
         # Note: The package_name and description in the database columns are assumed to be in English
@@ -3535,14 +3891,14 @@ class PrintingServiceDataGenerator:
                 bulk_translations.add_row([
                     translation_id, 'deposit_bonus_package', pkg['package_id'], 'package_name',
                     vietnamese_lang_id, vi_data['name'],
-                    created_at.strftime('%Y-%m-%d %H:%M:%S')
+                    created_at_sql
                 ])
                 # Translate description
                 translation_id = generate_uuid()
                 bulk_translations.add_row([
                     translation_id, 'deposit_bonus_package', pkg['package_id'], 'description',
                     vietnamese_lang_id, vi_data['desc'],
-                    created_at.strftime('%Y-%m-%d %H:%M:%S')
+                    created_at_sql
                 ])
         
         # 12. Semester bonus translations
@@ -3555,7 +3911,7 @@ class PrintingServiceDataGenerator:
                 bulk_translations.add_row([
                     translation_id, 'semester_bonus', bonus['bonus_id'], 'description',
                     vietnamese_lang_id, vi_desc,
-                    created_at.strftime('%Y-%m-%d %H:%M:%S')
+                    created_at_sql
                 ])
         
         # 13. Color mode translations
@@ -3565,7 +3921,7 @@ class PrintingServiceDataGenerator:
                 bulk_translations.add_row([
                     translation_id, 'color_mode', color_mode['color_mode_id'], 'color_mode_name',
                     vietnamese_lang_id, translate_to_vietnamese(color_mode['color_mode_name']),
-                    created_at.strftime('%Y-%m-%d %H:%M:%S')
+                    created_at_sql
                 ])
         
         # 14. Page discount package translations
@@ -3587,7 +3943,7 @@ class PrintingServiceDataGenerator:
                 bulk_translations.add_row([
                     translation_id, 'page_discount_package', pkg['package_id'], 'package_name',
                     vietnamese_lang_id, pkg_data['name'].replace('pages', 'trang'),
-                    created_at.strftime('%Y-%m-%d %H:%M:%S')
+                    created_at_sql
                 ])
                 # Translate description: "50 pages: no discount" -> "50 trang: không giảm giá"
                 translation_id = generate_uuid()
@@ -3595,17 +3951,22 @@ class PrintingServiceDataGenerator:
                 bulk_translations.add_row([
                     translation_id, 'page_discount_package', pkg['package_id'], 'description',
                     vietnamese_lang_id, vi_desc,
-                    created_at.strftime('%Y-%m-%d %H:%M:%S')
+                    created_at_sql
                 ])
         
         # 15. Fund source translations
-        for fund in self.fund_sources:
-            add_translation_if_different('fund_source', fund['fund_id'], 'fund_source_name', fund.get('fund_source_name'))
-            add_translation_if_different('fund_source', fund['fund_id'], 'description', fund.get('description'))
+        add_translations_if_different('fund_source', [
+            entry
+            for fund in self.fund_sources
+            for entry in ((fund['fund_id'], 'fund_source_name', fund.get('fund_source_name')),
+                          (fund['fund_id'], 'description', fund.get('description')))
+        ])
         
         # 16. Supplier paper purchase translations
-        for purchase in self.supplier_purchases:
-            add_translation_if_different('supplier_paper_purchase', purchase['purchase_id'], 'supplier_name', purchase.get('supplier_name'))
+        add_translations_if_different('supplier_paper_purchase', [
+            (purchase['purchase_id'], 'supplier_name', purchase.get('supplier_name'))
+            for purchase in self.supplier_purchases
+        ])
         
         # 17. System configuration translations
         # Note: config_value might need translation, but descriptions definitely do
@@ -3631,7 +3992,63 @@ class PrintingServiceDataGenerator:
 # MAIN EXECUTION
 # ============================================================================
 
+def seeded_as_of(seed):
+    """As-of instant of the last full run with `seed` (from its snapshot), or None."""
+    try:
+        base = load_snapshot(snapshot_path(OUTPUT_SQL_FILE)).get('base') or {}
+    except (OSError, ValueError):
+        return None
+    return base.get('as_of') if base.get('seed') == seed else None
+
+def write_delta(generator, hours, until=None):
+    """Generate a delta after the last snapshot into DELTA_SQL_FILE and advance the snapshot."""
+    manifest_path = snapshot_path(OUTPUT_SQL_FILE)
+    snapshot = load_snapshot(manifest_path)
+    if until is None:
+        until = snapshot['as_of'] + int(hours * SECONDS_PER_HOUR)
+    
+    os.makedirs(os.path.dirname(DELTA_SQL_FILE), exist_ok=True)
+    tmp_output_file = DELTA_SQL_FILE + ".tmp"
+    with open(tmp_output_file, 'w', encoding='utf-8') as f:
+        f.write("-- ============================================\n")
+        f.write("-- INSERT DELTA DATA\n")
+        f.write("-- ============================================\n")
+        writer = sql_batch_writer(f)
+        next_snapshot = generator.generate_delta(snapshot, until, sql_out=writer)
+        writer.close()
+    os.replace(tmp_output_file, DELTA_SQL_FILE)
+    # Only advance the snapshot once the delta file is complete (keeping the full run's seed and as-of)
+    write_snapshot(manifest_path, dict(next_snapshot, base=snapshot.get('base')))
+    
+    print("\n" + "=" * 70)
+    print("DELTA GENERATION COMPLETE")
+    print("=" * 70)
+    print(f"Total SQL statements: {generator.sql_statement_count}")
+    print(f"Print jobs generated: {len(generator.print_jobs)}")
+    print(f"Payments generated: {len(generator.payments)}")
+    print(f"Output file: {DELTA_SQL_FILE}")
+    print(f"Snapshot: {manifest_path} (as of {format_datetime(next_snapshot['as_of'])})")
+
 def main():
+    global UPSERT_MODE, TABLOCK_INSERTS
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate SSPS test data as bulk INSERT SQL")
+    parser.add_argument("--scale", help="Scale preset (dev, small, medium, large, xl) or student count; overrides the spec's scale")
+    parser.add_argument("--dry-run", action="store_true", help="Print estimated rows and bytes per table, then exit")
+    parser.add_argument("--stable-ids", action="store_true",
+                        help="Derive reference data ids from natural keys (UUIDv5) so they are the same on every run")
+    parser.add_argument("--upsert", action="store_true",
+                        help="MERGE rows into the existing database (keyed on primary keys) instead of dropping and recreating it; "
+                             "implies --stable-ids and needs a seed")
+    parser.add_argument("--seed", type=int, help="Seed the random generator and ids so reruns produce the same rows (overrides the spec's seed)")
+    parser.add_argument("--as-of", help="Instant the generated data runs up to ('YYYY-MM-DD HH:MM:SS'; overrides the spec's as_of). "
+                                        "Default: now, or with a seed the as-of of the last run with that seed")
+    parser.add_argument("--delta", action="store_true",
+                        help="Append traffic after the last run's snapshot to insert_delta.sql instead of regenerating everything")
+    parser.add_argument("--hours", type=float, default=24, help="Length of the --delta window in hours (default: 24)")
+    parser.add_argument("--until", help="End of the --delta window ('YYYY-MM-DD HH:MM:SS'); overrides --hours")
+    args = parser.parse_args()
+    
     print("=" * 70)
     print("SMART PRINTING SERVICE SYSTEM (SSPS)")
     print("BULK INSERT DATA GENERATOR")
@@ -3646,6 +4063,54 @@ def main():
         print(f"Error loading spec file: {e}")
         return
     
+    # Apply the scale preset (derives every size-dependent count from one student count)
+    scale = args.scale if args.scale is not None else spec.get('scale')
+    if scale is not None:
+        try:
+            spec = apply_scale(spec, scale)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+        print(f"Scale '{scale}': {spec['num_students']:,} students, {spec['num_staff']:,} staff, "
+              f"{spec['floor_layout']} floor layout"
+              + (f" (+{spec['generated_campuses']} generated campuses)" if spec['generated_campuses'] else "")
+              + f", {spec['avg_print_jobs_per_student']:g} print jobs / {spec['avg_deposits_per_student']:g} deposits per student")
+    
+    if args.stable_ids or args.upsert:
+        spec['stable_reference_ids'] = True
+    UPSERT_MODE = args.upsert
+    include_schema_reset = INCLUDE_SCHEMA_RESET and not UPSERT_MODE
+    
+    # A fixed seed makes every random draw and id repeatable (upserts then update rows in place)
+    seed = args.seed if args.seed is not None else spec.get('seed')
+    if UPSERT_MODE and seed is None:
+        # Unseeded users, students, staff, jobs... get new random ids every run, so a second
+        # MERGE would insert them again and violate UNIQUE(email), student_code, employee_code
+        print("Error: --upsert needs a fixed seed (--seed N or the spec's seed) so reruns reproduce "
+              "the same rows and ids; use the same seed, spec and scale for every refresh")
+        return
+    if seed is not None:
+        random.seed(seed)
+        seed_uuids(seed)
+        print(f"Random seed: {seed}")
+    
+    # Pin "now": every created_at, date of birth and activity window is measured from it,
+    # so with a seed a rerun only differs where the spec or the code changed
+    run_as_of = args.as_of if args.as_of is not None else spec.get('as_of')
+    if run_as_of is None and seed is not None and not args.delta:
+        run_as_of = seeded_as_of(seed)
+    if run_as_of is not None and not args.delta:
+        set_as_of(run_as_of)
+        print(f"As of: {format_datetime(as_of())}")
+    
+    if args.dry_run:
+        prelude_bytes = 0
+        if include_schema_reset:
+            prelude_bytes = sum(os.path.getsize(path) for path in (delete_path, design_path) if os.path.exists(path))
+        print()
+        print_estimate(spec, prelude_bytes)
+        return
+    
     # Load media files
     print(f"\nScanning media folder: {MEDIA_FOLDER}")
     media_files = get_media_files(MEDIA_FOLDER)
@@ -3664,13 +4129,30 @@ def main():
     
     generator = PrintingServiceDataGenerator(spec, media_files, profile_pics_files)
     
+    if not args.delta:
+        # Fail now rather than when a unique code space runs out partway through the output
+        try:
+            generator.check_code_capacity()
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+    
+    if args.delta:
+        try:
+            write_delta(generator, args.hours, args.until)
+        except Exception as e:
+            print(f"Error during delta generation: {e}")
+            import traceback
+            traceback.print_exc()
+        return
+    
     try:
-        sql_content = generator.generate_all_data()
-        
-        # Prepare final output
+        # Prepare output prelude (schema reset + header); data statements are streamed after it,
+        # then any DDL deferred until after the data load
         final_output = []
+        deferred_output = []
         
-        if INCLUDE_SCHEMA_RESET:
+        if include_schema_reset:
             # Include delete and design scripts
             try:
                 # Use utf-8-sig to strip any BOM from schema files
@@ -3722,11 +4204,26 @@ def main():
                         filtered_lines.append(line)
                     design_content = '\n'.join(filtered_lines)
                     
+                if DEFER_INDEXES:
+                    # Tables first; secondary indexes and FK validation run after the data load
+                    design_content, index_statements, foreign_key_tables = split_schema(design_content)
+                    deferred_output.append("-- ============================================")
+                    deferred_output.append("-- CREATE INDEXES AND VALIDATE CONSTRAINTS (deferred until after the data load)")
+                    deferred_output.append("-- ============================================")
+                    deferred_output.extend(index_statements)
+                    deferred_output.extend(revalidate_constraints(foreign_key_tables))
+                    deferred_output.append("GO")
+                    TABLOCK_INSERTS = True
+                
                 final_output.append("-- ============================================")
-                final_output.append("-- CREATE DATABASE SCHEMA")
+                final_output.append("-- CREATE DATABASE SCHEMA" + (" (tables only; indexes are created after the data)" if DEFER_INDEXES else ""))
                 final_output.append("-- ============================================")
                 final_output.append(design_content)
                 final_output.append("")
+                if DEFER_INDEXES:
+                    final_output.extend(disable_constraints(foreign_key_tables))
+                    final_output.append("GO")
+                    final_output.append("")
             except Exception as e:
                 print(f"Warning: Could not include schema files: {e}")
         
@@ -3736,19 +4233,30 @@ def main():
             final_output.append("")
         
         final_output.append("-- ============================================")
-        final_output.append("-- INSERT TEST DATA")
+        final_output.append("-- UPSERT TEST DATA" if UPSERT_MODE else "-- INSERT TEST DATA")
         final_output.append("-- ============================================")
-        final_output.append(sql_content)
         
-        # Write to output file
+        # Write to output file, streaming generated statements straight to disk so
+        # large volumes (e.g. tens of millions of audit rows) stay in bounded memory.
+        # Write to a temp file first so a failed run never leaves a truncated insert.sql
         os.makedirs(os.path.dirname(OUTPUT_SQL_FILE), exist_ok=True)
-        with open(OUTPUT_SQL_FILE, 'w', encoding='utf-8') as f:
+        tmp_output_file = OUTPUT_SQL_FILE + ".tmp"
+        with open(tmp_output_file, 'w', encoding='utf-8') as f:
             f.write("\n".join(final_output))
+            f.write("\n")
+            writer = sql_batch_writer(f)
+            generator.generate_all_data(sql_out=writer)
+            writer.close()
+            if deferred_output:
+                f.write("\n".join(deferred_output))
+                f.write("\n")
+        os.replace(tmp_output_file, OUTPUT_SQL_FILE)
+        write_snapshot(snapshot_path(OUTPUT_SQL_FILE), dict(generator.snapshot(), base={'seed': seed, 'as_of': as_of()}))
         
         print("\n" + "=" * 70)
         print("GENERATION COMPLETE")
         print("=" * 70)
-        print(f"Total SQL statements: {len(generator.sql_statements)}")
+        print(f"Total SQL statements: {generator.sql_statement_count}")
         print(f"Users generated: {len(generator.users)}")
         print(f"Faculties generated: {len(generator.faculties)}")
         print(f"Departments generated: {len(generator.departments)}")
@@ -3764,6 +4272,15 @@ def main():
         print(f"Printers generated: {len(generator.printers)}")
         print(f"Print jobs generated: {len(generator.print_jobs)}")
         print(f"Output file: {OUTPUT_SQL_FILE}")
+        print(f"Snapshot (for --delta): {snapshot_path(OUTPUT_SQL_FILE)}")
+        
+        router = generator.build_printer_router()
+        if router:
+            router.save(PRINTER_ROUTES_FILE)
+            print(f"Printer routing index: {PRINTER_ROUTES_FILE} ({len(router.routes)} rooms)")
+        hitmap_count = generator.export_floor_hitmaps(FLOOR_HITMAPS_DIR)
+        if hitmap_count:
+            print(f"Floor hit-maps: {FLOOR_HITMAPS_DIR} ({hitmap_count} floors)")
         print()
         print("Ready to import into database!")
         print()
@@ -3777,14 +4294,19 @@ def main():
             if maps_dir_abs not in sys.path:
                 sys.path.insert(0, maps_dir_abs)
             from convert_svgs_to_png import convert_all_svgs_fast
+            from floor_generator import compose_layer_files, LAYERS_DIRNAME
             
-            # Convert both directories
             floors_diagrams_dir = os.path.join(maps_dir, "floors_diagrams")
             output_test_dir = os.path.join(maps_dir, "output_test")
             
-            for dir_path in [floors_diagrams_dir, output_test_dir]:
-                if os.path.exists(dir_path):
-                    convert_all_svgs_fast(dir_path)
+            # Diagrams WITH printers for output_test: merged from the layer files, not re-rendered
+            compose_layer_files(os.path.join(floors_diagrams_dir, LAYERS_DIRNAME), output_test_dir)
+            
+            # Convert both directories; only floors_diagrams (referenced by floor.file_url) gets tiles
+            if os.path.exists(floors_diagrams_dir):
+                convert_all_svgs_fast(floors_diagrams_dir)
+            if os.path.exists(output_test_dir):
+                convert_all_svgs_fast(output_test_dir, build_tiles=False)
             print("PNG generation complete!")
         except Exception as e:
             print(f"Warning: Could not generate PNGs in batch: {e}")
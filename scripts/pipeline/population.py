@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Student Population Constants
+============================
+Facts about the generated population shared by the generator (generate.py)
+and the size estimator (scale.py), kept in one place so the estimate follows
+the generator:
+
+- the academic years students are enrolled into
+- the hard-coded test accounts added on top of num_students / num_staff
+  (all use the password SmartPrint@123), and the activity they are
+  guaranteed on top of the population-wide averages
+"""
+
+ENROLLING_ACADEMIC_YEARS = ['2023-2024', '2024-2025']  # Academic years whose classes students are enrolled into
+
+# Seeded student test accounts, in creation order
+TEST_STUDENT_EMAILS = [
+    "student.test@edu.vn",
+    "phandienmanhthienk16@siu.edu.vn",
+    "leanhtuank16@siu.edu.vn",
+    "nguyenhongbaongock16@siu.edu.vn",
+    "phanthanhthaituank16@siu.edu.vn",
+    "lengocdangkhoak16@siu.edu.vn",
+    "lyhieuvyk17@siu.edu.vn",
+]
+TEST_STAFF_EMAIL = "staff.test@edu.vn"
+
+# Test accounts with no deposits or payments
+NO_PAYMENT_EMAILS = {"leanhtuank16@siu.edu.vn"}
+
+TEST_STUDENTS = len(TEST_STUDENT_EMAILS)
+TEST_STAFF = 1
+
+MIN_TEST_PRINT_JOBS = 5   # Every test account gets at least this many print jobs...
+MIN_TEST_DEPOSITS = 5     # ...and deposits (except the NO_PAYMENT_EMAILS accounts, which have none)
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Printer State Simulation
+========================
+Each printer runs through a continuous-time Markov chain of states over the
+generated period; printer_log rows are the chain's state changes, so logs
+show sessions, error bursts and maintenance visits instead of independent
+random entries.
+
+States and what they mean for printer_physical:
+- idle, printing, maintained, unplugged: the status of the same name
+- recovering: printing again right after an error (errors are more likely
+  here, so errors come in bursts)
+- error: printing with printing_status set to the error (the time spent in
+  this state is the resolution time and depends on the error's severity)
+
+A state is left after an exponentially distributed time with mean
+`mean_hours` (for errors: the severity's resolution hours), to one of the
+states in `next` with the given probabilities. All printers are stepped
+together, one transition per iteration, with NumPy. Each printer's last
+transition is chosen to end in its current printer_physical status.
+
+Usage:
+    config = printer_log_config(spec)
+    events = simulate_printer_states(start_epochs, end_epoch, final_states, config, rng)
+"""
+
+import random
+from bisect import bisect_right
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# ============================================================================
+# STATES AND DEFAULT RATES
+# ============================================================================
+
+STATES = ('idle', 'printing', 'recovering', 'error', 'maintained', 'unplugged')
+STATE_INDEX = {state: index for index, state in enumerate(STATES)}
+IDLE, PRINTING, RECOVERING, ERROR, MAINTAINED, UNPLUGGED = range(len(STATES))
+
+# Transitions that do not produce a log row (the end of a print session)
+SILENT_TRANSITIONS = {(PRINTING, IDLE), (RECOVERING, IDLE)}
+
+SECONDS_PER_HOUR = 3600
+
+# Defaults for the spec's printer_log section. Volume is driven mostly by idle's
+# mean_hours: ~500 gives a few dozen rows per printer-year, ~2 gives thousands.
+DEFAULT_PRINTER_LOG = {
+    'states': {
+        'idle': {'mean_hours': 500, 'next': {'printing': 0.8, 'error': 0.06, 'maintained': 0.1, 'unplugged': 0.04}},
+        'printing': {'mean_hours': 0.25, 'next': {'idle': 0.9, 'error': 0.1}},
+        'recovering': {'mean_hours': 0.1, 'next': {'idle': 0.6, 'error': 0.4}},
+        'error': {'next': {'recovering': 0.6, 'maintained': 0.3, 'unplugged': 0.1}},
+        'maintained': {'mean_hours': 3, 'next': {'idle': 1.0}},
+        'unplugged': {'mean_hours': 72, 'next': {'idle': 1.0}},
+    },
+    # Relative frequency of each error code
+    'error_codes': {
+        'PAPER_JAM': 30, 'LOW_TONER': 20, 'OUT_OF_PAPER': 15, 'OUT_OF_TONER': 10,
+        'DOOR_OPEN': 8, 'NETWORK_ERROR': 8, 'OFFLINE': 5, 'HARDWARE_ERROR': 4,
+    },
+    # Mean hours until an error is resolved, by severity
+    'resolution_hours': {'warning': 1, 'error': 6, 'critical': 36},
+    # Configuration / admin actions per printer per year (independent of the state chain)
+    'admin_actions_per_year': 2,
+}
+
+# Error code -> (severity, printer_physical.printing_status, description, resolution note)
+ERROR_CODES = {
+    'PAPER_JAM': ('error', 'paper_jam', 'Paper jam detected in paper path', 'Issue resolved by clearing paper jam'),
+    'LOW_TONER': ('warning', 'low_toner', 'Toner level is low', 'Toner cartridge replaced'),
+    'OUT_OF_PAPER': ('warning', 'out_of_paper', 'Paper tray is empty', 'Paper tray refilled'),
+    'OUT_OF_TONER': ('error', 'out_of_toner', 'Toner cartridge is empty', 'Toner cartridge replaced'),
+    'DOOR_OPEN': ('warning', 'door_open', 'Printer door is open', 'Printer door closed'),
+    'NETWORK_ERROR': ('error', 'network_error', 'Network connection lost', 'Network connection restored'),
+    'OFFLINE': ('critical', 'offline', 'Printer went offline', 'Hardware reset performed'),
+    'HARDWARE_ERROR': ('critical', 'error', 'Hardware malfunction detected', 'Issue resolved after maintenance'),
+}
+PRINTING_STATUS_ERROR_CODES = {status: code for code, (_, status, _, _) in ERROR_CODES.items()}
+PRINTING_STATUS_ERROR_CODES['paper_tray_empty'] = 'OUT_OF_PAPER'
+
+
+def printer_log_config(spec):
+    """The spec's printer_log section merged over the defaults (per state, per key)."""
+    overrides = spec.get('printer_log') or {}
+    states = {state: dict(rates) for state, rates in DEFAULT_PRINTER_LOG['states'].items()}
+    for state, rates in (overrides.get('states') or {}).items():
+        if state not in STATE_INDEX:
+            raise ValueError(f"Unknown printer state '{state}' in printer_log spec (expected one of {', '.join(STATES)})")
+        states[state].update(rates)
+    config = {key: overrides.get(key, value) for key, value in DEFAULT_PRINTER_LOG.items()}
+    config['states'] = states
+    unknown = set(config['error_codes']) - set(ERROR_CODES)
+    if unknown:
+        raise ValueError(f"Unknown error codes in printer_log spec: {', '.join(sorted(unknown))}")
+    return config
+
+
+def final_state_of(status, printing_status):
+    """(state, error code or None) the simulation must end in for a printer_physical status."""
+    if status == 'printing' and printing_status not in (None, 'printing'):
+        return 'error', PRINTING_STATUS_ERROR_CODES.get(printing_status, 'HARDWARE_ERROR')
+    return status, None
+
+
+def physical_status(state, error_code):
+    """printer_physical (status, printing_status) for a simulated (state, error code)."""
+    if state == 'error':
+        return 'printing', ERROR_CODES[error_code][1]
+    if state in ('printing', 'recovering'):
+        return 'printing', 'printing'
+    return state, None
+
+
+# ============================================================================
+# CHAIN TABLES
+# ============================================================================
+
+def _chain_tables(config):
+    """
+    Per-state tables: mean hours (0 for error), cumulative next-state probabilities,
+    error codes with cumulative weights, and mean resolution hours per error code.
+    """
+    mean_hours = []
+    cumulative = []
+    for state in STATES:
+        rates = config['states'][state]
+        mean_hours.append(float(rates.get('mean_hours', 0)) if state != 'error' else 0.0)
+        weights = [float(rates['next'].get(target, 0)) for target in STATES]
+        total = sum(weights)
+        if total <= 0:
+            raise ValueError(f"Printer state '{state}' has no next states")
+        running, row = 0.0, []
+        for weight in weights:
+            running += weight / total
+            row.append(running)
+        row[-1] = 1.0
+        cumulative.append(row)
+        if state != 'error' and mean_hours[-1] <= 0:
+            raise ValueError(f"Printer state '{state}' needs a positive mean_hours")
+
+    codes = list(config['error_codes'])
+    total = sum(config['error_codes'].values())
+    code_cumulative, running = [], 0.0
+    for code in codes:
+        running += config['error_codes'][code] / total
+        code_cumulative.append(running)
+    code_cumulative[-1] = 1.0
+    resolution_hours = [float(config['resolution_hours'][ERROR_CODES[code][0]]) for code in codes]
+    return mean_hours, cumulative, codes, code_cumulative, resolution_hours
+
+
+def expected_rows_per_printer(config, days):
+    """
+    Expected log rows one printer produces over `days` (state-change rows from the
+    chain's long-run transition rates, plus admin actions). Pure Python, for estimates.
+    """
+    mean_hours, cumulative, codes, code_cumulative, resolution_hours = _chain_tables(config)
+    code_share = [c - p for c, p in zip(code_cumulative, [0.0] + code_cumulative[:-1])]
+    mean_hours[ERROR] = sum(share * hours for share, hours in zip(code_share, resolution_hours))
+    jump = [[c - p for c, p in zip(row, [0.0] + row[:-1])] for row in cumulative]
+
+    # Stationary distribution of the jump chain (lazy power iteration, so periodic chains converge too)
+    visits = [1.0 / len(STATES)] * len(STATES)
+    for _ in range(1000):
+        visits = [0.5 * visits[j] + 0.5 * sum(visits[i] * jump[i][j] for i in range(len(STATES)))
+                  for j in range(len(STATES))]
+    hours_per_jump = sum(v * h for v, h in zip(visits, mean_hours))
+    logged_share = sum(visits[i] * jump[i][j] for i in range(len(STATES)) for j in range(len(STATES))
+                       if (i, j) not in SILENT_TRANSITIONS)
+    return days * 24 * logged_share / hours_per_jump + config['admin_actions_per_year'] * days / 365
+
+
+# ============================================================================
+# SIMULATION
+# ============================================================================
+
+def simulate_printer_states(start_epochs, end_epoch, final_states, config, rng=None, initial_states=None):
+    """
+    Simulate every printer's state chain from its start epoch up to end_epoch.
+
+    Args:
+        start_epochs: Per-printer start, epoch seconds
+        end_epoch: Common end (the as-of instant)
+        final_states: Per-printer (state, error code or None) to end in (see final_state_of),
+            or None to let the chain run freely
+        config: printer_log_config(spec)
+        rng: numpy Generator (NumPy path) - the `random` module is used without NumPy
+        initial_states: Per-printer (state, error code or None) at the start; all idle if None
+
+    Returns a dict of equal-length lists, one entry per transition, sorted by
+    printer then time: printer (index), time, from_state, to_state (STATES
+    indices), error_code (code string when entering error, else None) and
+    resolved_at (epoch when the error was left, None while unresolved); plus
+    'final_states', each printer's (state name, error code or None) at end_epoch.
+    """
+    if not NUMPY_AVAILABLE:
+        return _simulate_python(start_epochs, end_epoch, final_states, config, initial_states)
+
+    mean_hours, cumulative, codes, code_cumulative, resolution_hours = _chain_tables(config)
+    # Errors given by the caller may use codes the config no longer draws
+    given = [code for _, code in (initial_states or []) + (final_states or []) if code]
+    for code in dict.fromkeys(given):
+        if code not in codes:
+            codes.append(code)
+            resolution_hours.append(float(config['resolution_hours'][ERROR_CODES[code][0]]))
+    code_index = {code: index for index, code in enumerate(codes)}
+    mean_hours = np.array(mean_hours)
+    cumulative = np.array(cumulative)
+    code_cumulative = np.array(code_cumulative)
+    resolution_hours = np.array(resolution_hours)
+    drawn_codes = len(code_cumulative)
+
+    count = len(start_epochs)
+    times = np.asarray(start_epochs, dtype=np.float64).copy()
+    state = np.full(count, IDLE, dtype=np.int64)
+    error = np.full(count, -1, dtype=np.int64)   # Error code index while in the error state
+    if initial_states is not None:
+        state[:] = [STATE_INDEX[s] for s, _ in initial_states]
+        error[:] = [code_index[c] if c else -1 for _, c in initial_states]
+
+    chunks = []   # (printer, time, from_state, to_state, error) per iteration
+    alive = np.flatnonzero(times < end_epoch)
+    while alive.size:
+        current = state[alive]
+        mean = np.where(current == ERROR, resolution_hours[error[alive]], mean_hours[current])
+        next_time = times[alive] + rng.exponential(mean) * SECONDS_PER_HOUR
+        moving = next_time < end_epoch
+        alive, current, next_time = alive[moving], current[moving], next_time[moving]
+
+        target = (rng.random(alive.size)[:, None] > cumulative[current]).sum(axis=1)
+        new_error = np.where(target == ERROR, np.searchsorted(code_cumulative, rng.random(alive.size), side='right'), -1)
+        new_error = np.minimum(new_error, drawn_codes - 1)
+        chunks.append((alive, next_time, current, target, new_error))
+        state[alive], error[alive], times[alive] = target, new_error, next_time
+
+    relabel = np.zeros(0, dtype=np.int64)
+    if final_states is not None:
+        # Steer each printer into its current printer_physical state with one last transition
+        wanted_state = np.array([STATE_INDEX[s] for s, _ in final_states], dtype=np.int64)
+        wanted_error = np.array([code_index[c] if c else -1 for _, c in final_states], dtype=np.int64)
+        off = np.flatnonzero(state != wanted_state)
+        if off.size:
+            forced_time = times[off] + rng.random(off.size) * (end_epoch - times[off])
+            chunks.append((off, forced_time, state[off], wanted_state[off], wanted_error[off]))
+        # Already in error: the ongoing error becomes the printer's current error code
+        relabel = np.flatnonzero((state == wanted_state) & (wanted_state == ERROR))
+        state, error = wanted_state, wanted_error
+
+    if chunks:
+        printer, time, from_state, to_state, error_codes = (np.concatenate(column) for column in zip(*chunks))
+    else:
+        printer = time = from_state = to_state = error_codes = np.zeros(0, dtype=np.int64)
+    order = np.lexsort((time, printer))
+    printer, time, from_state, to_state, error_codes = (
+        column[order] for column in (printer, time, from_state, to_state, error_codes))
+    time = time.astype(np.int64)
+
+    last_row = np.full(count, -1, dtype=np.int64)
+    last_row[printer] = np.arange(printer.size)   # Later rows overwrite earlier ones
+    relabel_rows = last_row[relabel]
+    relabel = relabel[relabel_rows >= 0]
+    relabel_rows = relabel_rows[relabel_rows >= 0]
+    error_codes[relabel_rows] = error[relabel]
+
+    # An error is resolved when the printer's next transition happens
+    resolved_at = np.full(printer.size, -1, dtype=np.int64)
+    has_next = np.zeros(printer.size, dtype=bool)
+    has_next[:-1] = printer[1:] == printer[:-1]
+    entering_error = (to_state == ERROR) & has_next
+    resolved_at[:-1][entering_error[:-1]] = time[1:][entering_error[:-1]]
+
+    code_names = np.array(codes + [None], dtype=object)
+    return {
+        'printer': printer.tolist(),
+        'time': time.tolist(),
+        'from_state': from_state.tolist(),
+        'to_state': to_state.tolist(),
+        'error_code': code_names[np.where(to_state == ERROR, error_codes, -1)].tolist(),
+        'resolved_at': [None if ts < 0 else ts for ts in resolved_at.tolist()],
+        'final_states': [(STATES[s], codes[e] if s == ERROR else None) for s, e in zip(state.tolist(), error.tolist())],
+    }
+
+
+def _simulate_python(start_epochs, end_epoch, final_states, config, initial_states=None):
+    """simulate_printer_states without NumPy: one printer at a time with `random`."""
+    mean_hours, cumulative, codes, code_cumulative, resolution_hours = _chain_tables(config)
+    keys = ('printer', 'time', 'from_state', 'to_state', 'error_code', 'resolved_at')
+    events = {key: [] for key in keys}
+    events['final_states'] = []
+
+    def add(printer, ts, from_state, to_state, error_code):
+        if events['to_state'] and events['printer'][-1] == printer and events['to_state'][-1] == ERROR:
+            events['resolved_at'][-1] = ts
+        for key, value in zip(keys, (printer, ts, from_state, to_state, error_code, None)):
+            events[key].append(value)
+
+    def resolution_mean(code):
+        if code in codes:
+            return resolution_hours[codes.index(code)]
+        return float(config['resolution_hours'][ERROR_CODES[code][0]])
+
+    for printer, start in enumerate(start_epochs):
+        state, error = IDLE, None
+        if initial_states is not None:
+            state, error = STATE_INDEX[initial_states[printer][0]], initial_states[printer][1]
+        first_row = len(events['printer'])
+        ts, last = start, start
+        while ts < end_epoch:
+            mean = resolution_mean(error) if state == ERROR else mean_hours[state]
+            ts += int(random.expovariate(1.0 / mean) * SECONDS_PER_HOUR)
+            if ts >= end_epoch:
+                break
+            target = min(bisect_right(cumulative[state], random.random()), len(STATES) - 1)
+            error = codes[min(bisect_right(code_cumulative, random.random()), len(codes) - 1)] if target == ERROR else None
+            add(printer, ts, state, target, error)
+            state, last = target, ts
+
+        if final_states is not None:
+            wanted_state, wanted_error = STATE_INDEX[final_states[printer][0]], final_states[printer][1]
+            if state != wanted_state:
+                last = min(last, end_epoch)
+                add(printer, last + int(random.random() * (end_epoch - last)), state, wanted_state, wanted_error)
+            elif state == ERROR and len(events['printer']) > first_row:
+                events['error_code'][-1] = wanted_error
+            state, error = wanted_state, wanted_error
+        events['final_states'].append((STATES[state], error if state == ERROR else None))
+    return events
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Dataset Scale Presets
+=====================
+Sizes every table from one knob - the number of students. A preset name
+(dev/small/medium/large/xl) or a plain student count is turned into a
+consistent set of spec overrides: staff, buildings (hand-written showcase
+templates for small datasets, procedurally laid out campuses above that), fund
+sources, supplier purchases and per-student activity (print jobs and deposits
+per student). Classes (generate.py adds classes until every student has a
+seat), printers, rooms, printer logs, uploaded files, pages, payments, semester
+bonuses and audit rows then follow from those counts.
+
+estimate_tables() predicts row counts and output bytes per table from a spec
+without generating anything, for the generator's --dry-run.
+"""
+
+import json
+import math
+import os
+import random
+import sys
+
+from printer_states import printer_log_config, expected_rows_per_printer
+from population import (
+    ENROLLING_ACADEMIC_YEARS, NO_PAYMENT_EMAILS, TEST_STUDENTS, TEST_STAFF, MIN_TEST_PRINT_JOBS, MIN_TEST_DEPOSITS,
+)
+
+# ============================================================================
+# PRESETS
+# ============================================================================
+
+SCALE_PRESETS = {
+    'dev': 100,
+    'small': 2000,
+    'medium': 20000,
+    'large': 200000,
+    'xl': 1000000,
+}
+
+STUDENTS_PER_STAFF = 200
+MIN_STAFF = 10
+STUDENTS_PER_BUILDING = 1000
+SHOWCASE_BUILDINGS = 3           # Buildings generate.py lays out on the hand-written templates
+STUDENTS_PER_FUND_FACTOR = 10000  # Fund source / supplier purchase ranges grow by 1x per this many students
+
+# Print jobs and deposits per student, averaged over the whole population (generate.py
+# skews them towards power users). Larger campuses are sparser per student, so the job
+# and page tables grow with the student count without dwarfing everything else.
+# A plain student count uses the activity of the largest preset it reaches.
+PRESET_ACTIVITY = {
+    'dev': {'avg_print_jobs_per_student': 25, 'avg_deposits_per_student': 3},
+    'small': {'avg_print_jobs_per_student': 10, 'avg_deposits_per_student': 2},
+    'medium': {'avg_print_jobs_per_student': 5, 'avg_deposits_per_student': 2},
+    'large': {'avg_print_jobs_per_student': 2, 'avg_deposits_per_student': 1},
+    'xl': {'avg_print_jobs_per_student': 1, 'avg_deposits_per_student': 0.5},
+}
+
+# ============================================================================
+# ESTIMATION CONSTANTS (measured on generated output)
+# ============================================================================
+
+# Average INSERT bytes per row, including the statement header amortized over a batch
+ROW_BYTES = {
+    'user': 341, 'faculty': 208, 'department': 223, 'major': 221, 'academic_year': 151,
+    'class': 191, 'student': 172, 'staff': 136, 'page_size': 118, 'semester': 160,
+    'page_size_price': 177, 'system_page_allocation': 174, 'color_mode': 134,
+    'color_mode_price': 179, 'page_discount_package': 183, 'deposit_bonus_package': 235,
+    'semester_bonus': 208, 'student_semester_bonus': 207, 'deposit': 248, 'fund_source': 221,
+    'supplier_paper_purchase': 288, 'paper_purchase_item': 199, 'brand': 133, 'printer_model': 391,
+    'building': 170, 'floor': 217, 'room': 145, 'printer_physical': 308, 'system_configuration': 167,
+    'permitted_file_type': 195, 'uploaded_file': 281, 'print_job': 401, 'print_job_page': 114,
+    'payment': 213, 'student_wallet_ledger': 240, 'printer_log': 260, 'system_audit_log': 289,
+    'language': 127, 'name_translation': 194,
+}
+
+# Fixed lookup tables generate.py writes regardless of the spec
+FIXED_ROWS = {
+    'page_size': 3, 'page_size_price': 3, 'system_page_allocation': 3, 'color_mode': 3,
+    'color_mode_price': 3, 'page_discount_package': 4, 'deposit_bonus_package': 4, 'language': 2,
+}
+
+SEMESTER_BONUSES_PER_STUDENT = 2.75   # Semesters starting after a student's enrollment
+SEMESTER_BONUS_RECEIVED_RATE = 0.8
+PURCHASE_ITEMS_PER_PURCHASE = 2
+PRINTER_INSTALL_AGE_DAYS = (30, 1095)   # generate.py: printers are installed this many days ago; logs start there
+PAGES_PER_PRINT_JOB = 10
+PAID_JOB_RATE = 0.9                     # generate.py: share of (non-test) print jobs with a payment
+BALANCE_PAYMENT_RATE = 0.3              # Payments drawing on the wallet (a ledger row); power users run dry
+LAYOUT_SAMPLE_FLOORS = 20               # Procedural floors laid out to average rooms per floor
+
+# Floor templates directory (hand-written templates; procedural ones go to specs/generated)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+FLOOR_TEMPLATES_DIR = os.path.join(script_dir, "..", "maps", "specs")
+TEMPLATE_FILES = [f"floor_template_{n}.json" for n in range(1, 6)]
+
+
+# ============================================================================
+# SCALE RESOLUTION
+# ============================================================================
+
+def resolve_scale(scale):
+    """Student count for a preset name or a number (int or numeric string)."""
+    if isinstance(scale, str) and scale.strip().lower() in SCALE_PRESETS:
+        return SCALE_PRESETS[scale.strip().lower()]
+    try:
+        num_students = int(str(scale).replace('_', '').replace(',', ''))
+    except ValueError:
+        raise ValueError(f"Unknown scale '{scale}' (use one of {', '.join(SCALE_PRESETS)} or a student count)")
+    if num_students < 1:
+        raise ValueError(f"Scale must be at least 1 student, got {num_students}")
+    return num_students
+
+
+def preset_activity(num_students):
+    """Per-student activity settings of the largest preset at or below a student count."""
+    reached = [name for name, count in SCALE_PRESETS.items() if count <= num_students]
+    name = max(reached, key=SCALE_PRESETS.get) if reached else min(SCALE_PRESETS, key=SCALE_PRESETS.get)
+    return dict(PRESET_ACTIVITY[name])
+
+
+def _enrolling_slots(spec):
+    """Major x enrolling academic year x year level combinations students are seated in."""
+    durations = sum(
+        major.get('duration_years', 4)
+        for faculty in spec.get('faculties', [])
+        for department in faculty.get('departments', [])
+        for major in department.get('majors', [])
+    )
+    enrolling_years = [ay for ay in spec.get('academic_years', []) if ay.get('year_name') in ENROLLING_ACADEMIC_YEARS]
+    return durations * len(enrolling_years)
+
+
+def _spec_campus_buildings(spec):
+    return sum(len(campus.get('buildings', [])) for campus in spec.get('campuses', []))
+
+
+def scale_settings(spec, scale):
+    """
+    Spec overrides for a scale (preset name or student count).
+
+    Everything else in the spec (distributions, rates, price tables) is kept;
+    an explicit num_audit_logs is dropped so the audit volume follows the
+    record counts.
+    """
+    num_students = resolve_scale(scale)
+    settings = {'num_students': num_students}
+
+    settings['num_staff'] = max(MIN_STAFF, round(num_students / STUDENTS_PER_STAFF))
+
+    # Buildings: showcase templates while they suffice, otherwise every spec campus
+    # building plus enough generated campuses, laid out procedurally
+    target_buildings = math.ceil(num_students / STUDENTS_PER_BUILDING)
+    if target_buildings <= SHOWCASE_BUILDINGS:
+        settings['floor_layout'] = 'templates'
+        settings['generated_campuses'] = 0
+    else:
+        per_campus = int(spec.get('buildings_per_generated_campus', 10)) or 1
+        missing = max(0, target_buildings - _spec_campus_buildings(spec))
+        settings['floor_layout'] = 'procedural'
+        settings['generated_campuses'] = math.ceil(missing / per_campus)
+
+    # Fund sources and supplier purchases grow with the campus
+    factor = max(1, round(num_students / STUDENTS_PER_FUND_FACTOR))
+    for key, default in (('fund_sources', {'min': 10, 'max': 20}), ('supplier_purchases', {'min': 15, 'max': 30})):
+        base = spec.get(key, default)
+        settings[key] = {'min': base['min'] * factor, 'max': base['max'] * factor}
+
+    # Print jobs (with their uploaded files, pages and payments) and deposits per student
+    settings.update(preset_activity(num_students))
+
+    settings['num_audit_logs'] = None
+    return settings
+
+
+def apply_scale(spec, scale):
+    """Return a copy of spec with the scale's overrides applied (spec itself is unchanged)."""
+    scaled = dict(spec)
+    scaled.update(scale_settings(spec, scale))
+    scaled['scale'] = scale
+    return scaled
+
+
+# ============================================================================
+# ESTIMATION
+# ============================================================================
+
+def _floor_counts(template):
+    """(database rooms, printers) one floor template produces."""
+    rooms = 0
+    restrooms = 0
+    for room in template.get('rooms', []):
+        if not room.get('label') or room.get('type') in ('corridor', 'stairs', 'elevator'):
+            continue
+        if room.get('type') == 'restroom':
+            # generate.py keeps at most one men's and one women's restroom per floor
+            restrooms += 1
+            if restrooms > 2:
+                continue
+        rooms += 1
+    return rooms, len(template.get('printers', []))
+
+
+def _infrastructure_counts(spec):
+    """(buildings, floors, rooms, printers) for the spec's floor layout."""
+    floors_per_building = int(spec.get('floors_per_building', 5))
+
+    if spec.get('floor_layout', 'templates') != 'procedural':
+        per_template = []
+        for template_file in TEMPLATE_FILES:
+            try:
+                with open(os.path.join(FLOOR_TEMPLATES_DIR, template_file), 'r', encoding='utf-8') as f:
+                    per_template.append(_floor_counts(json.load(f)))
+            except (OSError, ValueError):
+                per_template.append((0, 0))
+        floor_counts = [per_template[(n - 1) % len(per_template)] for n in range(1, floors_per_building + 1)]
+        buildings = SHOWCASE_BUILDINGS
+        rooms = buildings * sum(r for r, _ in floor_counts)
+        printers = buildings * sum(p for _, p in floor_counts)
+        return buildings, buildings * floors_per_building, rooms, printers
+
+    buildings = _spec_campus_buildings(spec) + \
+        int(spec.get('generated_campuses', 0) or 0) * int(spec.get('buildings_per_generated_campus', 10))
+    printer_range = spec.get('printers_per_building', {'min': 2, 'max': 8})
+    printers = buildings * (printer_range['min'] + printer_range['max']) / 2
+
+    # Average rooms per floor from a fixed sample of procedural layouts
+    maps_dir = os.path.abspath(os.path.join(script_dir, "..", "maps"))
+    if maps_dir not in sys.path:
+        sys.path.insert(0, maps_dir)
+    from layout_generator import generate_floor_template
+    sample_rng = random.Random(0)
+    grid_cols = int(spec.get('floor_grid_cols', 24))
+    grid_rows = int(spec.get('floor_grid_rows', 16))
+    sample = [
+        _floor_counts(generate_floor_template(sample_rng, 1, 0, grid_cols, grid_rows))[0]
+        for _ in range(LAYOUT_SAMPLE_FLOORS)
+    ]
+    floors = buildings * floors_per_building
+    return buildings, floors, floors * sum(sample) / len(sample), printers
+
+
+def _range_mean(spec, key, default):
+    value = spec.get(key, default)
+    return (value['min'] + value['max']) / 2
+
+
+def _printer_log_days(spec):
+    """Average days of log per printer: days_of_data, cut short for printers installed within it."""
+    days = spec.get('days_of_data', 365)
+    youngest, oldest = PRINTER_INSTALL_AGE_DAYS
+    # Mean of min(age, days) for an install age uniform over [youngest, oldest]
+    cut = min(max(days, youngest), oldest)
+    covered = (cut * cut - youngest * youngest) / 2 + days * (oldest - cut)
+    return covered / (oldest - youngest)
+
+
+def estimate_tables(spec):
+    """
+    Estimated rows per table for a spec, in generation order.
+    Returns a list of (table_name, rows, bytes).
+    """
+    num_students = int(spec.get('num_students', 0))
+    num_staff = int(spec.get('num_staff', 0))
+    faculties = spec.get('faculties', [])
+    departments = [d for f in faculties for d in f.get('departments', [])]
+    majors = [m for d in departments for m in d.get('majors', [])]
+    academic_years = spec.get('academic_years', [])
+
+    # Regular classes for every slot, plus the classes generate.py adds to seat everyone
+    classes_per_major_year = int(spec.get('classes_per_major_year', 2))
+    students_per_class = int(spec.get('students_per_class', 35))
+    students = num_students + TEST_STUDENTS
+    overflow = max(0, students - _enrolling_slots(spec) * classes_per_major_year * students_per_class)
+    classes = (sum(m.get('duration_years', 4) for m in majors) * len(academic_years) * classes_per_major_year
+               + math.ceil(overflow / students_per_class))
+    semesters = len(academic_years) * len(spec.get('semester_names', []))
+    brands = spec.get('printer_brands', [])
+    models = sum(len(b.get('models', [])) for b in brands)
+    buildings, floors, rooms, printers = _infrastructure_counts(spec)
+
+    student_semester_bonuses = students * SEMESTER_BONUSES_PER_STUDENT
+    # Population-wide averages, but never below the test accounts' guaranteed minimums
+    depositing_students = students - len(NO_PAYMENT_EMAILS)
+    deposits = max(spec.get('avg_deposits_per_student', 0) * depositing_students,
+                   (TEST_STUDENTS - len(NO_PAYMENT_EMAILS)) * MIN_TEST_DEPOSITS)
+    print_jobs = max(spec.get('avg_print_jobs_per_student', 0) * students, TEST_STUDENTS * MIN_TEST_PRINT_JOBS)
+    payments = print_jobs * PAID_JOB_RATE
+    fund_sources = _range_mean(spec, 'fund_sources', {'min': 10, 'max': 20})
+    purchases = _range_mean(spec, 'supplier_purchases', {'min': 15, 'max': 30})
+    system_configs = len(spec.get('system_configs', {}))
+    printer_logs_per_printer = expected_rows_per_printer(printer_log_config(spec), _printer_log_days(spec))
+
+    users = num_students + num_staff + TEST_STUDENTS + TEST_STAFF
+    staff = num_staff + TEST_STAFF
+    if spec.get('num_audit_logs') is not None:
+        audit_logs = int(spec['num_audit_logs'])
+    else:
+        audited_records = users + students + staff + print_jobs + deposits + payments + printers + system_configs
+        audit_logs = spec.get('system_audit_rate', 0.3) * spec.get('audit_actions_per_record', 4) * audited_records
+
+    # Upper bound: one row per translated name/description (needs the translation service)
+    # (semesters counted twice: term names and semester bonus descriptions)
+    translations = (2 * (len(faculties) + len(departments) + len(majors)) + buildings + rooms + len(brands)
+                    + 2 * models + 2 * semesters + 2 * FIXED_ROWS['deposit_bonus_package']
+                    + FIXED_ROWS['color_mode'] + 2 * FIXED_ROWS['page_discount_package'] + 2 * fund_sources + purchases)
+
+    rows = [
+        ('user', users),
+        ('faculty', len(faculties)),
+        ('department', len(departments)),
+        ('major', len(majors)),
+        ('academic_year', len(academic_years)),
+        ('class', classes),
+        ('student', students),
+        ('staff', staff),
+        ('page_size', FIXED_ROWS['page_size']),
+        ('semester', semesters),
+        ('page_size_price', FIXED_ROWS['page_size_price']),
+        ('system_page_allocation', FIXED_ROWS['system_page_allocation']),
+        ('color_mode', FIXED_ROWS['color_mode']),
+        ('color_mode_price', FIXED_ROWS['color_mode_price']),
+        ('page_discount_package', FIXED_ROWS['page_discount_package']),
+        ('deposit_bonus_package', FIXED_ROWS['deposit_bonus_package']),
+        ('semester_bonus', semesters),
+        ('student_semester_bonus', student_semester_bonuses),
+        ('deposit', deposits),
+        ('fund_source', fund_sources),
+        ('supplier_paper_purchase', purchases),
+        ('paper_purchase_item', purchases * PURCHASE_ITEMS_PER_PURCHASE),
+        ('brand', len(brands)),
+        ('printer_model', models),
+        ('building', buildings),
+        ('floor', floors),
+        ('room', rooms),
+        ('printer_physical', printers),
+        ('system_configuration', system_configs),
+        ('permitted_file_type', len(spec.get('permitted_extensions', []))),
+        ('uploaded_file', print_jobs),
+        ('print_job', print_jobs),
+        ('print_job_page', print_jobs * PAGES_PER_PRINT_JOB),
+        ('payment', payments),
+        ('student_wallet_ledger', student_semester_bonuses * SEMESTER_BONUS_RECEIVED_RATE + 2 * deposits
+         + payments * BALANCE_PAYMENT_RATE),
+        ('printer_log', printers * printer_logs_per_printer + print_jobs),
+        ('system_audit_log', audit_logs),
+        ('language', FIXED_ROWS['language']),
+        ('name_translation', translations),
+    ]
+    return [(table, int(round(count)), int(round(count)) * ROW_BYTES[table]) for table, count in rows]
+
+
+def _format_bytes(num_bytes):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num_bytes < 1024 or unit == 'GB':
+            return f"{num_bytes:.0f} {unit}" if unit == 'B' else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024.0
+
+
+def print_estimate(spec, prelude_bytes=0):
+    """Print the per-table estimate (rows, bytes) and totals for a spec."""
+    tables = estimate_tables(spec)
+    scale = spec.get('scale')
+    label = f"scale '{scale}'" if scale is not None else "spec counts"
+    print(f"Estimated output ({label}: {spec.get('num_students', 0):,} students, "
+          f"{spec.get('floor_layout', 'templates')} floor layout):")
+    print(f"  {'table':<26}{'rows':>14}{'bytes':>12}")
+    for table, rows, num_bytes in tables:
+        print(f"  {table:<26}{rows:>14,}{_format_bytes(num_bytes):>12}")
+    total_rows = sum(rows for _, rows, _ in tables)
+    total_bytes = sum(num_bytes for _, _, num_bytes in tables) + prelude_bytes
+    if prelude_bytes:
+        print(f"  {'(schema reset prelude)':<26}{'':>14}{_format_bytes(prelude_bytes):>12}")
+    print(f"  {'TOTAL':<26}{total_rows:>14,}{_format_bytes(total_bytes):>12}")
+    floors = next(rows for table, rows, _ in tables if table == 'floor')
+    print(f"  Floor diagrams: {floors:,} floors")
+    return tables
+
+
+if __name__ == "__main__":
+    import yaml
+
+    spec_path = os.path.join(script_dir, "specs.yaml")
+    with open(spec_path, 'r', encoding='utf-8') as f:
+        base_spec = yaml.safe_load(f)
+    for preset in (sys.argv[1:] or list(SCALE_PRESETS)):
+        print_estimate(apply_scale(base_spec, preset))
+        print()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Bulk-Load Schema Phases
+=======================
+Splits design.sql so a schema-reset insert.sql loads data before paying for
+secondary indexes and constraint checks:
+
+1. tables: design.sql without its CREATE INDEX statements (tables keep their
+   PRIMARY KEY / UNIQUE constraints; views etc. are unchanged), followed by
+   ALTER TABLE ... NOCHECK CONSTRAINT ALL for every table with a FOREIGN KEY
+2. data: the generated INSERTs (the generator adds WITH (TABLOCK))
+3. deferred: the CREATE INDEX statements, then ALTER TABLE ... WITH CHECK
+   CHECK CONSTRAINT ALL, which re-validates the loaded rows so the foreign
+   keys (and CHECK constraints) are trusted again
+
+The split is found by parsing design.sql - CREATE INDEX statements (up to
+their terminating semicolon) and the FOREIGN KEY clauses inside each CREATE
+TABLE - so new indexes and keys are picked up without maintaining a list.
+"""
+
+import re
+
+CREATE_TABLE_RE = re.compile(r'^\s*CREATE\s+TABLE\s+(\[?\w+\]?)', re.IGNORECASE)
+CREATE_INDEX_RE = re.compile(r'^\s*CREATE\s+(UNIQUE\s+)?((NON)?CLUSTERED\s+)?INDEX\b', re.IGNORECASE)
+FOREIGN_KEY_RE = re.compile(r'\bFOREIGN\s+KEY\b', re.IGNORECASE)
+
+
+def split_schema(design_sql):
+    """
+    Split schema DDL into (table_sql, index_statements, foreign_key_tables).
+
+    table_sql is the DDL without CREATE INDEX statements; index_statements
+    are those statements in file order; foreign_key_tables lists the tables
+    declaring a FOREIGN KEY, in creation order.
+    """
+    table_lines = []
+    index_statements = []
+    foreign_key_tables = []
+    current_table = None
+    pending_index = None
+
+    for line in design_sql.split('\n'):
+        code = line.split('--', 1)[0]
+        if pending_index is not None:
+            pending_index.append(line)
+            if ';' in code:
+                index_statements.append('\n'.join(pending_index).strip())
+                pending_index = None
+            continue
+        if CREATE_INDEX_RE.match(code):
+            if ';' in code:
+                index_statements.append(line.strip())
+            else:
+                pending_index = [line]
+            continue
+
+        table_match = CREATE_TABLE_RE.match(code)
+        if table_match:
+            current_table = table_match.group(1)
+        elif current_table is not None:
+            if FOREIGN_KEY_RE.search(code) and current_table not in foreign_key_tables:
+                foreign_key_tables.append(current_table)
+            if code.strip().startswith(')') and ';' in code:
+                current_table = None
+        table_lines.append(line)
+
+    if pending_index is not None:
+        raise ValueError(f"Unterminated CREATE INDEX statement: {pending_index[0].strip()}")
+    return '\n'.join(table_lines), index_statements, foreign_key_tables
+
+
+def disable_constraints(tables):
+    """Statements turning off FK/CHECK validation for the data load."""
+    return [f"ALTER TABLE {table} NOCHECK CONSTRAINT ALL;" for table in tables]
+
+
+def revalidate_constraints(tables):
+    """Statements turning validation back on and checking every loaded row (constraints become trusted)."""
+    return [f"ALTER TABLE {table} WITH CHECK CHECK CONSTRAINT ALL;" for table in tables]
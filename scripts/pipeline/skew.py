@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Access Skew
+===========
+Skewed picking for the generator's "who / where" choices - which printer a
+print job goes to, which students submit jobs or make deposits - so activity
+concentrates on a few hot printers and power users, as in production, instead
+of being spread uniformly.
+
+A skew is a small dict (a section of specs.yaml's `skew`):
+- zipf_exponent: the k-th most popular item has weight 1 / k^s (0 = uniform)
+- hot_fraction, hot_share: the most popular hot_fraction of the items get
+  hot_share of all picks together (a YCSB-style hotspot); Zipf weights still
+  apply inside the hot and the cold set
+An empty or missing skew is uniform.
+
+Which items are popular is drawn with `random`, so it follows the generator's
+seed; callers can name preferred items that take the top ranks (e.g. library
+printers).
+"""
+
+import math
+import random
+
+
+class SkewedPicker:
+    """
+    Pick items with skewed popularity, e.g.
+        picker = SkewedPicker(printers, spec['skew'].get('job_printer'))
+        printer = picker.pick()
+    """
+
+    def __init__(self, items, skew=None, preferred=()):
+        if not items:
+            raise ValueError("SkewedPicker needs at least one item")
+        self.items = list(items)
+        self.weights = skew_weights(len(self.items), skew, preferred)
+        self._accumulate()
+
+    @classmethod
+    def from_weights(cls, items, weights):
+        """A picker with known weights (e.g. saved in a snapshot), so the same items stay hot."""
+        picker = cls.__new__(cls)
+        picker.items = list(items)
+        picker.weights = list(weights)
+        if not picker.items or len(picker.items) != len(picker.weights):
+            raise ValueError("SkewedPicker.from_weights needs one weight per item")
+        picker._accumulate()
+        return picker
+
+    def _accumulate(self):
+        self.cum_weights = []
+        running = 0.0
+        for weight in self.weights:
+            running += weight
+            self.cum_weights.append(running)
+
+    def pick(self):
+        """One item, drawn by popularity."""
+        return random.choices(self.items, cum_weights=self.cum_weights)[0]
+
+    def counts(self, total, minimum=0):
+        """
+        Split `total` picks over the items: every item gets `minimum`, the rest is
+        drawn by popularity. Returns a list of counts in item order.
+        """
+        counts = [minimum] * len(self.items)
+        extra = max(0, total - minimum * len(self.items))
+        for index in random.choices(range(len(self.items)), cum_weights=self.cum_weights, k=extra):
+            counts[index] += 1
+        return counts
+
+
+def skew_weights(count, skew=None, preferred=()):
+    """
+    Normalized pick weights for `count` items in item order.
+
+    Items are ranked by popularity - `preferred` indices first, each group in
+    random order - and weighted by rank as configured in `skew`.
+    """
+    skew = skew or {}
+    exponent = float(skew.get('zipf_exponent', 0))
+    hot_fraction = float(skew.get('hot_fraction', 0))
+    hot_share = skew.get('hot_share')
+    if exponent < 0 or not 0 <= hot_fraction <= 1:
+        raise ValueError(f"Invalid skew {skew}: zipf_exponent must be >= 0 and hot_fraction within 0..1")
+
+    preferred = [index for index in dict.fromkeys(preferred) if 0 <= index < count]
+    preferred_set = set(preferred)
+    others = [index for index in range(count) if index not in preferred_set]
+    random.shuffle(preferred)
+    random.shuffle(others)
+    ranking = preferred + others
+
+    by_rank = [1.0 / (rank + 1) ** exponent for rank in range(count)]
+    hot_count = min(count, math.ceil(hot_fraction * count))
+    if hot_share is not None and 0 < hot_count < count:
+        # Rescale so the hot set gets exactly hot_share of the picks
+        hot_total = sum(by_rank[:hot_count])
+        cold_total = sum(by_rank[hot_count:])
+        hot_share = float(hot_share)
+        by_rank = ([w * hot_share / hot_total for w in by_rank[:hot_count]]
+                   + [w * (1 - hot_share) / cold_total for w in by_rank[hot_count:]])
+
+    total = sum(by_rank)
+    weights = [0.0] * count
+    for rank, index in enumerate(ranking):
+        weights[index] = by_rank[rank] / total
+    return weights
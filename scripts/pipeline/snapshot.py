@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Dataset Snapshot Manifest
+=========================
+A compact JSON record of a generated dataset, written next to the SQL output
+after every run, so a later `generate.py --delta` can append more traffic
+(print jobs, pages, payments, ledger rows, printer logs) that references the
+same students and printers without regenerating anything:
+
+- as_of: the instant the data runs up to (the next delta starts there)
+- base: the seed and as-of instant of the full run the deltas extend (a
+  seeded rerun reuses that as-of, so it reproduces the same rows)
+- entity keys: the students that print most (user ids, popularity weights;
+  at most SNAPSHOT_JOB_STUDENTS of them),
+  printers (location, job popularity, state chain position, open error log),
+  staff user ids, and the pricing rows print jobs are priced with
+- running state: wallet balances, last timestamp per table, and the payment
+  reference allocator's position (references stay unique across runs)
+
+Only what the delta generator needs is kept - not every row - so the
+manifest stays small at any scale.
+"""
+
+import json
+import os
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_JOB_STUDENTS = 10000  # Most popular students kept for the delta's job -> student picks
+
+
+def snapshot_path(sql_path):
+    """Manifest path for a SQL output file (insert.sql -> insert.snapshot.json)."""
+    return os.path.splitext(sql_path)[0] + ".snapshot.json"
+
+
+def write_snapshot(path, snapshot):
+    """Write a manifest (via a temp file, so a failed write keeps the previous one)."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(snapshot, version=SNAPSHOT_VERSION), f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_snapshot(path):
+    """Read a manifest written by write_snapshot()."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No snapshot manifest at {path} - run a full generation first")
+    with open(path, 'r', encoding='utf-8') as f:
+        snapshot = json.load(f)
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"Snapshot {path} has version {snapshot.get('version')}, expected {SNAPSHOT_VERSION}")
+    return snapshot
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+SQL Batch Writer
+================
+Writes the generator's statements as a SQL Server script split into GO
+batches, so the server parses and compiles one bounded batch at a time
+instead of the whole data section, with optional explicit transactions:
+
+- SET NOCOUNT ON up front (no "N rows affected" message per statement)
+- GO after every N statements, whenever the target table changes, and/or
+  before a batch's text would exceed a size limit (bounds compile memory)
+- BEGIN/COMMIT TRANSACTION around roughly a configured number of rows, with
+  SET XACT_ABORT ON so a failed statement rolls back its transaction; a
+  transaction never spans a GO, so a failure loses at most one transaction
+
+Comment statements (section banners) are held back and written in front of
+the next data statement, so they land in the batch they describe.
+"""
+
+import re
+
+TARGET_TABLE_RE = re.compile(r'^\s*(?:INSERT\s+INTO|MERGE\s+INTO|UPDATE)\s+(\[?\w+\]?)', re.IGNORECASE)
+STAGED_TABLE_RE = re.compile(r'^\s*SELECT\s+TOP\s+0\s+.*?\bFROM\s+(\[?\w+\]?)', re.IGNORECASE)
+
+
+def statement_table(statement):
+    """Table a data statement writes to (INSERT / MERGE / UPDATE / staged MERGE), or None."""
+    match = TARGET_TABLE_RE.match(statement) or STAGED_TABLE_RE.match(statement)
+    return match.group(1) if match else None
+
+
+def statement_rows(statement):
+    """Rows a statement writes: one per VALUES tuple line, at least 1."""
+    return max(1, sum(1 for line in statement.split('\n') if line.startswith('(')))
+
+
+def is_comment(statement):
+    """True for statements made only of blank and -- comment lines."""
+    return all(not line.strip() or line.lstrip().startswith('--') for line in statement.split('\n'))
+
+
+class SqlBatchWriter:
+    """
+    Statement sink for PrintingServiceDataGenerator.add_sql(), e.g.
+        writer = SqlBatchWriter(f, statements_per_batch=20, per_table=True)
+        generator.generate_all_data(sql_out=writer)
+        writer.close()
+    With no limits set, statements are written unchanged (plus a final GO).
+    """
+
+    def __init__(self, out, statements_per_batch=0, per_table=False, max_batch_bytes=0,
+                 rows_per_transaction=0, nocount=False):
+        self.out = out
+        self.statements_per_batch = statements_per_batch
+        self.per_table = per_table
+        self.max_batch_bytes = max_batch_bytes
+        self.rows_per_transaction = rows_per_transaction
+        self.pending_comments = []
+        self.batch_statements = 0
+        self.batch_bytes = 0
+        self.batch_table = None
+        self.transaction_rows = 0
+        self.in_transaction = False
+        self.batch_count = 0
+
+        header = []
+        if nocount:
+            header.append("SET NOCOUNT ON;")
+        if rows_per_transaction:
+            header.append("SET XACT_ABORT ON;")
+        if header:
+            self.out.write("\n".join(header) + "\n\n")
+
+    def write_statement(self, statement):
+        """Write one statement, ending the batch / transaction first when a limit is reached."""
+        if is_comment(statement):
+            self.pending_comments.append(statement)
+            return
+
+        table = statement_table(statement)
+        size = len(statement)
+        if self.batch_statements and (
+                (self.statements_per_batch and self.batch_statements >= self.statements_per_batch)
+                or (self.per_table and table != self.batch_table)
+                or (self.max_batch_bytes and self.batch_bytes + size > self.max_batch_bytes)):
+            self.end_batch()
+
+        self._write_comments()
+        if self.rows_per_transaction and not self.in_transaction:
+            self.out.write("BEGIN TRANSACTION;\n\n")
+            self.in_transaction = True
+        self.out.write(statement)
+        self.out.write("\n\n")
+        self.batch_statements += 1
+        self.batch_bytes += size
+        self.batch_table = table
+
+        if self.rows_per_transaction:
+            self.transaction_rows += statement_rows(statement)
+            if self.transaction_rows >= self.rows_per_transaction:
+                self.commit()
+
+    def commit(self):
+        """Commit the open transaction, if any."""
+        if self.in_transaction:
+            self.out.write("COMMIT TRANSACTION;\n\n")
+            self.in_transaction = False
+        self.transaction_rows = 0
+
+    def end_batch(self):
+        """Commit and end the current batch with GO."""
+        self.commit()
+        self.out.write("GO\n\n")
+        self.batch_count += 1
+        self.batch_statements = 0
+        self.batch_bytes = 0
+        self.batch_table = None
+
+    def close(self):
+        """Write any trailing comments and end the last batch (the output stream stays open)."""
+        if self.batch_statements:
+            self.end_batch()
+        self._write_comments()
+
+    def _write_comments(self):
+        for comment in self.pending_comments:
+            self.out.write(comment)
+            self.out.write("\n\n")
+        self.pending_comments = []
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Epoch Time Utilities
+====================
+Timestamps for the data generator are handled as integer epoch seconds
+measured against a single fixed as-of instant (captured once per run), so
+row loops do plain integer arithmetic instead of calling datetime.now() and
+building timedelta objects. Values are formatted to SQL strings once, one at
+a time, or in NumPy batches where a whole table's timestamps come out of one
+array (e.g. printer_log).
+
+Epoch seconds are "naive wall-clock" seconds: they are counted from
+1970-01-01 00:00:00 in the same local time the generator writes to SQL, so
+no timezone conversion ever happens.
+"""
+
+import random
+from datetime import datetime, date, timedelta
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+EPOCH = datetime(1970, 1, 1)
+SECONDS_PER_MINUTE = 60
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+
+SQL_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+SQL_DATE_FORMAT = '%Y-%m-%d'
+
+
+# ============================================================================
+# CONVERSION
+# ============================================================================
+
+def to_epoch(value):
+    """Convert a datetime, date or SQL timestamp string to integer epoch seconds."""
+    if value is None:
+        return None
+    if isinstance(value, int) or (NUMPY_AVAILABLE and isinstance(value, np.integer)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.strptime(value, SQL_DATETIME_FORMAT if ' ' in value else SQL_DATE_FORMAT)
+    elif not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    delta = value - EPOCH
+    return delta.days * SECONDS_PER_DAY + delta.seconds
+
+
+def from_epoch(ts):
+    """Convert integer epoch seconds back to a naive datetime."""
+    days, seconds = divmod(int(ts), SECONDS_PER_DAY)
+    return datetime.fromordinal(EPOCH.toordinal() + days).replace(
+        hour=seconds // SECONDS_PER_HOUR,
+        minute=(seconds % SECONDS_PER_HOUR) // SECONDS_PER_MINUTE,
+        second=seconds % SECONDS_PER_MINUTE,
+    )
+
+
+def start_of_day(ts):
+    """Truncate epoch seconds to midnight of the same day."""
+    return ts - ts % SECONDS_PER_DAY
+
+
+# ============================================================================
+# AS-OF INSTANT
+# ============================================================================
+
+# Fixed "now" for the whole run; every relative date is measured against it
+AS_OF = to_epoch(datetime.now().replace(microsecond=0))
+
+
+def set_as_of(value):
+    """Pin the as-of instant (datetime, date, string or epoch seconds)."""
+    global AS_OF
+    AS_OF = to_epoch(value)
+    return AS_OF
+
+
+def as_of():
+    """Return the as-of instant in epoch seconds."""
+    return AS_OF
+
+
+def cap_at_as_of(ts):
+    """Clamp a timestamp derived from an earlier one (start, end, payment...) to the as-of instant."""
+    return None if ts is None else min(ts, AS_OF)
+
+
+def days_ago(days):
+    """Epoch seconds for the as-of instant shifted `days` into the past."""
+    return AS_OF - int(days * SECONDS_PER_DAY)
+
+
+# ============================================================================
+# RANDOM TIMESTAMPS
+# ============================================================================
+
+def random_epoch_in_range(start_days_ago, end_days_ago=0):
+    """Random timestamp (whole days after the range start) within a range of days ago."""
+    start = days_ago(start_days_ago)
+    days_between = (days_ago(end_days_ago) - start) // SECONDS_PER_DAY
+    if days_between <= 0:
+        return start
+    return start + random.randrange(days_between) * SECONDS_PER_DAY
+
+
+def random_epoch_with_pattern(days, hour_patterns):
+    """Random timestamp within the last `days` days using peak/normal/low hour patterns."""
+    day_start = start_of_day(random_epoch_in_range(days))
+
+    # Choose hour based on patterns
+    if random.random() < 0.5:  # 50% peak hours
+        hour = random.choice(hour_patterns.get('peak', [9, 10, 14, 15]))
+    elif random.random() < 0.3:  # 30% normal hours
+        hour = random.choice(hour_patterns.get('normal', [8, 11, 16]))
+    else:  # 20% low hours
+        hour = random.choice(hour_patterns.get('low', [7, 17, 18]))
+
+    minute = random.randint(0, 59)
+    second = random.randint(0, 59)
+
+    return day_start + hour * SECONDS_PER_HOUR + minute * SECONDS_PER_MINUTE + second
+
+
+def batch_rng():
+    """NumPy generator seeded from `random`, so batches follow the generator's seed."""
+    return np.random.default_rng(random.getrandbits(64))
+
+
+def spread_epochs(start, end, count):
+    """`count` timestamps evenly spaced from `start` towards `end` (truncated to seconds)."""
+    if count <= 0:
+        return []
+    step = (end - start) / count
+    return [start + int(step * i) for i in range(count)]
+
+
+# ============================================================================
+# FORMATTING
+# ============================================================================
+
+def format_datetime(ts):
+    """Format epoch seconds as 'YYYY-MM-DD HH:MM:SS' (None stays None)."""
+    if ts is None:
+        return None
+    # str() of a whole-second datetime is the SQL format, without strftime's parsing
+    return str(EPOCH + timedelta(seconds=int(ts)))
+
+
+def format_date(ts):
+    """Format epoch seconds as 'YYYY-MM-DD' (None stays None)."""
+    if ts is None:
+        return None
+    return str(date.fromordinal(EPOCH.toordinal() + int(ts) // SECONDS_PER_DAY))
+
+
+def format_datetimes(epochs):
+    """Vectorized format of many epoch seconds to 'YYYY-MM-DD HH:MM:SS' strings."""
+    if not NUMPY_AVAILABLE:
+        return [format_datetime(int(ts)) for ts in epochs]
+    if len(epochs) == 0:
+        return []
+    stamps = np.datetime_as_string(np.asarray(epochs, dtype='datetime64[s]'), unit='s')
+    return np.char.replace(stamps, 'T', ' ').tolist()
+
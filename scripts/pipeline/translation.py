@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Vietnamese Translation Engine
+=============================
+Compiled, memoized English -> Vietnamese translation used to build the
+name_translation table. The exact-match table and the pattern rules are
+compiled once; repeated strings (room names, descriptions, ...) are served
+from a bounded LRU cache instead of being translated again for every row.
+"""
+
+import re
+from functools import lru_cache
+
+# ============================================================================
+# TRANSLATION RULES
+# ============================================================================
+
+# Common term translations (exact matches)
+EXACT_TRANSLATIONS = {
+    'Computer Lab': 'Phòng máy tính',
+    'IT Lab': 'Phòng IT',
+    'Programming Lab': 'Phòng lập trình',
+    'Software Lab': 'Phòng phần mềm',
+    'Hardware Lab': 'Phòng phần cứng',
+    'Lecture Hall': 'Giảng đường',
+    'Classroom': 'Phòng học',
+    'Hall': 'Hội trường',
+    'Auditorium': 'Phòng hội thảo',
+    'Library': 'Thư viện',
+    'Reading Room': 'Phòng đọc',
+    'Study Area': 'Khu học tập',
+    'Reference Section': 'Khu tham khảo',
+    'Office': 'Văn phòng',
+    'Faculty Office': 'Văn phòng Khoa',
+    'Staff Office': 'Văn phòng Nhân viên',
+    'Administrative Office': 'Văn phòng Hành chính',
+    'Student Lounge': 'Phòng sinh hoạt',
+    'Common Area': 'Khu chung',
+    'Recreation Room': 'Phòng giải trí',
+    'Break Room': 'Phòng nghỉ',
+    'Storage Room': 'Kho',
+    'Supply Room': 'Kho vật tư',
+    'Equipment Storage': 'Kho thiết bị',
+    "Men's": "Nhà vệ sinh Nam",
+    "Women's": "Nhà vệ sinh Nữ",
+    'Stairwell': 'Cầu thang',
+    'Stairs': 'Thang bộ',
+    'Elevator': 'Thang máy',
+    'Main Campus': 'Khuôn viên chính',
+    'Main Academic Building': 'Tòa nhà Học thuật Chính',
+    'Science & Technology Building': 'Tòa nhà Khoa học & Công nghệ',
+    'Library & Research Center': 'Trung tâm Thư viện & Nghiên cứu',
+    'color': 'Màu',
+    'grayscale': 'Xám',
+    'black-white': 'Đen trắng',
+    'fall': 'Thu',
+    'spring': 'Xuân',
+    'summer': 'Hè'
+}
+
+# Faculty/Department/Major prefixes
+PREFIX_RULES = [
+    ('Faculty of ', 'Khoa '),
+    ('Department of ', 'Bộ môn '),
+    ('Major in ', 'Ngành '),
+]
+
+# Common academic field translations (matched case-insensitively, first match wins)
+FIELD_TRANSLATIONS = [
+    ('computer science', 'Khoa học Máy tính'),
+    ('computer engineering', 'Kỹ thuật Máy tính'),
+    ('software engineering', 'Kỹ thuật Phần mềm'),
+    ('data science', 'Khoa học Dữ liệu'),
+    ('information systems', 'Hệ thống Thông tin'),
+    ('electrical engineering', 'Kỹ thuật Điện'),
+    ('electronics engineering', 'Kỹ thuật Điện tử'),
+    ('telecommunications engineering', 'Kỹ thuật Viễn thông'),
+    ('control & automation engineering', 'Kỹ thuật Điều khiển & Tự động hóa'),
+    ('mechanical engineering', 'Kỹ thuật Cơ khí'),
+    ('automotive engineering', 'Kỹ thuật Ô tô'),
+    ('manufacturing engineering', 'Kỹ thuật Sản xuất'),
+    ('mechatronics engineering', 'Kỹ thuật Cơ điện tử'),
+    ('computer science & engineering', 'Khoa học & Kỹ thuật Máy tính'),
+    ('electrical & electronics engineering', 'Kỹ thuật Điện & Điện tử')
+]
+
+# Common word replacements (only applied when nothing else matched)
+WORD_REPLACEMENTS = [
+    ('Lab', 'Phòng'),
+    ('Building', 'Tòa nhà'),
+    ('Center', 'Trung tâm'),
+    ('Engineering', 'Kỹ thuật'),
+    ('Science', 'Khoa học'),
+    ('Technology', 'Công nghệ'),
+    ('Research', 'Nghiên cứu'),
+    ('Academic', 'Học thuật')
+]
+
+# Common English words that shouldn't appear in Vietnamese translations
+ENGLISH_INDICATORS = [
+    'Engineering', 'Science', 'Technology', 'Building', 'Center',
+    'Research', 'Academic', 'and ', ' of ', 'Paper Distributors',
+    'Printing Materials', 'Campus Supply', 'Educational Supplies',
+    'Stationery Solutions', 'Electrical', 'Mechanical', 'Computer',
+    'Materials Corp', 'Materials Inc', 'Distributors', 'Supplies Co',
+    'Solutions', 'Corp', 'Inc', 'Ltd', 'Co'
+]
+
+TRANSLATION_CACHE_SIZE = 4096  # Max distinct strings kept in the LRU cache
+
+
+def _alternation(terms):
+    """Compile a list of literal substrings into a single search pattern."""
+    return re.compile('|'.join(re.escape(term) for term in terms))
+
+
+# ============================================================================
+# TRANSLATOR
+# ============================================================================
+
+class VietnameseTranslator:
+    """Translate English names/descriptions to Vietnamese.
+
+    All rule tables are compiled once at construction time. `translate`
+    is memoized with a bounded LRU cache, so translating the same room name
+    or description for thousands of rows costs a single dictionary lookup.
+    """
+
+    def __init__(self, exact_translations=None, cache_size=TRANSLATION_CACHE_SIZE):
+        self.exact = dict(EXACT_TRANSLATIONS if exact_translations is None else exact_translations)
+        self.prefix_rules = tuple((prefix, len(prefix), vi) for prefix, vi in PREFIX_RULES)
+        self.prefix_pattern = _alternation(prefix for prefix, _ in PREFIX_RULES)
+        # (lowercase field, Title Case field, Vietnamese) - order matters, first match wins
+        self.fields = tuple((eng, eng.title(), vi) for eng, vi in FIELD_TRANSLATIONS)
+        self.field_pattern = _alternation(eng for eng, _ in FIELD_TRANSLATIONS)
+        self.word_replacements = tuple(WORD_REPLACEMENTS)
+        self.english_pattern = _alternation(ENGLISH_INDICATORS)
+        self.translate = lru_cache(maxsize=cache_size)(self._translate_uncached)
+
+    def _translate_uncached(self, text):
+        """Translate a single string. Returns None if no full translation exists."""
+        if not text:
+            return None
+
+        # Direct match
+        exact = self.exact.get(text)
+        if exact is not None:
+            return exact
+
+        result = text
+
+        # Faculty/Department/Major patterns
+        if self.prefix_pattern.match(text):
+            for prefix, prefix_len, vi in self.prefix_rules:
+                if text.startswith(prefix):
+                    result = vi + text[prefix_len:]
+                    break
+
+        # Academic field names (case-insensitive); the pattern is only a fast reject,
+        # the ordered scan keeps "first field in table order wins" semantics
+        text_lower = text.lower()
+        if self.field_pattern.search(text_lower):
+            for eng_field, eng_title, vi_field in self.fields:
+                if eng_field in text_lower:
+                    if ' & ' in text or ' &' in text or '& ' in text:
+                        # Replace "&" with "và" in Vietnamese
+                        result = result.replace(' & ', ' và ').replace(' &', ' và').replace('& ', 'và ')
+                    result = result.replace(eng_title, vi_field).replace(eng_field, vi_field)
+                    break
+
+        # Apply word replacements if not already translated
+        if result == text:
+            for eng, vi in self.word_replacements:
+                if eng in result:
+                    result = result.replace(eng, vi)
+
+        # Only keep translations that differ from the original and are fully Vietnamese
+        if result == text or self.english_pattern.search(result):
+            return None
+
+        return result
+
+    def translate_batch(self, texts):
+        """Translate a sequence of strings, returning a list aligned with the input.
+
+        Each distinct string is translated once per batch; falsy entries map to None.
+        """
+        translate = self.translate
+        resolved = {}
+        results = []
+        for text in texts:
+            if not text:
+                results.append(None)
+                continue
+            if text not in resolved:
+                resolved[text] = translate(text)
+            results.append(resolved[text])
+        return results
+
+    def cache_info(self):
+        """Return LRU cache statistics (hits, misses, maxsize, currsize)."""
+        return self.translate.cache_info()
+
+
+# Shared module-level instance
+default_translator = VietnameseTranslator()
+
+
+def translate_to_vietnamese(text):
+    """Translate text with the shared translator (memoized)."""
+    return default_translator.translate(text)
+
+
+def translate_batch(texts):
+    """Translate a batch of strings with the shared translator."""
+    return default_translator.translate_batch(texts)